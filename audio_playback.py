@@ -0,0 +1,242 @@
+"""
+Persistent, event-driven audio playback
+
+Playing a clip used to open the pygame mixer, load an MP3 from disk, poll
+get_busy() every 100 ms and close the mixer again, for every clip. The
+PlaybackEngine keeps one output open for the life of the process and plays
+clips from an in-memory queue on a single thread:
+
+- clips are decoded from bytes (no round trip through a file), and the
+  next clip is queued on the output channel while the current one plays,
+  so consecutive clips are gapless
+- the engine knows each clip's length, so it sleeps until a clip ends
+  instead of polling, and signals it through the clip's threading.Events
+  (started/done) and optional done callbacks
+- the output is a sink object: PygameAudioSink for speakers, NullAudioSink
+  for headless machines and tests (TTS_AUDIO_SINK=null)
+"""
+
+import io
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+
+DEFAULT_SINK = os.environ.get('TTS_AUDIO_SINK', 'pygame')
+TAIL_POLL_S = 0.01  # granularity for waiting out device latency after the last clip's nominal end
+NULL_SINK_BITRATE = 48000  # NullAudioSink estimates MP3 length at edge-tts' bitrate
+
+
+class PygameAudioSink:
+    """One persistent pygame mixer channel"""
+
+    def __init__(self):
+        import pygame
+        self._pygame = pygame
+        if not pygame.mixer.get_init():
+            pygame.mixer.init()
+        self._channel = pygame.mixer.Channel(0)
+
+    def decode(self, audio):
+        """(sound, seconds) for MP3/WAV/OGG bytes"""
+        sound = self._pygame.mixer.Sound(file=io.BytesIO(audio))
+        return sound, sound.get_length()
+
+    def play(self, sound):
+        self._channel.play(sound)
+
+    def queue(self, sound):
+        """Start sound right after the one that is playing (immediately if idle)"""
+        self._channel.queue(sound)
+
+    def busy(self):
+        return bool(self._channel.get_busy())
+
+    def close(self):
+        self._pygame.mixer.quit()
+
+
+class NullAudioSink:
+    """Plays nothing; for headless runs and tests
+
+    With realtime=True clips take their (estimated) length to "play", so
+    timing behaviour matches real playback; otherwise they finish at once.
+    """
+
+    def __init__(self, realtime=False):
+        self.realtime = realtime
+        self.played = []
+
+    def decode(self, audio):
+        return audio, (len(audio) * 8.0 / NULL_SINK_BITRATE if self.realtime else 0.0)
+
+    def play(self, sound):
+        self.played.append(sound)
+
+    def queue(self, sound):
+        self.played.append(sound)
+
+    def busy(self):
+        return False
+
+    def close(self):
+        pass
+
+
+class PlaybackClip:
+    """A queued clip; wait() on it, or pass on_done to PlaybackEngine.play()"""
+
+    def __init__(self, audio, on_done=None):
+        self.audio = audio
+        self.started = threading.Event()
+        self.done = threading.Event()
+        self.started_at = None
+        self.finished_at = None
+        self.duration = None
+        self.error = None
+        self._on_done = on_done
+        self._sound = None
+        self._ends_at = None
+
+    def wait(self, timeout=None):
+        """Block until the clip has finished playing (or failed); returns True if it did"""
+        return self.done.wait(timeout)
+
+    def _start(self):
+        self.started_at = time.perf_counter()
+        self.started.set()
+
+    def _finish(self, error=None):
+        self.error = error
+        self.finished_at = time.perf_counter()
+        self._sound = None
+        self.started.set()
+        self.done.set()
+        if self._on_done:
+            try:
+                self._on_done(self)
+            except Exception as e:
+                print(f"Warning: Playback callback failed: {e}", file=sys.stderr)
+
+
+class PlaybackEngine:
+    """Plays clips in submission order on one persistent output"""
+
+    def __init__(self, sink=None):
+        self._sink = sink
+        self._clips = queue.Queue()
+        self._stopping = False
+        self._idle = threading.Condition()
+        self._sink_lock = threading.Lock()
+        self._outstanding = 0
+        self.clips_played = 0
+        self._thread = threading.Thread(target=self._run, name="audio-playback", daemon=True)
+        self._thread.start()
+
+    def _open_sink(self):
+        with self._sink_lock:
+            if self._sink is None:
+                self._sink = NullAudioSink() if DEFAULT_SINK == 'null' else PygameAudioSink()
+            return self._sink
+
+    def warm_up(self):
+        """Open the output now instead of on the first clip"""
+        self._open_sink()
+
+    def play(self, audio, on_done=None):
+        """Queue encoded audio bytes; returns the PlaybackClip"""
+        clip = PlaybackClip(audio, on_done)
+        with self._idle:
+            self._outstanding += 1
+        self._clips.put(clip)
+        return clip
+
+    def play_file(self, path, on_done=None):
+        with open(path, 'rb') as f:
+            return self.play(f.read(), on_done)
+
+    def wait_idle(self, timeout=None):
+        """Block until every queued clip has finished"""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._idle:
+            while self._outstanding:
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+    def _complete(self, clip, error=None):
+        clip._finish(error)
+        with self._idle:
+            self._outstanding -= 1
+            if error is None:
+                self.clips_played += 1
+            self._idle.notify_all()
+
+    def _run(self):
+        pending = deque()  # clips handed to the sink (one playing, at most one queued behind it)
+        backlog = deque()  # decoded clips waiting for room on the channel
+        while True:
+            now = time.monotonic()
+            while pending and pending[0]._ends_at <= now:
+                # The last clip may still be audible if the device lags behind the clock
+                if len(pending) == 1 and not backlog and self._sink.busy():
+                    break
+                self._complete(pending.popleft())
+                if pending:
+                    pending[0]._start()
+
+            while backlog and len(pending) < 2:
+                clip = backlog.popleft()
+                if pending:
+                    self._sink.queue(clip._sound)
+                    clip._ends_at = max(pending[-1]._ends_at, now) + clip.duration
+                else:
+                    self._sink.play(clip._sound)
+                    clip._ends_at = now + clip.duration
+                    clip._start()
+                pending.append(clip)
+
+            if self._stopping and not pending and not backlog and self._clips.empty():
+                return
+
+            if pending:
+                timeout = max(pending[0]._ends_at - time.monotonic(), TAIL_POLL_S if len(pending) == 1 else 0.0)
+            else:
+                timeout = None
+            try:
+                clip = self._clips.get(timeout=timeout)
+            except queue.Empty:
+                continue
+            if clip is None:
+                continue
+            try:
+                clip._sound, clip.duration = self._open_sink().decode(clip.audio)
+            except Exception as e:
+                self._complete(clip, error=e)
+                continue
+            backlog.append(clip)
+
+    def close(self, timeout=None):
+        """Let queued clips finish, then release the output"""
+        self._stopping = True
+        self._clips.put(None)
+        self._thread.join(timeout)
+        if self._sink is not None:
+            self._sink.close()
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_playback_engine():
+    """The process-wide playback engine (created on first use)"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = PlaybackEngine()
+        return _engine
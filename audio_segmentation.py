@@ -0,0 +1,216 @@
+"""
+Segmented, parallel transcription of long recordings
+
+Long uploads are split at pauses found by the shared voice activity
+detector (vad.py) into segments of bounded length, each
+segment is transcribed on a worker pool, and the results are stitched back
+together in order with their start/end timestamps. Segments that contain
+only silence are never sent to an engine.
+
+Google requests are network bound and run on a thread pool. Local Whisper
+can use either threads (raise WHISPER_POOL_SIZE so several model instances
+run at once) or a process pool, where each process keeps its own resident
+model and throughput scales with cores.
+
+Configuration (environment variables):
+- SEGMENT_MAX_SECONDS    Longest segment sent to an engine (default: 30)
+- SEGMENT_MIN_SILENCE    Shortest pause (seconds) used as a cut point (default: 0.3)
+- SEGMENT_WORKERS        Segments transcribed concurrently (default: min(4, CPU count))
+- SEGMENT_EXECUTOR       "thread" or "process" for local engines (default: thread)
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from vad import VoiceActivityDetector
+
+DEFAULT_MAX_SEGMENT_S = float(os.environ.get('SEGMENT_MAX_SECONDS', '30'))
+DEFAULT_MIN_SILENCE_S = float(os.environ.get('SEGMENT_MIN_SILENCE', '0.3'))
+DEFAULT_WORKERS = int(os.environ.get('SEGMENT_WORKERS', str(min(4, os.cpu_count() or 1))))
+DEFAULT_EXECUTOR = os.environ.get('SEGMENT_EXECUTOR', 'thread')
+
+
+def audio_duration(audio):
+    """Length of an sr.AudioData in seconds"""
+    return len(audio.frame_data) / float(audio.sample_rate * audio.sample_width)
+
+
+def silence_mask(audio):
+    """Per-frame non-speech mask of an sr.AudioData and the frame length in seconds"""
+    samples = np.frombuffer(audio.get_raw_data(convert_width=2), dtype=np.int16)
+    # A short hangover: pauses between sentences should stay visible as cut points
+    vad = VoiceActivityDetector(sample_rate=audio.sample_rate, hangover_ms=100)
+    # Capped by the speech level so recordings without real pauses are not all "silence"
+    vad.calibrate(samples, percentile=10, speech_percentile=90)
+    speech = vad.process(samples)
+    if not len(speech):
+        speech = np.zeros(1, dtype=bool)
+    return ~speech, vad.frame_s
+
+
+def find_cut_points(audio, max_segment_s=DEFAULT_MAX_SEGMENT_S, min_silence_s=DEFAULT_MIN_SILENCE_S):
+    """Return [(start_s, end_s, is_silent)] segment boundaries covering the whole recording
+
+    Cuts are placed in the middle of pauses of at least min_silence_s; if a
+    stretch of speech has no such pause within max_segment_s it is cut hard
+    at max_segment_s.
+    """
+    duration = audio_duration(audio)
+    silent, frame_s = silence_mask(audio)
+
+    # Midpoints of long-enough silent runs are candidate cut points
+    min_run = max(1, int(round(min_silence_s / frame_s)))
+    edges = np.diff(np.concatenate(([0], silent.astype(np.int8), [0])))
+    run_starts = np.flatnonzero(edges == 1)
+    run_ends = np.flatnonzero(edges == -1)
+    long_runs = (run_ends - run_starts) >= min_run
+    candidates = ((run_starts[long_runs] + run_ends[long_runs]) / 2.0 * frame_s).tolist()
+
+    bounds = []
+    start = 0.0
+    while duration - start > max_segment_s:
+        window = [cut for cut in candidates if start < cut <= start + max_segment_s]
+        end = window[-1] if window else start + max_segment_s
+        bounds.append((start, end))
+        start = end
+    bounds.append((start, duration))
+
+    segments = []
+    for start, end in bounds:
+        first = int(start / frame_s)
+        last = max(first + 1, int(np.ceil(end / frame_s)))
+        segments.append((start, end, bool(np.all(silent[first:last]))))
+    return segments
+
+
+def split_at_silence(audio, max_segment_s=DEFAULT_MAX_SEGMENT_S, min_silence_s=DEFAULT_MIN_SILENCE_S):
+    """Split an sr.AudioData into [(start_s, end_s, is_silent, segment_audio)]"""
+    return [
+        (start, end, is_silent, audio.get_segment(start * 1000, end * 1000))
+        for start, end, is_silent in find_cut_points(audio, max_segment_s, min_silence_s)
+    ]
+
+
+def _transcribe_whisper_in_process(frame_data, sample_rate, sample_width, model_name):
+    """Process-pool entry point: transcribe raw audio with this process's resident Whisper model"""
+    import speech_recognition as sr
+    from whisper_registry import get_whisper_registry
+
+    audio = sr.AudioData(frame_data, sample_rate, sample_width)
+    return get_whisper_registry().transcribe(audio, model_name=model_name)
+
+
+class SegmentedTranscriber:
+    """Transcribes long recordings segment by segment on a worker pool"""
+
+    def __init__(self, max_workers=DEFAULT_WORKERS, executor=DEFAULT_EXECUTOR,
+                 max_segment_s=DEFAULT_MAX_SEGMENT_S, min_silence_s=DEFAULT_MIN_SILENCE_S):
+        self.max_workers = max(1, max_workers)
+        self.executor = executor
+        self.max_segment_s = max_segment_s
+        self.min_silence_s = min_silence_s
+        self._lock = threading.Lock()
+        self._threads = None
+        self._processes = None
+        self._pool_pid = None
+        self._recordings = 0
+        self._segments = 0
+        self._silent_segments = 0
+
+    def _pools(self):
+        """Create the pools on first use (and again in a forked worker)"""
+        with self._lock:
+            if self._pool_pid != os.getpid():
+                self._threads = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="segment")
+                self._processes = None
+                self._pool_pid = os.getpid()
+            return self._threads
+
+    def _process_pool(self):
+        self._pools()
+        with self._lock:
+            if self._processes is None:
+                # spawn, not fork: the portal process already runs threads
+                self._processes = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._processes
+
+    def transcribe(self, audio, recognize, whisper_model=None):
+        """Transcribe audio and return (text, segments)
+
+        recognize(segment_audio) runs an engine on one segment. When
+        whisper_model is given and the executor is "process", segments are
+        sent to the process pool instead. Each segment dict carries index,
+        start, end and text (or error). Engine exceptions propagate only if
+        every non-silent segment failed; the first failure is re-raised.
+        """
+        pieces = split_at_silence(audio, self.max_segment_s, self.min_silence_s)
+        use_processes = whisper_model is not None and self.executor == 'process' and len(pieces) > 1
+
+        futures = {}
+        if len(pieces) == 1:
+            pool = None
+        elif use_processes:
+            pool = self._process_pool()
+        else:
+            pool = self._pools()
+        for index, (start, end, is_silent, piece) in enumerate(pieces):
+            if is_silent:
+                continue
+            if pool is None:
+                futures[index] = None
+            elif use_processes:
+                futures[index] = pool.submit(_transcribe_whisper_in_process, piece.frame_data,
+                                             piece.sample_rate, piece.sample_width, whisper_model)
+            else:
+                futures[index] = pool.submit(recognize, piece)
+
+        segments = []
+        errors = []
+        for index, (start, end, is_silent, piece) in enumerate(pieces):
+            segment = {"index": index, "start": round(start, 2), "end": round(end, 2), "text": ""}
+            if index in futures:
+                try:
+                    future = futures[index]
+                    text = future.result() if future is not None else recognize(piece)
+                    segment["text"] = (text or "").strip()
+                except Exception as e:
+                    segment["error"] = str(e) or type(e).__name__
+                    errors.append(e)
+            segments.append(segment)
+
+        with self._lock:
+            self._recordings += 1
+            self._segments += len(pieces)
+            self._silent_segments += len(pieces) - len(futures)
+
+        if futures and len(errors) == len(futures):
+            raise errors[0]
+        text = " ".join(segment["text"] for segment in segments if segment["text"])
+        return text, segments
+
+    def stats(self):
+        """Pool configuration and how many segments were transcribed or skipped"""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "executor": self.executor,
+                "max_segment_s": self.max_segment_s,
+                "recordings": self._recordings,
+                "segments": self._segments,
+                "silent_segments_skipped": self._silent_segments,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool_pid == os.getpid():
+                self._threads.shutdown(wait=False)
+                if self._processes is not None:
+                    self._processes.shutdown(wait=False)
+            self._threads = self._processes = None
+            self._pool_pid = None
@@ -0,0 +1,122 @@
+"""
+Persisted ambient-noise calibration per microphone
+
+Measuring the room before every recording costs 1-2 seconds of dead time.
+The noise statistics of a device are instead stored in a small JSON cache
+and reused on later runs. Every capture folds the noise level it observed
+during silence back into the profile, so it keeps tracking the room. A
+full calibration only runs for unknown devices, when a profile has not been
+updated for CALIBRATION_MAX_AGE_HOURS, or when explicitly requested.
+
+Profiles hold the noise floor in dB (10*log10 of the mean squared int16
+sample value, as used by vad.py) and the matching SpeechRecognition
+energy_threshold for recognizer.listen based recorders.
+
+Configuration (environment variables):
+- CALIBRATION_PROFILE_PATH   Cache file (default: <OLLAMA_STT_CACHE_DIR>/calibration.json)
+- CALIBRATION_MAX_AGE_HOURS  Age after which a profile is recalibrated (default: 24)
+"""
+
+import json
+import math
+import os
+import sys
+import threading
+import time
+
+from fast_start import CACHE_DIR
+
+DEFAULT_PATH = os.environ.get('CALIBRATION_PROFILE_PATH', os.path.join(CACHE_DIR, "calibration.json"))
+DEFAULT_MAX_AGE_S = float(os.environ.get('CALIBRATION_MAX_AGE_HOURS', '24')) * 3600
+ENERGY_RATIO = 1.5  # SpeechRecognition's dynamic_energy_ratio: threshold relative to the noise RMS
+MIN_ENERGY_THRESHOLD = 50.0
+
+
+def energy_threshold_from_noise_db(noise_db):
+    """recognizer.energy_threshold for a noise floor in dB"""
+    return max(10 ** (noise_db / 20.0) * ENERGY_RATIO, MIN_ENERGY_THRESHOLD)
+
+
+def noise_db_from_energy_threshold(energy_threshold):
+    """Noise floor in dB implied by a recognizer.energy_threshold"""
+    return 20.0 * math.log10(max(energy_threshold / ENERGY_RATIO, 1e-3))
+
+
+def microphone_key(source):
+    """Profile key of an open sr.Microphone: device name and sample rate"""
+    name = "default" if getattr(source, 'device_index', None) is None else f"device-{source.device_index}"
+    try:
+        audio = source.audio
+        if source.device_index is None:
+            info = audio.get_default_input_device_info()
+        else:
+            info = audio.get_device_info_by_index(source.device_index)
+        name = info.get('name', name)
+    except Exception:
+        pass
+    return f"{name}@{source.SAMPLE_RATE}"
+
+
+class CalibrationProfiles:
+    """Per-device noise profiles stored in a JSON file"""
+
+    def __init__(self, path=DEFAULT_PATH, max_age_s=DEFAULT_MAX_AGE_S):
+        self.path = path
+        self.max_age_s = max_age_s
+        self._lock = threading.Lock()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                profiles = json.load(f)
+            return profiles if isinstance(profiles, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _store(self, profiles):
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(profiles, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Warning: Could not save calibration profile: {e}", file=sys.stderr)
+
+    def get(self, device):
+        """The device's profile, or None if it is missing or stale"""
+        with self._lock:
+            profile = self._load().get(device)
+        if not profile or time.time() - profile.get("updated_at", 0) > self.max_age_s:
+            return None
+        return profile
+
+    def save(self, device, noise_db):
+        """Store the result of a full calibration"""
+        now = time.time()
+        profile = {
+            "noise_db": round(float(noise_db), 2),
+            "energy_threshold": round(energy_threshold_from_noise_db(noise_db), 1),
+            "calibrated_at": now,
+            "updated_at": now,
+            "updates": 0,
+        }
+        with self._lock:
+            profiles = self._load()
+            profiles[device] = profile
+            self._store(profiles)
+        return profile
+
+    def update(self, device, noise_db, weight=0.2):
+        """Blend the noise level observed during a capture into the profile"""
+        with self._lock:
+            profiles = self._load()
+            profile = profiles.get(device)
+            if profile is None:
+                return None
+            profile["noise_db"] = round((1 - weight) * profile["noise_db"] + weight * float(noise_db), 2)
+            profile["energy_threshold"] = round(energy_threshold_from_noise_db(profile["noise_db"]), 1)
+            profile["updated_at"] = time.time()
+            profile["updates"] = profile.get("updates", 0) + 1
+            self._store(profiles)
+            return profile
@@ -0,0 +1,164 @@
+"""
+Multi-turn Ollama chat sessions with a bounded history
+
+Without a session every utterance is a fresh single-message chat, and
+Ollama unloads the model after its default five idle minutes, so the next
+utterance pays the model load again. A ChatSession keeps the conversation
+and sends keep_alive with every request, so the model stays resident
+between turns. While the model is loaded Ollama also reuses the KV cache
+for the unchanged start of the conversation, so a warm turn only
+evaluates the new message. Per-turn load_duration and prompt_eval numbers
+show this: load time drops to a few milliseconds after the first turn, and
+prompt evaluation stays flat as the history grows.
+
+The history is bounded by a token budget (estimated at about four
+characters per token). When it runs over, the oldest turns are folded into
+a short summary written by the same model, or simply dropped if
+summarizing fails. History is compacted down to half the budget at once,
+so the prompt prefix (and with it the KV cache) changes only rarely.
+
+Configuration (environment variables):
+- OLLAMA_SESSION_TOKEN_BUDGET  Tokens of history kept per session (default: 3072)
+- OLLAMA_SESSION_KEEP_ALIVE    How long Ollama keeps the model loaded between turns (default: 30m)
+"""
+
+import os
+import sys
+import threading
+import uuid
+
+DEFAULT_TOKEN_BUDGET = int(os.environ.get('OLLAMA_SESSION_TOKEN_BUDGET', '3072'))
+DEFAULT_KEEP_ALIVE = os.environ.get('OLLAMA_SESSION_KEEP_ALIVE', '30m')
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4  # role markers and separators of the chat template
+SUMMARY_PROMPT = (
+    "Summarize the following conversation in a few sentences. Keep names, facts, decisions "
+    "and open questions; leave out small talk.\n\n{transcript}"
+)
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + MESSAGE_OVERHEAD_TOKENS
+
+
+def new_session_id():
+    return uuid.uuid4().hex[:12]
+
+
+class ChatSession:
+    """Conversation history for one model, bounded by a token budget"""
+
+    def __init__(self, model, token_budget=DEFAULT_TOKEN_BUDGET, keep_alive=DEFAULT_KEEP_ALIVE, summarize=True):
+        self.model = model
+        self.token_budget = token_budget
+        self.keep_alive = keep_alive
+        self.summarize = summarize
+        self.summary = None
+        self.history = []
+        self.turns = []  # per-turn statistics, see record()
+        self.compactions = 0
+        self.lock = threading.Lock()  # held by callers for a whole turn; turns must not interleave
+
+    def messages(self, prompt):
+        """The messages to send for the next turn"""
+        messages = []
+        if self.summary:
+            messages.append({'role': 'system', 'content': f"Summary of the earlier conversation: {self.summary}"})
+        messages.extend(self.history)
+        messages.append({'role': 'user', 'content': prompt})
+        return messages
+
+    def history_tokens(self):
+        tokens = sum(estimate_tokens(message['content']) for message in self.history)
+        return tokens + (estimate_tokens(self.summary) if self.summary else 0)
+
+    def record(self, prompt, answer, final_stats=None, client=None, cached=False):
+        """Add a finished turn, compact the history if needed and return the turn's statistics
+
+        final_stats is the last chunk of Ollama's response stream; durations
+        in it are nanoseconds. It can be empty when the stream ended without
+        a done chunk, so cached answers say so with cached=True.
+        """
+        final_stats = final_stats or {}
+        self.history.append({'role': 'user', 'content': prompt})
+        self.history.append({'role': 'assistant', 'content': answer})
+        compacted = self._compact(client)
+        stats = {
+            "turn": len(self.turns) + 1,
+            "load_ms": final_stats.get('load_duration', 0) / 1e6,
+            "prompt_eval_ms": final_stats.get('prompt_eval_duration', 0) / 1e6,
+            "prompt_tokens": final_stats.get('prompt_eval_count', 0),
+            "eval_tokens": final_stats.get('eval_count', 0),
+            "history_tokens": self.history_tokens(),
+            "token_budget": self.token_budget,
+            "compacted": compacted,
+            "cached": cached,
+        }
+        self.turns.append(stats)
+        return stats
+
+    def _compact(self, client):
+        """Fold the oldest turns into the summary once the history is over budget"""
+        if self.history_tokens() <= self.token_budget:
+            return False
+        dropped = []
+        while len(self.history) > 2 and self.history_tokens() > self.token_budget // 2:
+            dropped.extend(self.history[:2])
+            del self.history[:2]
+        if not dropped:
+            return False
+        summary = None
+        if self.summarize and client is not None:
+            try:
+                summary = self._summarize(client, dropped)
+            except Exception as e:
+                print(f"Warning: Could not summarize the conversation ({e}); dropping the oldest turns.",
+                      file=sys.stderr)
+        # The summary may not grow without bound either
+        self.summary = summary[:self.token_budget // 4 * CHARS_PER_TOKEN] if summary else None
+        self.compactions += 1
+        return True
+
+    def _summarize(self, client, dropped):
+        transcript = "\n".join(f"{message['role']}: {message['content']}" for message in dropped)
+        if self.summary:
+            transcript = f"(earlier) {self.summary}\n{transcript}"
+        response = client.chat(
+            model=self.model,
+            messages=[{'role': 'user', 'content': SUMMARY_PROMPT.format(transcript=transcript)}],
+            options={'num_predict': self.token_budget // 4},
+            keep_alive=self.keep_alive,
+        )
+        return response['message']['content'].strip()
+
+
+def format_turn(stats):
+    """One line per turn: model load and prompt evaluation, the two parts a warm model makes cheap"""
+    if stats.get("cached"):
+        line = f"🔁 Turn {stats['turn']}: cached answer, Ollama not queried"
+    else:
+        line = (f"🔁 Turn {stats['turn']}: model load {stats['load_ms']:.0f} ms, "
+                f"prompt eval {stats['prompt_tokens']} tokens in {stats['prompt_eval_ms']:.0f} ms")
+    line += f", history ~{stats['history_tokens']}/{stats['token_budget']} tokens"
+    if stats.get("compacted"):
+        line += " (older turns summarized)"
+    return line
+
+
+def print_session_report(turns):
+    """Per-turn load and prompt eval times, and how warm turns compare with the first"""
+    turns = [stats for stats in turns if stats and "turn" in stats and not stats.get("cached")]
+    if not turns:
+        return
+    print("-" * 20)
+    print("Session Metrics:")
+    print(f"  {'turn':>4} {'load ms':>9} {'prompt tokens':>14} {'prompt eval ms':>15} {'history tokens':>15}")
+    for stats in turns:
+        print(f"  {stats['turn']:>4} {stats['load_ms']:>9.0f} {stats['prompt_tokens']:>14} "
+              f"{stats['prompt_eval_ms']:>15.0f} {stats['history_tokens']:>15}")
+    warm = turns[1:]
+    if warm:
+        print(f"  - First turn: load {turns[0]['load_ms']:.0f} ms, prompt eval {turns[0]['prompt_eval_ms']:.0f} ms")
+        print(f"  - Warm turns (average): load {sum(s['load_ms'] for s in warm) / len(warm):.0f} ms, "
+              f"prompt eval {sum(s['prompt_eval_ms'] for s in warm) / len(warm):.0f} ms")
+    print("-" * 20)
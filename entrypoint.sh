@@ -29,7 +29,10 @@ fi
 # Run the Python script with all passed arguments
 if [ $# -eq 0 ]; then
     # Default to web portal if no arguments provided
-    exec python /app/web_portal.py
+    # Production mode: one gunicorn worker with a thread pool (override with PORTAL_MODE=development)
+    # Keep the default model loaded unless OLLAMA_PRELOAD_MODELS is set (an empty value disables preloading)
+    export OLLAMA_PRELOAD_MODELS="${OLLAMA_PRELOAD_MODELS-llama3.1:latest}"
+    exec python /app/web_portal.py --mode "${PORTAL_MODE:-production}"
 else
     # Otherwise run with provided arguments
     exec "$@"
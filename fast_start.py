@@ -0,0 +1,125 @@
+"""
+Fast-start helpers shared by the entry points
+
+- ensure_dependencies: runs an app's dependency check/installer once and
+  records a manifest fingerprint (package list, interpreter and the file
+  each module resolved to). Later launches only re-check that those files
+  still exist, instead of probing or importing every package and
+  possibly spawning pip.
+- lazy_import: returns a module whose real import is deferred until an
+  attribute is first used, so heavy packages load only when needed.
+- startup_profile: phase timings printed when --startup-profile is passed.
+
+Set OLLAMA_STT_FORCE_DEP_CHECK=1 to force the full dependency check.
+"""
+
+import hashlib
+import importlib.util
+import json
+import os
+import sys
+import time
+
+CACHE_DIR = os.environ.get('OLLAMA_STT_CACHE_DIR', os.path.join(os.path.expanduser("~"), ".cache", "ollama-stt"))
+
+
+class StartupProfiler:
+    """Records named startup phases and prints their durations"""
+
+    def __init__(self, enabled):
+        self.enabled = enabled
+        self.start = time.perf_counter()
+        self._last = self.start
+        self.phases = []
+
+    def mark(self, label):
+        now = time.perf_counter()
+        self.phases.append((label, (now - self._last) * 1000))
+        self._last = now
+
+    def report(self):
+        if not self.enabled:
+            return
+        total = (time.perf_counter() - self.start) * 1000
+        print("⏱️  Startup profile:")
+        for label, elapsed in self.phases:
+            print(f"  - {label:<38} {elapsed:8.1f} ms")
+        print(f"  = {'total (since fast_start import)':<38} {total:8.1f} ms")
+
+
+startup_profile = StartupProfiler('--startup-profile' in sys.argv)
+
+
+def _fingerprint(app_name, required_packages):
+    manifest = {
+        "app": app_name,
+        "packages": sorted(f"{module}={package}" for module, package in required_packages),
+        "python": sys.version,
+        "executable": sys.executable,
+    }
+    return hashlib.sha256(json.dumps(manifest, sort_keys=True).encode()).hexdigest()
+
+
+def _manifest_path(app_name):
+    return os.path.join(CACHE_DIR, f"deps-{app_name}.json")
+
+
+def _manifest_is_valid(app_name, fingerprint):
+    try:
+        with open(_manifest_path(app_name), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return False
+    if manifest.get("fingerprint") != fingerprint:
+        return False
+    # A stat per module is enough to notice uninstalled packages
+    return all(origin and os.path.exists(origin) for origin in manifest.get("origins", {}).values())
+
+
+def _write_manifest(app_name, fingerprint, required_packages):
+    origins = {}
+    for module_name, _ in required_packages:
+        spec = importlib.util.find_spec(module_name)
+        if spec is None:
+            return
+        origins[module_name] = spec.origin
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(_manifest_path(app_name), 'w', encoding='utf-8') as f:
+            json.dump({"fingerprint": fingerprint, "origins": origins, "checked_at": time.time()}, f)
+    except OSError as e:
+        print(f"Warning: Could not write dependency manifest: {e}", file=sys.stderr)
+
+
+def ensure_dependencies(app_name, required_packages, check_and_install):
+    """Run check_and_install() unless a valid manifest says nothing changed
+
+    required_packages is a list of (import name, pip package) pairs.
+    check_and_install is the app's own checker; its return value is passed
+    through (None counts as success).
+    """
+    fingerprint = _fingerprint(app_name, required_packages)
+    if os.environ.get('OLLAMA_STT_FORCE_DEP_CHECK') != '1' and _manifest_is_valid(app_name, fingerprint):
+        startup_profile.mark("dependency check (cached)")
+        return True
+
+    result = check_and_install()
+    if result is None or result:
+        _write_manifest(app_name, fingerprint, required_packages)
+    startup_profile.mark("dependency check (full)")
+    return result if result is not None else True
+
+
+def lazy_import(name):
+    """Import a module lazily: the real import happens on first attribute access"""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ImportError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
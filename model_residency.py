@@ -0,0 +1,264 @@
+"""
+Ollama model residency for the web portal
+
+Ollama loads a model on its first request and unloads it after keep_alive
+(5 minutes) without requests. So the first /api/forward-to-ollama after
+boot, or after a quiet spell, waits for the whole model load. The
+residency manager moves that off the request path:
+
+- the configured models are loaded in the background when the portal starts
+- their keep_alive is refreshed periodically, so they are never unloaded
+  for being idle
+- loaded models are tracked from Ollama's /api/ps, and with a memory budget
+  the least recently used ones are unloaded until the rest fits. A model
+  unloaded this way is not reloaded until it is used again.
+
+Forwarding endpoints report each use via record_use(), including Ollama's
+load_duration, so requests that still hit a cold model are counted. A use
+only wakes the background loop early when a model budget is set and the
+model was not known to be loaded; otherwise the periodic refresh is enough.
+
+With several gunicorn workers only one process runs the background loop:
+every worker calls start(), but the loop waits for an exclusive lock on
+OLLAMA_RESIDENCY_LOCK_PATH. The other workers wait on the lock as standbys
+and take over if the owning worker exits. Their requests do not reach the
+owner's LRU order, so with a budget the least recently used model is judged
+by the owning worker's requests.
+
+Configuration (environment variables):
+- OLLAMA_PRELOAD_MODELS        Comma-separated models to keep resident (default: none; entrypoint.sh sets llama3.1:latest)
+- OLLAMA_RESIDENCY_MAX_BYTES   Memory budget for loaded models (default: 0, no budget)
+- OLLAMA_KEEP_ALIVE_REFRESH_S  Seconds between keep_alive refreshes (default: 60, below OLLAMA_KEEP_ALIVE)
+- OLLAMA_RESIDENCY_LOCK_PATH   Lock file that elects the managing process (default: <OLLAMA_STT_CACHE_DIR>/residency.lock)
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from fast_start import CACHE_DIR
+
+try:
+    import fcntl
+except ImportError:  # Windows: no preforking server, the single process manages residency
+    fcntl = None
+
+DEFAULT_MODELS = [model.strip() for model in os.environ.get('OLLAMA_PRELOAD_MODELS', '').split(',')
+                  if model.strip()]
+DEFAULT_MAX_BYTES = int(os.environ.get('OLLAMA_RESIDENCY_MAX_BYTES', '0'))
+DEFAULT_REFRESH_S = float(os.environ.get('OLLAMA_KEEP_ALIVE_REFRESH_S', '60'))
+DEFAULT_LOCK_PATH = os.environ.get('OLLAMA_RESIDENCY_LOCK_PATH', os.path.join(CACHE_DIR, "residency.lock"))
+COLD_LOAD_MS = 500  # a load_duration above this means the request had to load the model
+
+
+class ModelResidencyManager:
+    """Preloads models, keeps them warm and evicts by LRU under a memory budget"""
+
+    def __init__(self, client_factory, models=DEFAULT_MODELS, max_bytes=DEFAULT_MAX_BYTES,
+                 refresh_s=DEFAULT_REFRESH_S, lock_path=DEFAULT_LOCK_PATH):
+        self._client_factory = client_factory
+        self.lock_path = lock_path
+        self.preload = list(models)
+        self.max_bytes = max_bytes
+        self.refresh_s = max(1.0, refresh_s)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._models = OrderedDict()  # model -> state, least recently used first
+        self._pid = None
+        self._lock_file = None
+        self.owner = False  # True in the one process that runs the loop
+        self.preloaded = False
+        self.evictions = 0
+        self.cold_requests = 0
+        self.last_error = None
+
+    def start(self):
+        """Start the background thread in this process (again after a fork); safe to call repeatedly
+
+        The thread runs the loop once it holds the residency lock, so only
+        one process manages residency at a time.
+        """
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._wake = threading.Event()
+            self.owner = False
+        threading.Thread(target=self._run_when_elected, name="ollama-residency", daemon=True).start()
+
+    def _acquire_lock(self):
+        """Block until this process holds the residency lock; False if locking is unavailable"""
+        if fcntl is None:
+            return False
+        try:
+            os.makedirs(os.path.dirname(self.lock_path) or ".", exist_ok=True)
+            self._lock_file = open(self.lock_path, 'a')
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)  # released by the kernel when this process exits
+        except OSError as e:
+            print(f"Warning: Could not lock {self.lock_path} ({e}); managing Ollama residency in this process.",
+                  file=sys.stderr)
+            return False
+        return True
+
+    def _run_when_elected(self):
+        self._acquire_lock()
+        self.owner = True
+        self._run()
+
+    def _state(self, model):
+        if model not in self._models:
+            self._models[model] = {
+                "resident": False,
+                "size": 0,
+                "size_vram": 0,
+                "expires_at": None,
+                "last_used": None,
+                "requests": 0,
+                "loads": 0,
+                "last_load_ms": None,
+                "refreshed_at": None,
+                "evicted": False,
+            }
+        return self._models[model]
+
+    def record_use(self, model, load_duration=None):
+        """Note that a request used model; load_duration is Ollama's value in ns"""
+        self.start()
+        with self._lock:
+            state = self._state(model)
+            # Only a model that may have joined the resident set can push it over the budget
+            wake = self.owner and bool(self.max_bytes) and not state["resident"]
+            state["last_used"] = time.time()
+            state["requests"] += 1
+            state["evicted"] = False
+            if load_duration and load_duration / 1e6 >= COLD_LOAD_MS:
+                self.cold_requests += 1
+                state["loads"] += 1
+                state["last_load_ms"] = round(load_duration / 1e6, 1)
+            self._models.move_to_end(model)
+        if wake:
+            self._wake.set()  # sync with Ollama and apply the budget now
+
+    def _run(self):
+        for model in self.preload:
+            self._load(model, preload=True)
+        self.preloaded = True
+        while True:
+            try:
+                self._sync()
+                self._enforce_budget()
+                self._refresh()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+            self._wake.wait(self.refresh_s)
+            self._wake.clear()
+
+    def _load(self, model, preload=False):
+        """Load (or refresh) model; returns True on success"""
+        started = time.perf_counter()
+        try:
+            load_duration = self._client_factory().load_model(model)
+        except Exception as e:
+            self.last_error = f"{model}: {e}"
+            if preload:
+                print(f"⚠️  Could not preload Ollama model '{model}': {e}", file=sys.stderr)
+            return False
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            state = self._state(model)
+            state["resident"] = True
+            state["refreshed_at"] = time.time()
+            if load_duration / 1e6 >= COLD_LOAD_MS:
+                state["loads"] += 1
+                state["last_load_ms"] = round(elapsed_ms, 1)
+        if preload and load_duration / 1e6 >= COLD_LOAD_MS:
+            print(f"🧠 Ollama model '{model}' loaded in {elapsed_ms / 1000:.1f}s")
+        return True
+
+    def _sync(self):
+        """Update residency and sizes from Ollama's list of loaded models"""
+        loaded = self._client_factory().loaded_models()
+        with self._lock:
+            for model, entry in loaded.items():
+                if model not in self._models:
+                    # Loaded by someone else; oldest until it is used through the portal
+                    self._state(model)
+                    self._models.move_to_end(model, last=False)
+            for model, state in self._models.items():
+                entry = loaded.get(model)
+                state["resident"] = entry is not None
+                state["size"] = entry["size"] if entry else 0
+                state["size_vram"] = entry["size_vram"] if entry else 0
+                state["expires_at"] = entry["expires_at"] if entry else None
+
+    def _enforce_budget(self):
+        """Unload least recently used models until the loaded ones fit in max_bytes"""
+        if not self.max_bytes:
+            return
+        with self._lock:
+            resident = [(model, state) for model, state in self._models.items() if state["resident"]]
+            loaded_bytes = sum(state["size"] for _, state in resident)
+            victims = []
+            for model, state in resident[:-1]:  # never evict the most recently used model
+                if loaded_bytes <= self.max_bytes:
+                    break
+                victims.append(model)
+                loaded_bytes -= state["size"]
+        for model in victims:
+            self._client_factory().unload_model(model)
+            with self._lock:
+                state = self._models[model]
+                state.update(resident=False, evicted=True, size=0, size_vram=0, expires_at=None)
+                self.evictions += 1
+            print(f"♻️  Unloaded Ollama model '{model}' to stay within the memory budget")
+
+    def _refresh(self):
+        """Reset keep_alive of the configured models before Ollama would unload them"""
+        now = time.time()
+        with self._lock:
+            due = []
+            for model in self.preload:
+                state = self._state(model)
+                if state["evicted"]:
+                    continue
+                last_touched = max(state["last_used"] or 0, state["refreshed_at"] or 0)
+                # Reload at once if Ollama dropped the model (e.g. after a restart)
+                if not state["resident"] or now - last_touched >= self.refresh_s:
+                    due.append(model)
+        for model in due:
+            self._load(model)
+
+    def stats(self):
+        """Residency, sizes and load times per model"""
+        now = time.time()
+        with self._lock:
+            models = {}
+            for model, state in reversed(self._models.items()):  # most recently used first
+                models[model] = {
+                    "resident": state["resident"],
+                    "preload": model in self.preload,
+                    "evicted": state["evicted"],
+                    "size": state["size"],
+                    "size_vram": state["size_vram"],
+                    "expires_at": state["expires_at"],
+                    "requests": state["requests"],
+                    "idle_s": round(now - state["last_used"], 1) if state["last_used"] else None,
+                    "loads": state["loads"],
+                    "last_load_ms": state["last_load_ms"],
+                }
+            return {
+                "owner": self.owner,
+                "pid": os.getpid(),
+                "preload": self.preload,
+                "preloaded": self.preloaded,
+                "refresh_s": self.refresh_s,
+                "max_bytes": self.max_bytes,
+                "loaded_bytes": sum(state["size"] for state in self._models.values() if state["resident"]),
+                "evictions": self.evictions,
+                "cold_requests": self.cold_requests,
+                "last_error": self.last_error,
+                "models": models,
+            }
@@ -0,0 +1,209 @@
+"""
+Pooled Ollama HTTP client for the web portal
+
+One long-lived ollama.Client (backed by an httpx connection pool) is shared
+by every request thread, so forwarding text to Ollama reuses keep-alive
+connections instead of spawning an `ollama run` process per request.
+
+Configuration (environment variables):
+- OLLAMA_HOST             Ollama server URL (default: ollama's own default)
+- OLLAMA_POOL_SIZE        Maximum pooled connections (default: 8)
+- OLLAMA_TIMEOUT          Read timeout in seconds (default: 120)
+- OLLAMA_CONNECT_TIMEOUT  Connect timeout in seconds (default: 5)
+- OLLAMA_KEEP_ALIVE       How long Ollama keeps the model loaded (default: 5m)
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+DEFAULT_HOST = os.environ.get('OLLAMA_HOST')
+DEFAULT_POOL_SIZE = int(os.environ.get('OLLAMA_POOL_SIZE', '8'))
+DEFAULT_TIMEOUT = float(os.environ.get('OLLAMA_TIMEOUT', '120'))
+DEFAULT_CONNECT_TIMEOUT = float(os.environ.get('OLLAMA_CONNECT_TIMEOUT', '5'))
+DEFAULT_KEEP_ALIVE = os.environ.get('OLLAMA_KEEP_ALIVE', '5m')
+
+
+class LatencyStats:
+    """Thread-safe rolling latency statistics for Ollama calls"""
+
+    def __init__(self, window=200):
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=window)
+        self.calls = 0
+        self.errors = 0
+        self.last_ms = None
+
+    def record(self, latency_ms, ok=True):
+        with self._lock:
+            self.calls += 1
+            if not ok:
+                self.errors += 1
+            self.last_ms = latency_ms
+            self._samples.append(latency_ms)
+
+    def snapshot(self):
+        with self._lock:
+            samples = sorted(self._samples)
+            calls, errors, last_ms = self.calls, self.errors, self.last_ms
+
+        def percentile(p):
+            if not samples:
+                return None
+            index = min(len(samples) - 1, int(round(p / 100.0 * (len(samples) - 1))))
+            return round(samples[index], 1)
+
+        return {
+            "calls": calls,
+            "errors": errors,
+            "last_ms": round(last_ms, 1) if last_ms is not None else None,
+            "avg_ms": round(sum(samples) / len(samples), 1) if samples else None,
+            "p50_ms": percentile(50),
+            "p95_ms": percentile(95),
+        }
+
+
+class PooledOllamaClient:
+    """Connection-pooled Ollama client that is safe to share across threads"""
+
+    def __init__(self, host=DEFAULT_HOST, pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT,
+                 connect_timeout=DEFAULT_CONNECT_TIMEOUT, keep_alive=DEFAULT_KEEP_ALIVE):
+        import httpx
+        import ollama
+
+        self.host = host
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.keep_alive = keep_alive
+        self.stats = LatencyStats()
+        self._client = ollama.Client(
+            host=host,
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        )
+
+    def generate(self, model, prompt, options=None, keep_alive=None):
+        """Run a non-streaming generation and return the text plus timings"""
+        start = time.perf_counter()
+        try:
+            response = self._client.generate(
+                model=model,
+                prompt=prompt,
+                options=options,
+                keep_alive=keep_alive if keep_alive is not None else self.keep_alive,
+            )
+        except Exception:
+            self.stats.record((time.perf_counter() - start) * 1000, ok=False)
+            raise
+        latency_ms = (time.perf_counter() - start) * 1000
+        self.stats.record(latency_ms)
+        return {
+            "response": response.get('response', ''),
+            "latency_ms": round(latency_ms, 1),
+            "eval_count": response.get('eval_count'),
+            "eval_duration": response.get('eval_duration'),
+            "load_duration": response.get('load_duration'),
+        }
+
+    def stream_generate(self, model, prompt, options=None, keep_alive=None):
+        """Yield response tokens as Ollama produces them, then a final stats dict
+
+        Token items look like {"token": "..."}; the last item carries
+        "done": True together with eval_count, eval_duration and
+        time-to-first-token (ttft_ms).
+        """
+        start = time.perf_counter()
+        first_token_ms = None
+        final = {}
+        try:
+            for chunk in self._client.generate(
+                model=model,
+                prompt=prompt,
+                options=options,
+                keep_alive=keep_alive if keep_alive is not None else self.keep_alive,
+                stream=True,
+            ):
+                token = chunk.get('response', '')
+                if token:
+                    if first_token_ms is None:
+                        first_token_ms = (time.perf_counter() - start) * 1000
+                    yield {"token": token}
+                if chunk.get('done'):
+                    final = chunk
+        except Exception:
+            self.stats.record((time.perf_counter() - start) * 1000, ok=False)
+            raise
+        latency_ms = (time.perf_counter() - start) * 1000
+        self.stats.record(latency_ms)
+        yield {
+            "done": True,
+            "latency_ms": round(latency_ms, 1),
+            "ttft_ms": round(first_token_ms, 1) if first_token_ms is not None else None,
+            "eval_count": final.get('eval_count'),
+            "eval_duration": final.get('eval_duration'),
+            "load_duration": final.get('load_duration'),
+        }
+
+    def load_model(self, model, keep_alive=None):
+        """Load model, or extend its keep_alive if it is loaded, without generating; returns Ollama's load_duration (ns)"""
+        response = self._client.generate(
+            model=model,
+            prompt='',
+            keep_alive=keep_alive if keep_alive is not None else self.keep_alive,
+        )
+        return response.get('load_duration') or 0
+
+    def unload_model(self, model):
+        """Ask Ollama to release model's memory now"""
+        self._client.generate(model=model, prompt='', keep_alive=0)
+
+    def loaded_models(self):
+        """Models Ollama holds in memory: {name: {"size", "size_vram", "expires_at"}}"""
+        models = {}
+        for entry in self._client.ps()['models']:
+            name = entry.get('model') or entry.get('name')
+            models[name] = {
+                "size": entry.get('size') or 0,
+                "size_vram": entry.get('size_vram') or 0,
+                "expires_at": str(entry['expires_at']) if entry.get('expires_at') else None,
+            }
+        return models
+
+    def is_available(self):
+        """Check whether the Ollama server answers over HTTP"""
+        try:
+            self._client.list()
+            return True
+        except Exception:
+            return False
+
+    def info(self):
+        """Describe the client configuration and latency statistics"""
+        return {
+            "host": self.host or "default",
+            "pool_size": self.pool_size,
+            "timeout": self.timeout,
+            "keep_alive": self.keep_alive,
+            "latency": self.stats.snapshot(),
+        }
+
+
+_shared_client = None
+_shared_client_pid = None
+_shared_client_lock = threading.Lock()
+
+
+def get_ollama_client():
+    """Return the process-wide pooled client, creating it on first use
+
+    A forked worker gets its own client; pooled connections must not be
+    shared between processes.
+    """
+    global _shared_client, _shared_client_pid
+    if _shared_client is None or _shared_client_pid != os.getpid():
+        with _shared_client_lock:
+            if _shared_client is None or _shared_client_pid != os.getpid():
+                _shared_client = PooledOllamaClient()
+                _shared_client_pid = os.getpid()
+    return _shared_client
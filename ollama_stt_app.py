@@ -6,20 +6,23 @@ This app now includes three recording modes optimized for natural human speech:
 1. Smart Mode (default): Uses voice activity detection to naturally capture speech
    - Automatically detects when speech begins and ends
    - Handles natural pauses in speech gracefully
-   - Optimized energy thresholds for better sensitivity
+   - Returns just the utterance, trimmed to the detected speech
 
 2. Natural Mode: Continuous streaming for natural speech flow
-   - Records complete phrases without chunking
+   - Records one stream from the start, lead-in included, until the speaker stops
    - Better handling of speech patterns
 
 3. Chunked Mode: Legacy method for compatibility
-   - Original implementation with small audio chunks
+   - Splits speech into phrases at short pauses
    - More responsive but less natural for speech
 
+All three modes share the NumPy voice activity detector in vad.py (energy,
+zero-crossing rate and spectral flux with an adaptive noise floor).
+
 Key improvements:
 - Longer silence threshold (3s default) for natural speech patterns
 - Better microphone calibration and noise adjustment
-- Optimized recognizer settings for human speech
+- Frame-wise voice activity detection with hangover for human speech
 - Clear visual feedback during recording
 - Enhanced error handling and user guidance
 """
@@ -28,9 +31,17 @@ import argparse
 import sys
 import subprocess
 import importlib.util
-from datetime import datetime
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fast_start import ensure_dependencies, lazy_import, startup_profile
+
+REQUIRED_PACKAGES = {
+    'speech_recognition': 'SpeechRecognition',
+    'pyaudio': 'pyaudio',
+    'numpy': 'numpy'
+}
 
 def install_package(package_name):
     """Install a package using pip."""
@@ -44,201 +55,282 @@ def install_package(package_name):
 
 def check_and_install_dependencies():
     """Check for required packages and install them if missing."""
-    required_packages = {
-        'speech_recognition': 'SpeechRecognition',
-        'pyaudio': 'pyaudio'
-    }
-    
-    for module_name, package_name in required_packages.items():
+    for module_name, package_name in REQUIRED_PACKAGES.items():
         if importlib.util.find_spec(module_name) is None:
             print(f"Package '{module_name}' not found. Installing...")
             install_package(package_name)
 
-# Check and install dependencies first
-check_and_install_dependencies()
+# Check and install dependencies first (skipped while the cached manifest is valid)
+ensure_dependencies('ollama_stt_app', list(REQUIRED_PACKAGES.items()), check_and_install_dependencies)
 
-# Now import after installation
+# Now import after installation; the modules load on first use
 try:
-    import speech_recognition as sr
-    import pyaudio
+    sr = lazy_import('speech_recognition')
+    pyaudio = lazy_import('pyaudio')
+    import numpy as np
 except ImportError as e:
     print(f"Failed to import required packages: {e}", file=sys.stderr)
     print("Please run the script again or manually install the packages.", file=sys.stderr)
     sys.exit(1)
 
-def record_audio_until_silence(max_duration=60, silence_threshold=3.0):
-    """Record audio until silence is detected or max duration is reached."""
-    recognizer = sr.Recognizer()
-    
-    # Optimize recognizer settings for more natural speech detection
-    recognizer.energy_threshold = 300  # Lower threshold for better sensitivity
-    recognizer.dynamic_energy_threshold = True
-    recognizer.pause_threshold = 0.8  # Allow for natural pauses in speech
-    recognizer.phrase_threshold = 0.3  # Minimum audio length to be considered a phrase
-    recognizer.non_speaking_duration = 0.8  # How long to wait before considering silence
-    
+from transcription_log import get_transcription_log
+from whisper_registry import get_whisper_registry, WhisperUnavailableError
+from vad import VoiceActivityDetector, EndpointDetector
+from calibration_profile import CalibrationProfiles, microphone_key
+import tts_handoff
+import chat_session
+
+startup_profile.mark("imports")
+
+VAD_SAMPLE_RATE = 16000
+CALIBRATION_SECONDS = 1.0
+PRE_ROLL_SECONDS = 0.3  # audio kept before the detected start of speech
+TAIL_SECONDS = 0.2  # audio kept after the detected end of speech
+PHRASE_PAUSE_SECONDS = 0.8  # pause that ends a phrase in chunked mode
+
+calibration_profiles = CalibrationProfiles()
+
+class MicrophoneCapture:
+    """Reads an open microphone into a preallocated buffer and runs VAD endpointing on every chunk."""
+    
+    def __init__(self, source, end_silence_s, max_duration):
+        self.source = source
+        self.vad = VoiceActivityDetector(sample_rate=source.SAMPLE_RATE)
+        self.endpoint = EndpointDetector(self.vad, end_silence_s=end_silence_s)
+        # Sized for the whole recording up front, so chunks are copied in place instead of concatenated
+        self.buffer = np.empty(int(max_duration * source.SAMPLE_RATE) + source.CHUNK, dtype=np.int16)
+        self.samples_read = 0
+    
+    def _read_chunk(self):
+        return np.frombuffer(self.source.stream.read(self.source.CHUNK), dtype=np.int16)
+    
+    def calibrate(self, recalibrate=False, seconds=CALIBRATION_SECONDS):
+        """Load this device's saved noise floor, or measure it (this audio is not kept); returns it in dB."""
+        self.device = microphone_key(self.source)
+        profile = None if recalibrate else calibration_profiles.get(self.device)
+        if profile is not None:
+            self.vad.noise_db = profile["noise_db"]
+            print(f"🔧 Using saved calibration for {self.device} (noise floor {profile['noise_db']:.1f} dB)")
+            return profile["noise_db"]
+        
+        print("🎤 Adjusting for ambient noise... Please wait.")
+        chunk_count = max(1, int(seconds * self.source.SAMPLE_RATE / self.source.CHUNK))
+        noise_db = self.vad.calibrate(np.concatenate([self._read_chunk() for _ in range(chunk_count)]))
+        calibration_profiles.save(self.device, noise_db)
+        print(f"🔧 Noise floor measured at: {noise_db:.1f} dB (saved for next time)")
+        return noise_db
+    
+    def save_calibration(self):
+        """Fold the noise floor tracked during silence back into the saved profile."""
+        if self.vad.frames_processed and self.vad.noise_db is not None:
+            calibration_profiles.update(self.device, self.vad.noise_db)
+    
+    def read(self):
+        """Record one chunk and return the endpoint events it produced."""
+        samples = self._read_chunk()[:len(self.buffer) - self.samples_read]
+        self.buffer[self.samples_read:self.samples_read + len(samples)] = samples
+        self.samples_read += len(samples)
+        return self.endpoint.feed(samples)
+    
+    @property
+    def elapsed(self):
+        return self.samples_read / float(self.source.SAMPLE_RATE)
+    
+    def audio(self, start_s=0.0, end_s=None):
+        """The recording between start_s and end_s as sr.AudioData."""
+        rate = self.source.SAMPLE_RATE
+        first = max(0, int(start_s * rate))
+        last = self.samples_read if end_s is None else min(self.samples_read, int(end_s * rate))
+        return sr.AudioData(self.buffer[first:last].tobytes(), rate, self.source.SAMPLE_WIDTH)
+
+def open_microphone():
+    """Open the default microphone at the sample rate the VAD expects."""
     try:
-        microphone = sr.Microphone()
+        return sr.Microphone(sample_rate=VAD_SAMPLE_RATE)
     except Exception as e:
         print(f"Error initializing microphone: {e}", file=sys.stderr)
         return None
+
+class PhraseTranscriber:
+    """Transcribes phrases on a background worker while recording continues.
+    
+    Use it as a context manager so the worker is shut down even when
+    recording fails.
+    """
+    
+    def __init__(self, engine):
+        self.engine = engine
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="phrase-transcriber")
+        self._futures = []
+    
+    def submit(self, audio):
+        index = len(self._futures) + 1
+        self._futures.append(self._executor.submit(self._transcribe, index, audio))
+    
+    def _transcribe(self, index, audio):
+        text = transcribe_audio(audio, self.engine, quiet=True)
+        if text:
+            print(f"\n📝 Phrase {index}: {text}", flush=True)
+        return text
+    
+    def result(self):
+        """Wait for every submitted phrase and return the joined transcript."""
+        try:
+            return " ".join(text for text in (future.result() for future in self._futures) if text)
+        finally:
+            self._executor.shutdown()
     
-    print("🎤 Adjusting for ambient noise... Please wait.")
-    with microphone as source:
-        recognizer.adjust_for_ambient_noise(source, duration=2)
+    def close(self):
+        """Drop phrases that were not transcribed yet and stop the worker."""
+        for future in self._futures:
+            future.cancel()
+        self._executor.shutdown(wait=False)
     
-    print(f"🔴 Recording started. Speak naturally! (Max {max_duration} seconds, stops after {silence_threshold}s of silence)")
-    print("💡 Natural pauses are okay - the system will wait for you to finish speaking.")
+    def __enter__(self):
+        return self
     
-    start_time = time.time()
-    last_speech_time = start_time
-    audio_data = None
-    speech_started = False
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def record_audio_until_silence(max_duration=60, silence_threshold=3.0, phrase_transcriber=None, recalibrate=False):
+    """Record phrase by phrase until silence is detected or max duration is reached.
+    
+    Every completed phrase is handed to phrase_transcriber (if given) while
+    recording continues. Returns the audio from the first phrase to the last.
+    """
+    microphone = open_microphone()
+    if microphone is None:
+        return None
     
     try:
         with microphone as source:
+            capture = MicrophoneCapture(source, end_silence_s=PHRASE_PAUSE_SECONDS, max_duration=max_duration)
+            capture.calibrate(recalibrate)
+            
+            print(f"🔴 Recording started. Speak naturally! (Max {max_duration} seconds, stops after {silence_threshold}s of silence)")
+            print("💡 Natural pauses are okay - the system will wait for you to finish speaking.")
+            
+            speech_started = False
+            first_phrase_start = None
+            phrase_start = None
+            last_speech_time = 0.0
+            
             while True:
-                current_time = time.time()
-                
                 # Check if max duration reached
-                if current_time - start_time >= max_duration:
+                if capture.elapsed >= max_duration:
                     print(f"\n🔴 Maximum duration ({max_duration}s) reached. Stopping recording.")
-                    break
+                    events = capture.endpoint.flush()
+                else:
+                    events = capture.read()
                 
-                try:
-                    # Use a more natural approach - wait for complete phrases
-                    # phrase_time_limit=None allows for longer, more natural speech
-                    audio = recognizer.listen(source, timeout=1, phrase_time_limit=None)
-                    
-                    if audio_data is None:
-                        audio_data = audio
-                        speech_started = True
-                        print("🎙️ Speech detected...", end="", flush=True)
+                for event, time_s in events:
+                    if event == "start":
+                        phrase_start = max(0.0, time_s - PRE_ROLL_SECONDS)
+                        if not speech_started:
+                            speech_started = True
+                            first_phrase_start = phrase_start
+                            print("🎙️ Speech detected...", end="", flush=True)
                     else:
-                        # Combine audio data (simplified approach)
-                        audio_data = audio  # Keep the most recent complete phrase
-                    
-                    last_speech_time = current_time
-                    print("🎵", end="", flush=True)  # Visual feedback for continued speech
-                    
-                except sr.WaitTimeoutError:
-                    # No audio detected in this iteration
-                    if speech_started:
-                        silence_duration = current_time - last_speech_time
-                        if silence_duration >= silence_threshold:
-                            print(f"\n🔇 {silence_threshold}s of silence detected. Stopping recording.")
-                            break
-                        elif silence_duration > 0.5:  # Show waiting indicator for longer pauses
-                            print("⏳", end="", flush=True)
-                    else:
-                        # Still waiting for initial speech
-                        print(".", end="", flush=True)
-                    
-        print("\n🔴 Recording stopped.")
+                        # The phrase stays in the capture buffer; transcribe it while recording continues
+                        if phrase_transcriber is not None:
+                            phrase_transcriber.submit(capture.audio(phrase_start, time_s + TAIL_SECONDS))
+                        last_speech_time = time_s
+                        print("🎵", end="", flush=True)  # Visual feedback for continued speech
+                
+                if capture.elapsed >= max_duration:
+                    break
+                if speech_started and not capture.endpoint.in_utterance:
+                    if capture.elapsed - last_speech_time >= silence_threshold:
+                        print(f"\n🔇 {silence_threshold}s of silence detected. Stopping recording.")
+                        break
+            capture.save_calibration()
         
-        if audio_data and speech_started:
-            return audio_data
-        else:
+        print("\n🔴 Recording stopped.")
+        if not speech_started:
             return None
+        return capture.audio(first_phrase_start, last_speech_time + TAIL_SECONDS)
             
     except Exception as e:
         print(f"Error during recording: {e}", file=sys.stderr)
         return None
 
-def record_audio_continuous_stream(max_duration=60, silence_threshold=3.0):
-    """Record audio using continuous streaming for more natural speech detection."""
-    recognizer = sr.Recognizer()
-    
-    # Optimize recognizer settings for natural speech
-    recognizer.energy_threshold = 300
-    recognizer.dynamic_energy_threshold = True
-    recognizer.pause_threshold = 0.8
-    recognizer.phrase_threshold = 0.3
-    recognizer.non_speaking_duration = 0.8
-    
-    try:
-        microphone = sr.Microphone()
-    except Exception as e:
-        print(f"Error initializing microphone: {e}", file=sys.stderr)
+def record_audio_continuous_stream(max_duration=60, silence_threshold=3.0, recalibrate=False):
+    """Record one continuous stream from the start until the speaker has been silent for silence_threshold."""
+    microphone = open_microphone()
+    if microphone is None:
         return None
     
-    print("🎤 Adjusting for ambient noise... Please wait.")
-    with microphone as source:
-        recognizer.adjust_for_ambient_noise(source, duration=2)
-    
-    print(f"🔴 Recording started. Speak naturally! (Max {max_duration} seconds, stops after {silence_threshold}s of silence)")
-    print("💡 Take your time - natural pauses are handled automatically.")
-    
-    start_time = time.time()
-    
     try:
         with microphone as source:
-            # Use the more natural listen method that waits for complete phrases
-            audio = recognizer.listen(source, timeout=max_duration, phrase_time_limit=max_duration)
+            capture = MicrophoneCapture(source, end_silence_s=silence_threshold, max_duration=max_duration)
+            capture.calibrate(recalibrate)
+            
+            print(f"🔴 Recording started. Speak naturally! (Max {max_duration} seconds, stops after {silence_threshold}s of silence)")
+            print("💡 Take your time - natural pauses are handled automatically.")
+            
+            speech_started = False
+            speech_ended = False
+            while capture.elapsed < max_duration and not speech_ended:
+                for event, _ in capture.read():
+                    if event == "start" and not speech_started:
+                        speech_started = True
+                        print("🎙️ Speech detected...", end="", flush=True)
+                    elif event == "end":
+                        speech_ended = True
+            capture.save_calibration()
             
+            if not speech_started:
+                print(f"\n🔇 No speech detected within {max_duration} seconds.")
+                return None
+            
+            # Natural mode keeps the whole stream, including any lead-in before the first word
             print("\n🔴 Recording completed.")
-            return audio
+            return capture.audio()
             
-    except sr.WaitTimeoutError:
-        print(f"\n🔇 No speech detected within {max_duration} seconds.")
-        return None
     except Exception as e:
         print(f"Error during recording: {e}", file=sys.stderr)
         return None
 
-def record_audio_with_voice_activity_detection(max_duration=60, silence_threshold=3.0):
-    """Record audio with intelligent voice activity detection for most natural speech flow."""
-    recognizer = sr.Recognizer()
-    
-    # Optimize for natural speech patterns
-    recognizer.energy_threshold = 300
-    recognizer.dynamic_energy_threshold = True
-    recognizer.pause_threshold = 0.8  # Natural pause between words
-    recognizer.phrase_threshold = 0.3  # Minimum phrase length
-    recognizer.non_speaking_duration = 0.8  # Wait time before considering end of speech
-    
-    try:
-        microphone = sr.Microphone()
-    except Exception as e:
-        print(f"Error initializing microphone: {e}", file=sys.stderr)
+def record_audio_with_voice_activity_detection(max_duration=60, silence_threshold=3.0, recalibrate=False):
+    """Record one utterance, trimmed to the speech found by the voice activity detector."""
+    microphone = open_microphone()
+    if microphone is None:
         return None
     
-    print("🎤 Calibrating microphone for your voice... Please wait.")
-    with microphone as source:
-        recognizer.adjust_for_ambient_noise(source, duration=2)
-        initial_energy = recognizer.energy_threshold
-        print(f"🔧 Energy threshold set to: {initial_energy}")
-    
-    print(f"🔴 Ready to record! Speak naturally and clearly.")
-    print(f"💡 The system will wait for natural pauses and stop after {silence_threshold}s of silence.")
-    print("🎙️ Start speaking when ready...")
-    
-    start_time = time.time()
-    
     try:
         with microphone as source:
-            # Wait for speech to begin
+            capture = MicrophoneCapture(source, end_silence_s=silence_threshold, max_duration=max_duration)
+            capture.calibrate(recalibrate)
+            
+            print("🔴 Ready to record! Speak naturally and clearly.")
+            print(f"💡 The system will wait for natural pauses and stop after {silence_threshold}s of silence.")
+            print("🎙️ Start speaking when ready...")
             print("⏳ Waiting for speech to begin...", end="", flush=True)
             
-            # Use a smarter approach - wait for speech, then record until natural end
-            audio = recognizer.listen(
-                source, 
-                timeout=max_duration,  # Maximum wait time for speech to start
-                phrase_time_limit=max_duration  # Maximum recording time once speech starts
-            )
+            speech_start = None
+            speech_end = None
+            while capture.elapsed < max_duration and speech_end is None:
+                for event, time_s in capture.read():
+                    if event == "start" and speech_start is None:
+                        speech_start = time_s
+                        print("\n🎙️ Speech detected...", end="", flush=True)
+                    elif event == "end":
+                        speech_end = time_s
+            capture.save_calibration()
             
-            duration = time.time() - start_time
-            print(f"\n🔴 Recording completed ({duration:.1f}s).")
-            return audio
+            if speech_start is None:
+                print(f"\n🔇 No speech detected within {max_duration} seconds.")
+                return None
+            
+            print(f"\n🔴 Recording completed ({capture.elapsed:.1f}s).")
+            end_s = speech_end + TAIL_SECONDS if speech_end is not None else None
+            return capture.audio(speech_start - PRE_ROLL_SECONDS, end_s)
             
-    except sr.WaitTimeoutError:
-        print(f"\n🔇 No speech detected within {max_duration} seconds.")
-        return None
     except Exception as e:
         print(f"Error during recording: {e}", file=sys.stderr)
         return None
 
-def transcribe_audio(audio, engine="google"):
+def transcribe_audio(audio, engine="google", quiet=False):
     """Transcribe audio data to text using specified engine."""
     if audio is None:
         print("No audio data to transcribe.", file=sys.stderr)
@@ -246,23 +338,26 @@ def transcribe_audio(audio, engine="google"):
     
     recognizer = sr.Recognizer()
     
-    print(f"🔤 Transcribing audio using {engine}...")
+    if not quiet:
+        print(f"🔤 Transcribing audio using {engine}...")
     
     try:
         if engine == "google":
             text = recognizer.recognize_google(audio)
         elif engine == "whisper":
-            text = recognizer.recognize_whisper(audio)
+            text = get_whisper_registry().transcribe(audio)
         else:
             text = recognizer.recognize_google(audio)  # fallback
         
-        print(f"📝 Transcribed: {text}")
+        if not quiet:
+            print(f"📝 Transcribed: {text}")
         return text.strip()
         
     except sr.UnknownValueError:
-        print("⚠️  Could not understand the audio")
+        if not quiet:
+            print("⚠️  Could not understand the audio")
         return ""
-    except sr.RequestError as e:
+    except (sr.RequestError, WhisperUnavailableError) as e:
         print(f"❌ Error with {engine} service: {e}")
         # Try offline recognition as fallback
         try:
@@ -277,29 +372,49 @@ def transcribe_audio(audio, engine="google"):
         print(f"❌ Unexpected error during transcription: {e}")
         return ""
 
-def save_transcription(text, output_path=None):
-    """Save transcription to a file."""
-    if not output_path:
-        documents_path = os.path.expanduser("~/Documents")
-        stt_history_path = os.path.join(documents_path, "SchmidtSims", "STTHistory")
-        os.makedirs(stt_history_path, exist_ok=True)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_path = os.path.join(stt_history_path, f"stt_output_{timestamp}.txt")
-    
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(text)
-    
-    print(f"💾 Transcription saved to: {output_path}")
-    return output_path
+def save_transcription(text, output_path=None, engine=None):
+    """Save transcription to a file, or append it to the STT history log."""
+    if output_path:
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        
+        print(f"💾 Transcription saved to: {output_path}")
+        return output_path
+    
+    documents_path = os.path.expanduser("~/Documents")
+    log_path = os.path.join(documents_path, "SchmidtSims", "STTHistory", "transcriptions.db")
+    entry_id = get_transcription_log(log_path).append(text, source="ollama_stt_app", engine=engine)
+    
+    print(f"💾 Transcription logged to: {log_path} (id {entry_id})")
+    return log_path
 
-def forward_to_tts(text, tts_script_path, voice=None, model=None, verbose=False):
-    """Forward the transcribed text to the TTS script."""
+def forward_to_tts(text, tts_script_path, voice=None, model=None, verbose=False, in_process=True, report_latency=False,
+                   session=None):
+    """Forward the transcribed text to the TTS pipeline (in-process, or the TTS script as a subprocess).
+    
+    Returns the per-stage timings of the in-process/daemon path, or None.
+    A session id continues that conversation (not possible with a subprocess).
+    """
     if not text.strip():
         print("No text to forward to TTS.", file=sys.stderr)
-        return
+        return None
     
     print(f"🔄 Forwarding to TTS: '{text[:50]}{'...' if len(text) > 50 else ''}'")
     
+    if in_process:
+        try:
+            timings = tts_handoff.speak(text, tts_script_path, voice, model, verbose, session=session)
+        except Exception as e:
+            print(f"❌ TTS failed: {e}")
+            return None
+        if timings is not None:
+            print("✅ TTS completed successfully!")
+            if report_latency:
+                tts_handoff.report_latency(timings)
+            return timings
+    if session:
+        print("⚠️  The TTS subprocess answers without the conversation history.")
+    
     # Construct command for TTS script
     cmd = [sys.executable, tts_script_path, text]
     
@@ -312,7 +427,10 @@ def forward_to_tts(text, tts_script_path, voice=None, model=None, verbose=False)
     
     try:
         # Run the TTS script
+        started = time.perf_counter()
         result = subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8')
+        if report_latency:
+            tts_handoff.report_latency({"subprocess_ms": (time.perf_counter() - started) * 1000})
         
         if result.returncode == 0:
             print("✅ TTS completed successfully!")
@@ -320,7 +438,7 @@ def forward_to_tts(text, tts_script_path, voice=None, model=None, verbose=False)
                 print("TTS Output:")
                 print(result.stdout)
         else:
-            print(f"❌ TTS failed with error:")
+            print("❌ TTS failed with error:")
             print(result.stderr)
     except Exception as e:
         print(f"❌ Error running TTS script: {e}")
@@ -342,6 +460,11 @@ def main():
     parser.add_argument("--model", type=str, default="llama3.1:latest", help="Ollama model to use for TTS")
     parser.add_argument("--verbose", action="store_true", help="Enable verbose output")
     parser.add_argument("--no_forward", action="store_true", help="Don't forward to TTS, just transcribe")
+    parser.add_argument("--tts_subprocess", action="store_true", help="Run the TTS script in a new Python process instead of in-process")
+    parser.add_argument("--tts_latency", action="store_true", help="Report per-stage TTS latency after forwarding")
+    parser.add_argument("--recalibrate", action="store_true", help="Measure ambient noise again instead of using the saved calibration profile")
+    parser.add_argument("--startup-profile", action="store_true", help="Print how long each startup phase took")
+    parser.add_argument("--session", action="store_true", help="Keep listening after each answer and continue one conversation (Ctrl+C ends it)")
     
     args = parser.parse_args()
     
@@ -357,39 +480,77 @@ def main():
         print("Use --no_forward to skip TTS forwarding, or provide correct --tts_script path", file=sys.stderr)
         sys.exit(1)
     
+    startup_profile.mark("argument parsing")
+    startup_profile.report()
+    
+    session = chat_session.new_session_id() if args.session else None
+    session_turns = []
     try:
-        # Record audio using the selected method
-        if args.recording_mode == "smart":
-            audio = record_audio_with_voice_activity_detection(args.max_duration, args.silence_threshold)
-        elif args.recording_mode == "natural":
-            audio = record_audio_continuous_stream(args.max_duration, args.silence_threshold)
-        else:  # chunked
-            audio = record_audio_until_silence(args.max_duration, args.silence_threshold)
-        
-        if audio is None:
-            print("❌ Failed to record audio.")
-            return
-        
-        # Transcribe audio
-        transcribed_text = transcribe_audio(audio, args.engine)
+        # Load Whisper while the user is speaking instead of after recording
+        if args.engine == "whisper":
+            get_whisper_registry().preload_async()
+        # Likewise connect to Ollama and open the audio output for the TTS handoff
+        if not args.no_forward and not args.tts_subprocess:
+            tts_handoff.warm_up_async(tts_script_path, args.model)
+        if session:
+            print(f"💬 Session mode: the conversation continues across utterances and {args.model} stays loaded. "
+                  "Press Ctrl+C to end the session.")
         
-        if transcribed_text:
-            print(f"\n📝 Final Transcription: {transcribed_text}")
+        recalibrate = args.recalibrate
+        while True:
+            # Record audio using the selected method
+            if args.recording_mode == "smart":
+                audio = record_audio_with_voice_activity_detection(args.max_duration, args.silence_threshold, recalibrate=recalibrate)
+            elif args.recording_mode == "natural":
+                audio = record_audio_continuous_stream(args.max_duration, args.silence_threshold, recalibrate=recalibrate)
+            else:  # chunked: phrases are transcribed while recording continues
+                with PhraseTranscriber(args.engine) as phrase_transcriber:
+                    audio = record_audio_until_silence(args.max_duration, args.silence_threshold, phrase_transcriber, recalibrate=recalibrate)
+                    if audio is not None:
+                        stopped_at = time.perf_counter()
+                        transcribed_text = phrase_transcriber.result()
+                        print(f"⚡ Transcript ready {time.perf_counter() - stopped_at:.2f}s after recording stopped")
+            recalibrate = False
             
-            # Save transcription
-            save_transcription(transcribed_text, args.output_path)
+            if audio is None:
+                print("❌ Failed to record audio.")
+                if not session:
+                    break
+                # A quiet turn does not end the session
+                print("\n🎤 Listening for your next message...")
+                continue
             
-            # Forward to TTS if requested
-            if not args.no_forward:
-                forward_to_tts(transcribed_text, tts_script_path, args.voice, args.model, args.verbose)
-        else:
-            print("❌ No speech detected or transcription failed.")
+            # Transcribe audio (chunked mode has already transcribed it phrase by phrase)
+            if args.recording_mode != "chunked":
+                transcribed_text = transcribe_audio(audio, args.engine)
+            
+            if transcribed_text:
+                print(f"\n📝 Final Transcription: {transcribed_text}")
+                
+                # Save transcription
+                save_transcription(transcribed_text, args.output_path, args.engine)
+                
+                # Forward to TTS if requested
+                if not args.no_forward:
+                    timings = forward_to_tts(transcribed_text, tts_script_path, args.voice, args.model, args.verbose,
+                                             in_process=not args.tts_subprocess, report_latency=args.tts_latency,
+                                             session=session)
+                    if timings and timings.get("session"):
+                        session_turns.append(timings["session"])
+                        print(chat_session.format_turn(timings["session"]))
+            else:
+                print("❌ No speech detected or transcription failed.")
+            
+            if not session:
+                break
+            print("\n🎤 Listening for your next message...")
             
     except KeyboardInterrupt:
         print("\n🛑 Recording interrupted by user.")
     except Exception as e:
         print(f"❌ Error: {e}", file=sys.stderr)
         sys.exit(1)
+    chat_session.print_session_report(session_turns)
 
 if __name__ == "__main__":
     main()
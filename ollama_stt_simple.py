@@ -2,12 +2,25 @@ import argparse
 import sys
 import subprocess
 import importlib.util
-from datetime import datetime
 import os
 import time
 import platform
-import json
-import re
+
+from fast_start import ensure_dependencies, lazy_import, startup_profile
+from calibration_profile import CalibrationProfiles, microphone_key, noise_db_from_energy_threshold
+from transcription_log import get_transcription_log
+from whisper_registry import get_whisper_registry, WhisperUnavailableError
+import tts_handoff
+
+REQUIRED_PACKAGES = {
+    'speech_recognition': 'SpeechRecognition',
+    'pyaudio': 'pyaudio',
+    'pydub': 'pydub',
+    'yaml': 'PyYAML'
+}
+
+# (sr, pyaudio, AudioSegment) once loaded; recording and transcription reuse it
+_dependencies = None
 
 def install_package(package_name):
     """Install a package using pip."""
@@ -20,17 +33,10 @@ def install_package(package_name):
         print(f"Failed to install {package_name}: {e}", file=sys.stderr)
         return False
 
-def check_and_install_dependencies():
-    """Check for required packages and install them if missing."""
-    required_packages = {
-        'speech_recognition': 'SpeechRecognition',
-        'pyaudio': 'pyaudio',
-        'pydub': 'pydub',
-        'yaml': 'PyYAML'
-    }
-    
+def install_missing_packages():
+    """Install any required packages that are not found."""
     packages_to_install = []
-    for module_name, package_name in required_packages.items():
+    for module_name, package_name in REQUIRED_PACKAGES.items():
         if importlib.util.find_spec(module_name) is None:
             packages_to_install.append((module_name, package_name))
     
@@ -44,12 +50,24 @@ def check_and_install_dependencies():
                     print("For PyAudio on Windows, try: pip install --upgrade pip setuptools wheel", file=sys.stderr)
                     print("Then: pip install pyaudio", file=sys.stderr)
                 sys.exit(1)
+
+def check_and_install_dependencies():
+    """Check for required packages, install them if missing and return (sr, pyaudio, AudioSegment).
+    
+    The check runs once per process, and is skipped entirely while the
+    cached dependency manifest is still valid.
+    """
+    global _dependencies
+    if _dependencies is not None:
+        return _dependencies
     
-    # Try to import the packages
+    ensure_dependencies('ollama_stt_simple', list(REQUIRED_PACKAGES.items()), install_missing_packages)
+    
+    # Try to import the packages (speech_recognition and pyaudio load on first use)
     try:
-        import speech_recognition as sr
+        sr = lazy_import('speech_recognition')
         try:
-            import pyaudio
+            pyaudio = lazy_import('pyaudio')
         except ImportError:
             print("PyAudio import failed. Some microphone features may not work.", file=sys.stderr)
             pyaudio = None
@@ -60,18 +78,16 @@ def check_and_install_dependencies():
             print("Pydub import failed. Some audio processing features may not work.", file=sys.stderr)
             AudioSegment = None
         
-        try:
-            import yaml
-        except ImportError:
+        if importlib.util.find_spec('yaml') is None:
             print("PyYAML import failed. Docker support may not work.", file=sys.stderr)
-            yaml = None
         
-        return sr, pyaudio, AudioSegment
+        _dependencies = (sr, pyaudio, AudioSegment)
+        return _dependencies
     except ImportError as e:
         print(f"Critical import error: {e}", file=sys.stderr)
         sys.exit(1)
 
-def record_audio_simple(duration=5):
+def record_audio_simple(duration=5, recalibrate=False):
     """Simple audio recording for a fixed duration."""
     sr, pyaudio_module, _ = check_and_install_dependencies()
     
@@ -88,10 +104,19 @@ def record_audio_simple(duration=5):
         print("Please check if a microphone is connected and accessible.", file=sys.stderr)
         return None
     
-    print("🎤 Adjusting for ambient noise... Please wait.")
+    profiles = CalibrationProfiles()
+    device = None
     try:
         with microphone as source:
-            recognizer.adjust_for_ambient_noise(source, duration=1)
+            device = microphone_key(source)
+            profile = None if recalibrate else profiles.get(device)
+            if profile is not None:
+                recognizer.energy_threshold = profile["energy_threshold"]
+                print(f"🔧 Using saved calibration for {device} (energy threshold {profile['energy_threshold']:.0f})")
+            else:
+                print("🎤 Adjusting for ambient noise... Please wait.")
+                recognizer.adjust_for_ambient_noise(source, duration=1)
+                profiles.save(device, noise_db_from_energy_threshold(recognizer.energy_threshold))
     except Exception as e:
         print(f"Warning: Could not adjust for ambient noise: {e}")
     
@@ -100,6 +125,9 @@ def record_audio_simple(duration=5):
         with microphone as source:
             audio = recognizer.listen(source, timeout=duration, phrase_time_limit=duration)
         print("🔴 Recording stopped.")
+        if device is not None:
+            # listen() keeps adapting the threshold while waiting for speech
+            profiles.update(device, noise_db_from_energy_threshold(recognizer.energy_threshold))
         return audio
     except Exception as e:
         print(f"Error during recording: {e}", file=sys.stderr)
@@ -121,8 +149,8 @@ def transcribe_audio(audio, engine="google"):
             text = recognizer.recognize_google(audio)
         elif engine == "whisper":
             try:
-                text = recognizer.recognize_whisper(audio)
-            except sr.RequestError:
+                text = get_whisper_registry().transcribe(audio)
+            except (sr.RequestError, WhisperUnavailableError):
                 print("Whisper not available, falling back to Google...")
                 text = recognizer.recognize_google(audio)
         else:
@@ -149,35 +177,47 @@ def transcribe_audio(audio, engine="google"):
         print(f"❌ Unexpected error during transcription: {e}")
         return ""
 
-def save_transcription(text, output_path=None):
-    """Save transcription to a file."""
+def save_transcription(text, output_path=None, engine=None):
+    """Save transcription to a file, or append it to the STT history log."""
     if not text.strip():
         return None
-        
-    if not output_path:
-        documents_path = os.path.expanduser("~/Documents")
-        stt_history_path = os.path.join(documents_path, "SchmidtSims", "STTHistory")
-        os.makedirs(stt_history_path, exist_ok=True)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_path = os.path.join(stt_history_path, f"stt_output_{timestamp}.txt")
     
     try:
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(text)
-        print(f"💾 Transcription saved to: {output_path}")
-        return output_path
+        if output_path:
+            with open(output_path, 'w', encoding='utf-8') as f:
+                f.write(text)
+            print(f"💾 Transcription saved to: {output_path}")
+            return output_path
+        
+        documents_path = os.path.expanduser("~/Documents")
+        log_path = os.path.join(documents_path, "SchmidtSims", "STTHistory", "transcriptions.db")
+        entry_id = get_transcription_log(log_path).append(text, source="ollama_stt_simple", engine=engine)
+        print(f"💾 Transcription logged to: {log_path} (id {entry_id})")
+        return log_path
     except Exception as e:
         print(f"❌ Error saving transcription: {e}")
         return None
 
-def forward_to_tts(text, tts_script_path, voice=None, model=None, verbose=False):
-    """Forward the transcribed text to the TTS script."""
+def forward_to_tts(text, tts_script_path, voice=None, model=None, verbose=False, in_process=True, report_latency=False):
+    """Forward the transcribed text to the TTS pipeline (in-process, or the TTS script as a subprocess)."""
     if not text.strip():
         print("No text to forward to TTS.", file=sys.stderr)
         return
     
     print(f"🔄 Forwarding to TTS: '{text[:50]}{'...' if len(text) > 50 else ''}'")
     
+    if in_process:
+        try:
+            timings = tts_handoff.speak(text, tts_script_path, voice, model, verbose)
+        except Exception as e:
+            print(f"❌ TTS failed: {e}")
+            return
+        if timings is not None:
+            print("✅ TTS completed successfully!")
+            if report_latency:
+                tts_handoff.report_latency(timings)
+            return
+    
     # Construct command for TTS script
     cmd = [sys.executable, tts_script_path, text]
     
@@ -191,7 +231,10 @@ def forward_to_tts(text, tts_script_path, voice=None, model=None, verbose=False)
     try:
         # Run the TTS script
         print("🔄 Running TTS script...")
+        started = time.perf_counter()
         result = subprocess.run(cmd, capture_output=False, text=True)
+        if report_latency:
+            tts_handoff.report_latency({"subprocess_ms": (time.perf_counter() - started) * 1000})
         
         if result.returncode == 0:
             print("✅ TTS completed successfully!")
@@ -471,10 +514,14 @@ def main():
     parser.add_argument("--model", type=str, default="llama3.1:latest", help="Ollama model to use for TTS")
     parser.add_argument("--verbose", action="store_true", help="Enable verbose output")
     parser.add_argument("--no_forward", action="store_true", help="Don't forward to TTS, just transcribe")
+    parser.add_argument("--tts_subprocess", action="store_true", help="Run the TTS script in a new Python process instead of in-process")
+    parser.add_argument("--tts_latency", action="store_true", help="Report per-stage TTS latency after forwarding")
+    parser.add_argument("--recalibrate", action="store_true", help="Measure ambient noise again instead of using the saved calibration profile")
     parser.add_argument("--docker", action="store_true", help="Run in Docker container")
     parser.add_argument("--runtime", type=str, choices=["auto", "cpu", "cuda", "nvidia-studio", "nvidia-gaming"], 
                        default="auto", help="Runtime to use (default: auto)")
     parser.add_argument("--gpu_info", action="store_true", help="Show GPU information and exit")
+    parser.add_argument("--startup-profile", action="store_true", help="Print how long each startup phase took")
     
     args = parser.parse_args()
     
@@ -490,7 +537,7 @@ def main():
         print(f"  Studio Drivers: {'✅' if gpu_info['has_studio_drivers'] else '❌'}")
         print(f"  Gaming Drivers: {'✅' if gpu_info['has_gaming_drivers'] else '❌'}")
         print(f"  Recommended Runtime: {gpu_info['recommended_runtime']}")
-        print(f"\n🐳 Docker Support:")
+        print("\n🐳 Docker Support:")
         print(f"  Available: {'✅' if docker_info['available'] else '❌'}")
         print(f"  Running: {'✅' if docker_info['running'] else '❌'}")
         if docker_info['version']:
@@ -518,6 +565,7 @@ def main():
         check_and_install_dependencies()
     except SystemExit:
         return
+    startup_profile.mark("dependencies loaded")
     
     # Check if TTS script exists
     tts_script_path = args.tts_script
@@ -533,10 +581,18 @@ def main():
     
     # Show runtime information
     print(f"🏃 Running with {gpu_info['recommended_runtime']} runtime")
+    startup_profile.report()
     
     try:
+        # Load Whisper while the user is speaking instead of after recording
+        if args.engine == "whisper":
+            get_whisper_registry().preload_async()
+        # Likewise connect to Ollama and open the audio output for the TTS handoff
+        if not args.no_forward and not args.tts_subprocess:
+            tts_handoff.warm_up_async(tts_script_path, args.model)
+        
         # Record audio
-        audio = record_audio_simple(args.duration)
+        audio = record_audio_simple(args.duration, recalibrate=args.recalibrate)
         
         if audio is None:
             print("❌ Failed to record audio.")
@@ -549,11 +605,12 @@ def main():
             print(f"\n📝 Final Transcription: {transcribed_text}")
             
             # Save transcription
-            save_transcription(transcribed_text, args.output_path)
+            save_transcription(transcribed_text, args.output_path, args.engine)
             
             # Forward to TTS if requested
             if not args.no_forward:
-                forward_to_tts(transcribed_text, tts_script_path, args.voice, args.model, args.verbose)
+                forward_to_tts(transcribed_text, tts_script_path, args.voice, args.model, args.verbose,
+                               in_process=not args.tts_subprocess, report_latency=args.tts_latency)
         else:
             print("❌ No speech detected or transcription failed.")
             
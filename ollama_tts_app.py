@@ -5,6 +5,24 @@ import importlib.util
 from datetime import datetime
 import os
 import asyncio
+import queue
+import re
+import threading
+import time
+
+from fast_start import ensure_dependencies, lazy_import, startup_profile
+import tts_daemon
+import tts_batch
+from tts_cache import SpeechCache, speech_cache_key
+from audio_playback import get_playback_engine
+from response_cache import ResponseCache, response_cache_key, is_deterministic
+from chat_session import ChatSession, format_turn, print_session_report
+
+REQUIRED_PACKAGES = {
+    'ollama': 'ollama',
+    'edge_tts': 'edge-tts',
+    'pygame': 'pygame'
+}
 
 def install_package(package_name):
     """Install a package using pip."""
@@ -18,49 +36,108 @@ def install_package(package_name):
 
 def check_and_install_dependencies():
     """Check for required packages and install them if missing."""
-    required_packages = {
-        'ollama': 'ollama',
-        'edge_tts': 'edge-tts',
-        'pygame': 'pygame'
-    }
-    
-    for module_name, package_name in required_packages.items():
+    for module_name, package_name in REQUIRED_PACKAGES.items():
         if importlib.util.find_spec(module_name) is None:
             print(f"Package '{module_name}' not found. Installing...")
             install_package(package_name)
-    
-    # Now import the packages after ensuring they're installed
-    global ollama, edge_tts, pygame
-    try:
-        import ollama
-        import edge_tts
-        import pygame
-    except ImportError as e:
-        print(f"Failed to import required packages: {e}", file=sys.stderr)
-        print("Please try running the script again or manually install the packages.", file=sys.stderr)
-        sys.exit(1)
 
-# Check and install dependencies first
-check_and_install_dependencies()
-def query_ollama(client, model, prompt, verbose):
+# Check and install dependencies first (skipped while the cached manifest is valid)
+ensure_dependencies('ollama_tts_app', list(REQUIRED_PACKAGES.items()), check_and_install_dependencies)
+
+# Now import the packages; each one loads on first use (audio_playback imports pygame when audio is played)
+try:
+    ollama = lazy_import('ollama')
+    edge_tts = lazy_import('edge_tts')
+except ImportError as e:
+    print(f"Failed to import required packages: {e}", file=sys.stderr)
+    print("Please try running the script again or manually install the packages.", file=sys.stderr)
+    sys.exit(1)
+
+startup_profile.mark("imports")
+
+# Shared by every call in this process, so in-process callers (the STT apps)
+# connect to Ollama, probe the model and open the audio device only once
+_client = None
+_checked_models = set()
+_client_lock = threading.Lock()
+
+
+class TTSError(Exception):
+    """Raised when the Ollama query or the speech synthesis fails"""
+
+
+def get_client(model=None):
+    """The process-wide Ollama client; checks once per model that it is available"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = ollama.Client()
+        if model and model not in _checked_models:
+            try:
+                _client.show(model)
+            except Exception as e:
+                raise TTSError(f"Could not connect to Ollama or find model '{model}': {e}") from e
+            _checked_models.add(model)
+        return _client
+
+
+def init_audio_output():
+    """Open the persistent audio output if it is not open yet"""
+    get_playback_engine().warm_up()
+
+
+def chat_options(seed=None, temperature=None):
+    """Ollama sampling options for the given seed/temperature (None when both are unset)"""
+    options = {}
+    if seed is not None:
+        options['seed'] = seed
+    if temperature is not None:
+        options['temperature'] = temperature
+    return options or None
+
+def query_ollama(client, model, prompt, verbose, on_text=None, options=None, use_cache=True, session=None):
     """
     Queries the Ollama model, streams the response, and returns the full text
-    and performance statistics.
+    and performance statistics. on_text, if given, receives each streamed piece.
+    Seeded queries are answered from the response cache when possible
+    (use_cache=False skips the lookup but still stores the new answer).
+    With a ChatSession the earlier turns are sent along, the model is kept
+    loaded, and the turn is added to the session.
     """
     print(f"User: {prompt}")
     print(f"\nAssistant (using {model}):")
 
+    messages = session.messages(prompt) if session else [{'role': 'user', 'content': prompt}]
+    cache_key = None
+    if is_deterministic(options) and response_cache.enabled:
+        digest = response_cache.model_digest(client, model)
+        if digest:
+            cache_key = response_cache_key(digest, messages, options)
+            cached = response_cache.get(cache_key) if use_cache else None
+            if cached:
+                print(cached["text"])
+                if verbose:
+                    print("\n(cached response, Ollama was not queried)\n")
+                if on_text:
+                    on_text(cached["text"])
+                if session:
+                    session.record(prompt, cached["text"], client=client, cached=True)
+                return cached["text"]
+    if client is None:
+        raise TTSError(f"Could not connect to Ollama and no cached answer for this prompt with model '{model}'")
+
     full_response = ""
     try:
         response_stream = client.chat(
             model=model, 
-            messages=[{'role': 'user', 'content': prompt}],
+            messages=messages,
+            options=options,
+            keep_alive=session.keep_alive if session else None,
             stream=True
         )
     except ollama.ResponseError as e:
         print(f"\nError: {e.error}", file=sys.stderr)
-        print("Is the model '{model}' pulled and available in Ollama?", file=sys.stderr)
-        sys.exit(1)
+        raise TTSError(f"Is the model '{model}' pulled and available in Ollama?") from e
 
     final_stats = {}
     for chunk in response_stream:
@@ -68,6 +145,8 @@ def query_ollama(client, model, prompt, verbose):
             content = chunk['message']['content']
             print(content, end='', flush=True)
             full_response += content
+            if on_text:
+                on_text(content)
         if chunk.get('done'):
             final_stats = chunk
     
@@ -86,130 +165,448 @@ def query_ollama(client, model, prompt, verbose):
             print("-" * 20)
             print("\n")
 
+    if cache_key and full_response:
+        response_cache.put(cache_key, {"text": full_response, "model": model})
+    if session:
+        session.record(prompt, full_response, final_stats, client)
     return full_response
 
+def session_timings(session):
+    """The last turn's model load and prompt eval times, for the per-stage timings"""
+    turn = session.turns[-1]
+    return {"load_ms": turn["load_ms"], "prompt_eval_ms": turn["prompt_eval_ms"], "session": turn}
+
+# Available high-quality voices (you can change these)
+AVAILABLE_VOICES = {
+    "female_us": "en-US-AriaNeural",
+    "male_us": "en-US-GuyNeural", 
+    "female_uk": "en-GB-SoniaNeural",
+    "male_uk": "en-GB-RyanNeural",
+    "female_au": "en-AU-NatashaNeural",
+    "male_au": "en-AU-WilliamNeural"
+}
+
+TTS_HISTORY_PATH = os.path.join(os.path.expanduser("~/Documents"), "SchmidtSims", "TTSHistory")
+# Audio is kept in the size-bounded speech cache; timestamped copies in TTSHistory only on request (--save)
+SAVE_HISTORY = os.environ.get('TTS_SAVE_HISTORY', '').lower() in ('1', 'true', 'yes')
+
+# Prosody passed to edge-tts (also part of the speech cache key)
+SPEECH_RATE = "+0%"
+SPEECH_PITCH = "+0Hz"
+SPEECH_VOLUME = "+0%"
+
+speech_cache = SpeechCache()
+response_cache = ResponseCache()
+
+def resolve_voice(speaker_voice):
+    """edge-tts voice name for a voice key or name; defaults to female US"""
+    if not speaker_voice:
+        return AVAILABLE_VOICES["female_us"]
+    if speaker_voice in AVAILABLE_VOICES.values():
+        return speaker_voice
+    if speaker_voice in AVAILABLE_VOICES:
+        return AVAILABLE_VOICES[speaker_voice]
+    print(f"Warning: Voice '{speaker_voice}' not found. Using default.")
+    print("Available voices:")
+    for key, value in AVAILABLE_VOICES.items():
+        print(f"  {key}: {value}")
+    return AVAILABLE_VOICES["female_us"]
+
+def resolve_output_path(output_path=None, name_suffix=""):
+    """.mp3 path for output_path, relative paths inside TTSHistory (timestamped when not given)
+
+    Only computes the path; directories are created by save_audio once the
+    path is used.
+    """
+    # Generate filename with timestamp if no output_path provided
+    if not output_path:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_path = os.path.join(TTS_HISTORY_PATH, f"tts_output_{timestamp}{name_suffix}.mp3")
+    elif not os.path.isabs(output_path):
+        # If relative path provided, put it in TTSHistory directory
+        output_path = os.path.join(TTS_HISTORY_PATH, output_path)
+    
+    # Ensure output path has .mp3 extension
+    if not output_path.endswith('.mp3'):
+        output_path = output_path.rsplit('.', 1)[0] + '.mp3'
+    return output_path
+
+def save_audio(audio, output_path=None, name_suffix=""):
+    """Write audio to output_path, or to a timestamped TTSHistory file if SAVE_HISTORY is set
+
+    Returns the path written, or None when nothing was asked for.
+    """
+    if not output_path and not SAVE_HISTORY:
+        return None
+    output_path = resolve_output_path(output_path, name_suffix)
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, 'wb') as f:
+        f.write(audio)
+    return output_path
+
 def synthesize_and_process_audio(text, speaker_voice, seed, output_path=None, compile_tts=False):
     """
-    Initializes TTS engine, synthesizes audio from text, and either plays it
-    or saves it to a file.
+    Initializes TTS engine, synthesizes audio from text, plays it from
+    memory and saves it if asked to (see save_audio). Returns the synthesis
+    and playback times in ms.
     """
     if not text.strip():
         print("Ollama returned an empty response. Nothing to synthesize.", file=sys.stderr)
-        return
+        return {}
 
     print("Initializing TTS engine...")
     
-    # Available high-quality voices (you can change these)
-    available_voices = {
-        "female_us": "en-US-AriaNeural",
-        "male_us": "en-US-GuyNeural", 
-        "female_uk": "en-GB-SoniaNeural",
-        "male_uk": "en-GB-RyanNeural",
-        "female_au": "en-AU-NatashaNeural",
-        "male_au": "en-AU-WilliamNeural"
-    }
-    
-    # Use provided voice or default to female US
-    if speaker_voice:
-        if speaker_voice in available_voices.values():
-            voice = speaker_voice
-        elif speaker_voice in available_voices:
-            voice = available_voices[speaker_voice]
-        else:
-            print(f"Warning: Voice '{speaker_voice}' not found. Using default.")
-            print("Available voices:")
-            for key, value in available_voices.items():
-                print(f"  {key}: {value}")
-            voice = available_voices["female_us"]
-    else:
-        voice = available_voices["female_us"]
+    voice = resolve_voice(speaker_voice)
     
     print(f"Using voice: {voice}")
     print("Synthesizing audio...")
-    print(f"Using seed {seed} for reproducible output.")
+    if seed is not None:
+        print(f"Using seed {seed} for reproducible output.")
     
     try:
-        # Create TTSHistory directory if it doesn't exist
-        documents_path = os.path.expanduser("~/Documents")
-        tts_history_path = os.path.join(documents_path, "SchmidtSims", "TTSHistory")
-        os.makedirs(tts_history_path, exist_ok=True)
-        
-        # Generate filename with timestamp if no output_path provided
-        if not output_path:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            output_path = os.path.join(tts_history_path, f"tts_output_{timestamp}.mp3")
-        elif not os.path.isabs(output_path):
-            # If relative path provided, put it in TTSHistory directory
-            output_path = os.path.join(tts_history_path, output_path)
-        
-        # Ensure output path has .mp3 extension
-        if not output_path.endswith('.mp3'):
-            output_path = output_path.rsplit('.', 1)[0] + '.mp3'
-        
-        print(f"Saving audio to {output_path}...")
-        
         # Run the async TTS function
-        asyncio.run(generate_speech(text, voice, output_path))
-        
-        print("Audio saved successfully.")
+        started = time.perf_counter()
+        audio = asyncio.run_coroutine_threadsafe(synthesize_to_memory(text, voice), get_event_loop()).result()
+        synthesized = time.perf_counter()
         
-        # Play audio
+        # Play straight from memory; the file is written while it plays
         print("Playing audio...")
-        play_audio(output_path)
+        clip = get_playback_engine().play(audio)
+        saved_path = save_audio(audio, output_path)
+        if saved_path:
+            print(f"Audio saved to {saved_path}")
+        clip.wait()
+        if clip.error:
+            print(f"Error playing audio: {clip.error}", file=sys.stderr)
         print("Playback finished.")
+        return {
+            "synthesis_ms": (synthesized - started) * 1000,
+            "playback_ms": (time.perf_counter() - synthesized) * 1000,
+        }
                 
     except Exception as e:
-        print(f"Error during audio synthesis: {e}", file=sys.stderr)
-        sys.exit(1)
+        raise TTSError(f"Error during audio synthesis: {e}") from e
+
+# Sentence pipeline: speech for each sentence is synthesized as soon as the
+# sentence is complete and played while the model is still generating
+SENTENCE_END = re.compile(r'(?<=[.!?])["\')\]]*\s+|\n+')
+MIN_SENTENCE_CHARS = 20  # shorter pieces ("Hi.", "Dr.") are joined with the next sentence
+PIPELINE_SYNTHESIS_CONCURRENCY = 3
+
+_event_loop = None
+_event_loop_lock = threading.Lock()
 
-async def generate_speech(text, voice, output_path):
-    """Generate speech using edge-tts and save to file."""
-    communicate = edge_tts.Communicate(text, voice)
-    await communicate.save(output_path)
 
-def play_audio(file_path):
-    """Play audio file using pygame."""
+class SentenceSplitter:
+    """Cuts streamed text into sentences as soon as they are complete"""
+
+    def __init__(self, min_chars=MIN_SENTENCE_CHARS):
+        self.min_chars = min_chars
+        self.buffer = ""
+
+    def feed(self, text):
+        """Add streamed text; returns the sentences it completed"""
+        self.buffer += text
+        sentences = []
+        start = 0
+        for match in SENTENCE_END.finditer(self.buffer):
+            sentence = self.buffer[start:match.end()].strip()
+            if len(sentence) >= self.min_chars:
+                sentences.append(sentence)
+                start = match.end()
+        self.buffer = self.buffer[start:]
+        return sentences
+
+    def flush(self):
+        """The unfinished remainder at the end of the stream"""
+        rest, self.buffer = self.buffer.strip(), ""
+        return [rest] if rest else []
+
+
+def get_event_loop():
+    """Process-wide asyncio loop on a background thread, used for sentence synthesis"""
+    global _event_loop
+    with _event_loop_lock:
+        if _event_loop is None:
+            _event_loop = asyncio.new_event_loop()
+            threading.Thread(target=_event_loop.run_forever, name="tts-event-loop", daemon=True).start()
+        return _event_loop
+
+
+async def synthesize_to_memory(text, voice, limiter=None):
+    """MP3 bytes for text from the speech cache, or streamed from edge-tts and cached"""
+    key = speech_cache_key(text, voice, SPEECH_RATE, SPEECH_PITCH, SPEECH_VOLUME)
+    audio = speech_cache.get(key)
+    if audio is not None:
+        return audio
+
+    async def synthesize():
+        audio = bytearray()
+        communicate = edge_tts.Communicate(text, voice, rate=SPEECH_RATE, pitch=SPEECH_PITCH, volume=SPEECH_VOLUME)
+        async for chunk in communicate.stream():
+            if chunk["type"] == "audio":
+                audio += chunk["data"]
+        return bytes(audio)
+
+    if limiter is None:
+        audio = await synthesize()
+    else:
+        async with limiter:
+            audio = await synthesize()
+    speech_cache.put(key, audio)
+    return audio
+
+
+def play_clips_in_order(clips, timings):
+    """Hand MP3 clips from a queue of futures to the playback engine until None is received
+
+    The engine queues each clip behind the one that is playing, so
+    consecutive sentences play without gaps.
+    """
+    engine = get_playback_engine()
+    played = []
+    while True:
+        future = clips.get()
+        if future is None:
+            break
+        try:
+            played.append(engine.play(future.result()))
+        except Exception as e:
+            print(f"\nWarning: Skipping a sentence that could not be synthesized: {e}", file=sys.stderr)
+    for clip in played:
+        clip.wait()
+        if clip.error:
+            print(f"Warning: Could not play a sentence: {clip.error}", file=sys.stderr)
+    started = [clip.started_at for clip in played if clip.started_at is not None and not clip.error]
+    if started:
+        timings["first_audio_at"] = min(started)
+
+
+def print_speech_cache_stats():
+    stats = speech_cache.stats()
+    if not stats["enabled"]:
+        return
+    lifetime = speech_cache.lifetime_stats()
+    hit_rate = f"{lifetime['hit_rate']:.0%}" if lifetime["hit_rate"] is not None else "n/a"
+    print(f"  - Speech cache: {stats['hits']} hits, {stats['misses']} misses this run; "
+          f"{hit_rate} hit rate overall, {stats['entries']} entries, {stats['bytes'] / 1048576:.1f} MiB")
+
+
+def speak_pipelined(client, model, prompt, speaker_voice, seed, output_path=None, verbose=False, temperature=None,
+                    use_cache=True, session=None):
+    """Stream the answer sentence by sentence into synthesis and gapless playback
+    
+    The complete audio is also saved to TTSHistory. Returns per-stage times in ms.
+    """
+    voice = resolve_voice(speaker_voice)
+    if verbose:
+        print(f"Using voice: {voice}, speaking sentence by sentence")
+    loop = get_event_loop()
+    limiter = asyncio.Semaphore(PIPELINE_SYNTHESIS_CONCURRENCY)
+    splitter = SentenceSplitter()
+    syntheses = []
+    clips = queue.Queue()
+    timings = {}
+    player = threading.Thread(target=play_clips_in_order, args=(clips, timings), name="tts-playback", daemon=True)
+    player.start()
+
+    def submit(sentences):
+        for sentence in sentences:
+            future = asyncio.run_coroutine_threadsafe(synthesize_to_memory(sentence, voice, limiter), loop)
+            syntheses.append(future)
+            clips.put(future)
+
+    started = time.perf_counter()
     try:
-        pygame.mixer.init()
-        pygame.mixer.music.load(file_path)
-        pygame.mixer.music.play()
-        
-        # Wait for playback to finish
-        while pygame.mixer.music.get_busy():
-            pygame.time.wait(100)
-        
-        pygame.mixer.quit()
-    except Exception as e:
-        print(f"Error playing audio: {e}", file=sys.stderr)
-        print("Audio file saved successfully, but playback failed.")
+        query_ollama(client, model, prompt, verbose, on_text=lambda text: submit(splitter.feed(text)),
+                     options=chat_options(seed, temperature), use_cache=use_cache, session=session)
+        answered = time.perf_counter()
+        submit(splitter.flush())
+    finally:
+        clips.put(None)
+        player.join()
+    finished = time.perf_counter()
+
+    if not syntheses:
+        print("Ollama returned an empty response. Nothing to synthesize.", file=sys.stderr)
+        return {}
+    saved_path = save_audio(b"".join(future.result() for future in syntheses
+                                     if future.done() and not future.exception()), output_path)
+    if saved_path:
+        print(f"Audio saved to {saved_path}")
+
+    timings.update({
+        "llm_ms": (answered - started) * 1000,
+        "first_audio_ms": (timings.pop("first_audio_at", finished) - started) * 1000,
+        "playback_ms": (finished - answered) * 1000,
+        "sentences": len(syntheses),
+    })
+    if session:
+        timings.update(session_timings(session))
+    if verbose:
+        print("-" * 20)
+        print("Pipeline Metrics:")
+        print(f"  - Sentences synthesized: {len(syntheses)}")
+        print(f"  - Time to first audio: {timings['first_audio_ms'] / 1000:.2f} seconds")
+        print(f"  - Full response generated after: {timings['llm_ms'] / 1000:.2f} seconds")
+        print_speech_cache_stats()
+        print("-" * 20)
+    return timings
+
+
+def speak(prompt, model, voice=None, seed=None, output_path=None, verbose=False, pipelined=True, temperature=None,
+          session=None):
+    """Query Ollama and speak the answer in this process; returns per-stage times in ms
+    
+    The Ollama client and the audio output stay open for the next call. With
+    a ChatSession the answer continues that conversation.
+    """
+    started = time.perf_counter()
+    client = get_client(model)
+    connected = time.perf_counter()
+    if pipelined:
+        timings = speak_pipelined(client, model, prompt, voice, seed, output_path, verbose, temperature,
+                                  session=session)
+        timings["connect_ms"] = (connected - started) * 1000
+        return timings
+    ollama_response = query_ollama(client, model, prompt, verbose, options=chat_options(seed, temperature),
+                                   session=session)
+    answered = time.perf_counter()
+    timings = {
+        "connect_ms": (connected - started) * 1000,
+        "llm_ms": (answered - connected) * 1000,
+    }
+    if session:
+        timings.update(session_timings(session))
+    timings.update(synthesize_and_process_audio(ollama_response, voice, seed, output_path, False))
+    return timings
+
+def run_session(client, args, options):
+    """Speak the answer to each prompt read from stdin, as one conversation"""
+    session = ChatSession(args.model)
+    print(f"💬 Session mode: up to ~{session.token_budget} tokens of history, model kept loaded for "
+          f"{session.keep_alive}. An empty line or Ctrl+D ends the session.")
+    prompt = args.prompt
+    try:
+        while True:
+            if not prompt:
+                try:
+                    prompt = input("\nYou: ").strip()
+                except EOFError:
+                    break
+                if not prompt:
+                    break
+            if args.sequential:
+                ollama_response = query_ollama(client, args.model, prompt, args.verbose, options=options,
+                                               use_cache=not args.no_cache, session=session)
+                synthesize_and_process_audio(ollama_response, args.voice, args.seed, args.output_path, False)
+            else:
+                speak_pipelined(client, args.model, prompt, args.voice, args.seed, args.output_path, args.verbose,
+                                args.temperature, not args.no_cache, session)
+            print(format_turn(session.turns[-1]))
+            prompt = None
+    except KeyboardInterrupt:
+        print("\n🛑 Session ended.")
+    print_session_report(session.turns)
 
 def main():
     print("🎙️  Ollama TTS App - Starting up...")
     print("Checking dependencies...")
     
     parser = argparse.ArgumentParser(description="Query Ollama and synthesize the response with realistic TTS.")
-    parser.add_argument("prompt", type=str, help="The prompt to send to the Ollama model.")
+    parser.add_argument("prompt", type=str, nargs="?", help="The prompt to send to the Ollama model.")
     parser.add_argument("--model", type=str, default="llama3.1:latest", help="The Ollama model to use.")
-    parser.add_argument("--seed", type=int, default=42, help="A seed for reproducible output.")
+    parser.add_argument("--seed", type=int, help="A seed for reproducible output (seeded answers are cached).")
+    parser.add_argument("--temperature", type=float, help="Sampling temperature (default: the model's own).")
+    parser.add_argument("--no-cache", action="store_true", help="Ask Ollama even if a cached answer exists (the new answer is still cached).")
     parser.add_argument("--output_path", type=str, help="Optional. Path to save the generated audio as a .mp3 file.")
+    parser.add_argument("--save", action="store_true", help="Also keep a timestamped copy of every answer in TTSHistory (default: only the speech cache).")
     parser.add_argument("--verbose", action="store_true", help="Enable verbose output to see performance metrics like tokens/sec.")
     parser.add_argument("--voice", type=str, help="Optional. Voice to use (e.g., en-US-AriaNeural, en-US-GuyNeural).")
+    parser.add_argument("--startup-profile", action="store_true", help="Print how long each startup phase took")
+    parser.add_argument("--sequential", action="store_true", help="Wait for the full response before synthesizing (no sentence pipeline)")
+    parser.add_argument("--session", action="store_true", help="Keep talking: read follow-up prompts from stdin, keeping the conversation and the model loaded")
+    parser.add_argument("--serve", action="store_true", help="Run as a long-lived TTS daemon on localhost instead of answering one prompt")
+    parser.add_argument("--submit", action="store_true", help="Send the prompt to a running TTS daemon and wait for playback")
+    parser.add_argument("--batch", metavar="JSONL", help="Answer every prompt in a JSONL file ('-' for stdin) instead of one prompt")
+    parser.add_argument("--batch_output", type=str, help="Output directory for --batch (default: TTSHistory/batch_<file name>)")
+    parser.add_argument("--llm_concurrency", type=int, default=tts_batch.DEFAULT_LLM_CONCURRENCY, help=f"Concurrent Ollama queries in --batch mode (default: {tts_batch.DEFAULT_LLM_CONCURRENCY})")
+    parser.add_argument("--tts_concurrency", type=int, default=tts_batch.DEFAULT_TTS_CONCURRENCY, help=f"Concurrent syntheses in --batch mode (default: {tts_batch.DEFAULT_TTS_CONCURRENCY})")
+    parser.add_argument("--port", type=int, default=tts_daemon.DEFAULT_PORT, help=f"TTS daemon port (default: {tts_daemon.DEFAULT_PORT})")
     
     args = parser.parse_args()
+    global SAVE_HISTORY
+    SAVE_HISTORY = SAVE_HISTORY or args.save
+
+    if args.serve:
+        tts_daemon.serve(sys.modules[__name__], port=args.port, default_model=args.model)
+        return
+    if not args.prompt and not args.batch and not args.session:
+        parser.error("a prompt is required unless --serve, --session or --batch is used")
+    if args.submit:
+        try:
+            job = tts_daemon.submit(prompt=args.prompt, model=args.model, voice=args.voice, seed=args.seed,
+                                    output_path=args.output_path, wait=True, port=args.port)
+        except (ConnectionError, RuntimeError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        if job["status"] != tts_daemon.JOB_DONE:
+            print(f"Error: TTS job {job['status']}: {job.get('error')}", file=sys.stderr)
+            sys.exit(1)
+        print(job["text"])
+        if args.verbose:
+            print(f"Timings: {job['timings']}")
+        return
 
+    options = chat_options(args.seed, args.temperature)
     try:
-        client = ollama.Client()
-        client.show(args.model) # Check if model exists
-    except Exception:
-        print(f"Error: Could not connect to Ollama or find model '{args.model}'.", file=sys.stderr)
-        print("Please ensure Ollama is running and the model is pulled.", file=sys.stderr)
-        sys.exit(1)
+        client = get_client(args.model) # Check if model exists
+    except TTSError:
+        if not (is_deterministic(options) and response_cache.enabled and not args.batch):
+            print(f"Error: Could not connect to Ollama or find model '{args.model}'.", file=sys.stderr)
+            print("Please ensure Ollama is running and the model is pulled.", file=sys.stderr)
+            sys.exit(1)
+        # A seeded answer may still be in the response cache
+        print("Warning: Could not connect to Ollama, trying the response cache.", file=sys.stderr)
+        client = None
+    startup_profile.mark("Ollama connection")
+    startup_profile.report()
 
-    # 1. Get response from Ollama
-    ollama_response = query_ollama(client, args.model, args.prompt, args.verbose)
+    if args.batch:
+        batch_name = "stdin" if args.batch == "-" else os.path.splitext(os.path.basename(args.batch))[0]
+        output_dir = args.batch_output or os.path.join(TTS_HISTORY_PATH, f"batch_{batch_name}")
+        try:
+            tts_batch.run_batch(sys.modules[__name__], args.batch, output_dir, args.model, args.voice,
+                                args.llm_concurrency, args.tts_concurrency, options)
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        if args.verbose:
+            print_speech_cache_stats()
+        return
 
-    # 2. Synthesize and process audio with TTS
-    synthesize_and_process_audio(ollama_response, args.voice, args.seed, args.output_path, False)
+    try:
+        if args.session:
+            run_session(client, args, options)
+            return
+
+        if not args.sequential:
+            # Speak each sentence while the model is still generating the next ones
+            speak_pipelined(client, args.model, args.prompt, args.voice, args.seed, args.output_path, args.verbose,
+                            args.temperature, not args.no_cache)
+            return
+
+        # 1. Get response from Ollama
+        ollama_response = query_ollama(client, args.model, args.prompt, args.verbose, options=options,
+                                       use_cache=not args.no_cache)
+
+        # 2. Synthesize and process audio with TTS
+        synthesize_and_process_audio(ollama_response, args.voice, args.seed, args.output_path, False)
+        if args.verbose:
+            print_speech_cache_stats()
+    except TTSError as e:
+        print(str(e), file=sys.stderr)
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
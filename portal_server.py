@@ -0,0 +1,131 @@
+"""
+Production serving for the web portal
+
+Runs the Flask app under gunicorn with one worker process and a pool of
+threads. Upload jobs, microphone streams and the history live in the
+memory of the process that created them, and gunicorn workers share one
+listening socket, so requests of one client cannot be kept on one worker.
+The portal therefore scales with threads: a larger worker count is
+clamped to MAX_WORKERS. The app module (recognizers, caches and any
+preloaded Whisper model) is imported once in the master before forking,
+and background threads are started lazily in the worker after the fork. On platforms without gunicorn
+(Windows) it falls back to Werkzeug's threaded server with debug off.
+"""
+
+import os
+import signal
+import sys
+import threading
+import time
+
+MAX_WORKERS = 1  # portal state is per process, see above
+DEFAULT_THREADS = int(os.environ.get('PORTAL_THREADS', '8'))
+DEFAULT_GRACEFUL_TIMEOUT = int(os.environ.get('PORTAL_GRACEFUL_TIMEOUT', '30'))
+
+
+def run_production_server(app, host, port, workers=MAX_WORKERS, threads=DEFAULT_THREADS,
+                          graceful_timeout=DEFAULT_GRACEFUL_TIMEOUT, on_worker_start=None, on_worker_exit=None):
+    """Serve app with a preforked gunicorn worker (or a threaded fallback)"""
+    if workers > MAX_WORKERS:
+        print(f"⚠️  Ignoring --workers {workers}: upload jobs, microphone streams and history live in one "
+              f"process. Running {MAX_WORKERS} worker; scale with --threads instead.")
+        workers = MAX_WORKERS
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        print("⚠️  gunicorn is not available (pip install gunicorn, not supported on Windows).")
+        print("🔁 Falling back to the threaded Werkzeug server (single process, debug off).")
+        if on_worker_start:
+            on_worker_start()
+        _run_threaded_fallback(app, host, port, on_worker_exit)
+        return
+
+    def post_fork(server, worker):
+        if on_worker_start:
+            on_worker_start()
+
+    def worker_exit(server, worker):
+        # Drain background work (queued jobs, pending log writes) before the worker exits
+        if on_worker_exit:
+            on_worker_exit()
+
+    class PortalApplication(BaseApplication):
+        def __init__(self, application, options):
+            self.application = application
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return self.application
+
+    options = {
+        'bind': f"{host}:{port}",
+        'workers': workers,
+        'threads': threads,
+        'worker_class': 'gthread',
+        'preload_app': True,
+        'graceful_timeout': graceful_timeout,
+        'timeout': 120,
+        'keepalive': 5,
+        'post_fork': post_fork,
+        'worker_exit': worker_exit,
+    }
+    print(f"🏭 Production mode: {workers} worker x {threads} threads (gunicorn, preloaded app)")
+    PortalApplication(app, options).run()
+
+
+def _run_threaded_fallback(app, host, port, on_worker_exit=None):
+    """Single-process threaded server that still shuts down gracefully on SIGTERM"""
+    def handle_sigterm(signum, frame):
+        raise KeyboardInterrupt
+
+    if hasattr(signal, 'SIGTERM'):
+        signal.signal(signal.SIGTERM, handle_sigterm)
+    try:
+        app.run(host=host, port=port, debug=False, use_reloader=False, threaded=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if on_worker_exit:
+            on_worker_exit()
+
+
+class WorkerHealth:
+    """Per-process health counters reported by /api/health"""
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self.started_at = time.time()
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def after_fork(self):
+        """Reset the counters when running in a newly forked worker"""
+        with self._lock:
+            self._refresh_after_fork()
+
+    def _refresh_after_fork(self):
+        if self.pid != os.getpid():
+            self.pid = os.getpid()
+            self.started_at = time.time()
+            self.requests = 0
+
+    def record_request(self):
+        with self._lock:
+            self._refresh_after_fork()
+            self.requests += 1
+
+    def snapshot(self):
+        with self._lock:
+            self._refresh_after_fork()
+        return {
+            "pid": self.pid,
+            "started_at": self.started_at,
+            "uptime_s": round(time.time() - self.started_at, 1),
+            "requests": self.requests,
+            "python": sys.version.split()[0],
+        }
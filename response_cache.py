@@ -0,0 +1,91 @@
+"""
+Deterministic Ollama response cache
+
+With a fixed seed, Ollama's answer is a pure function of the model
+weights, the messages and the sampling options, so it can be cached. Keys
+hash the model digest (not just its name, so re-pulling a model
+invalidates its entries), the messages and the options. Storage and LRU
+eviction are the two-tier TranscriptionCache. Because the speech cache
+(tts_cache.py) is keyed on the answer text, a cached answer also finds its
+cached audio, and a repeated run touches neither Ollama nor edge-tts.
+
+The last known digest of every model is remembered next to the entries,
+so cached answers are still served while Ollama is not running.
+
+Configuration (environment variables):
+- OLLAMA_RESPONSE_CACHE_DIR        Cache directory (default: <OLLAMA_STT_CACHE_DIR>/responses)
+- OLLAMA_RESPONSE_CACHE_MAX_BYTES  Disk budget (default: 20 MiB, 0 disables the cache)
+"""
+
+import hashlib
+import json
+import os
+import threading
+
+from fast_start import CACHE_DIR
+from transcription_cache import TranscriptionCache
+
+DEFAULT_CACHE_DIR = os.environ.get('OLLAMA_RESPONSE_CACHE_DIR', os.path.join(CACHE_DIR, "responses"))
+DEFAULT_MAX_BYTES = int(os.environ.get('OLLAMA_RESPONSE_CACHE_MAX_BYTES', str(20 * 1024 * 1024)))
+DIGESTS_FILE = "model-digests.txt"  # not .json, so the entry index ignores it
+
+
+def response_cache_key(model_digest, messages, options):
+    payload = {"model": model_digest, "messages": messages, "options": options}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def is_deterministic(options):
+    """Only seeded requests are reproducible, so only those are cached"""
+    return bool(options) and options.get('seed') is not None
+
+
+class ResponseCache(TranscriptionCache):
+    """Seeded Ollama answers, keyed on model digest, messages and options"""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, max_entries=64):
+        self.enabled = max_bytes > 0
+        self._digests = None
+        self._digest_lock = threading.Lock()
+        super().__init__(max_entries=max_entries, cache_dir=cache_dir if self.enabled else None,
+                         max_disk_bytes=max_bytes)
+
+    def _digests_path(self):
+        return os.path.join(self.cache_dir, DIGESTS_FILE)
+
+    def _load_digests(self):
+        if self._digests is None:
+            self._digests = {}
+            try:
+                with open(self._digests_path(), 'r', encoding='utf-8') as f:
+                    for line in f:
+                        model, _, digest = line.strip().partition(" ")
+                        if digest:
+                            self._digests[model] = digest
+            except OSError:
+                pass
+        return self._digests
+
+    def model_digest(self, client, model):
+        """The model's digest from Ollama, or the last known one if Ollama cannot be reached"""
+        with self._digest_lock:
+            digests = self._load_digests()
+            digest = None
+            if client is not None:
+                try:
+                    for entry in client.list()['models']:
+                        if model in (entry.get('model'), entry.get('name')):
+                            digest = entry['digest']
+                            break
+                except Exception:
+                    pass
+            if digest is None:
+                return digests.get(model)
+            if digests.get(model) != digest:
+                digests[model] = digest
+                try:
+                    with open(self._digests_path(), 'w', encoding='utf-8') as f:
+                        f.writelines(f"{name} {value}\n" for name, value in sorted(digests.items()))
+                except OSError:
+                    pass
+            return digest
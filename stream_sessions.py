@@ -0,0 +1,255 @@
+"""
+Streaming microphone sessions for the web portal
+
+The browser captures audio itself and posts small chunks of 16 kHz mono
+16-bit PCM. Each session runs the shared voice activity detector (vad.py)
+on the chunks as they arrive: when the speaker pauses, the finished utterance is
+transcribed in the background and published as a partial transcript. At
+end-of-stream the remaining audio is flushed and the partials are joined
+into the final transcript, so results arrive while the user is still
+speaking instead of after a fixed recording window.
+
+Configuration (environment variables):
+- STREAM_MIN_SILENCE      Pause (seconds) that closes an utterance (default: 0.6)
+- STREAM_MAX_UTTERANCE    Longest utterance before it is cut (default: 20)
+- STREAM_WORKERS          Utterances transcribed concurrently (default: 4)
+- STREAM_IDLE_TIMEOUT     Seconds before an abandoned session is dropped (default: 120)
+"""
+
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from vad import VoiceActivityDetector
+
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2
+DEFAULT_MIN_SILENCE_S = float(os.environ.get('STREAM_MIN_SILENCE', '0.6'))
+DEFAULT_MAX_UTTERANCE_S = float(os.environ.get('STREAM_MAX_UTTERANCE', '20'))
+DEFAULT_WORKERS = int(os.environ.get('STREAM_WORKERS', '4'))
+DEFAULT_IDLE_TIMEOUT_S = float(os.environ.get('STREAM_IDLE_TIMEOUT', '120'))
+
+MIN_SPEECH_S = 0.1  # shorter utterances are treated as clicks
+PRE_ROLL_S = 0.2  # audio kept from before the VAD fired, so first syllables are not clipped
+
+
+class SessionClosedError(Exception):
+    """Raised when audio is sent to a session that has already ended"""
+
+
+class StreamingSession:
+    """Endpointing and partial transcripts for one browser capture"""
+
+    def __init__(self, session_id, engine, transcribe, min_silence_s=DEFAULT_MIN_SILENCE_S,
+                 max_utterance_s=DEFAULT_MAX_UTTERANCE_S):
+        self.id = session_id
+        self.engine = engine
+        self.created_at = time.time()
+        self.last_activity = time.monotonic()
+        self._transcribe = transcribe
+        self._vad = VoiceActivityDetector(sample_rate=SAMPLE_RATE)
+        self._frame_s = self._vad.frame_s
+        self._frame_bytes = self._vad.frame_len * SAMPLE_WIDTH
+        # The VAD hangover already covers part of the pause
+        hangover_s = self._vad.hangover_frames * self._frame_s
+        self._silence_frames = max(1, int(round((min_silence_s - hangover_s) / self._frame_s)))
+        self._max_utterance_frames = max(1, int(round(max_utterance_s / self._frame_s)))
+        self._min_speech_frames = max(1, int(round(MIN_SPEECH_S / self._frame_s)))
+        self._condition = threading.Condition()
+        self._pending_pcm = b""
+        self._frames_seen = 0
+        self._pre_roll = deque(maxlen=max(1, int(round(PRE_ROLL_S / self._frame_s))))
+        self._utterance = bytearray()
+        self._utterance_start = None
+        self._speech_frames = 0
+        self._trailing_silence = 0
+        self._segments = []
+        self._outstanding = 0
+        self._ended = False
+        self.version = 0
+
+    def feed(self, pcm, executor):
+        """Append PCM bytes; utterances that end are submitted to executor"""
+        with self._condition:
+            if self._ended:
+                raise SessionClosedError("Stream has already ended")
+            self.last_activity = time.monotonic()
+            data = self._pending_pcm + pcm
+            usable = len(data) - len(data) % self._frame_bytes
+            self._pending_pcm = data[usable:]
+            decisions = self._vad.process(data[:usable])
+            for index, speech in enumerate(decisions):
+                offset = index * self._frame_bytes
+                self._process_frame(data[offset:offset + self._frame_bytes], bool(speech), executor)
+
+    def _process_frame(self, frame, speech, executor):
+        position = self._frames_seen * self._frame_s
+        self._frames_seen += 1
+
+        if self._utterance_start is None:
+            if not speech:
+                self._pre_roll.append(frame)
+                return
+            self._utterance_start = position - len(self._pre_roll) * self._frame_s
+            self._utterance += b"".join(self._pre_roll)
+            self._pre_roll.clear()
+
+        self._utterance += frame
+        if speech:
+            self._speech_frames += 1
+            self._trailing_silence = 0
+        else:
+            self._trailing_silence += 1
+
+        utterance_frames = len(self._utterance) // self._frame_bytes
+        if self._trailing_silence >= self._silence_frames or utterance_frames >= self._max_utterance_frames:
+            self._close_utterance(executor)
+
+    def _close_utterance(self, executor):
+        """Hand the current utterance to the executor and start listening for the next one"""
+        pcm = bytes(self._utterance)
+        start = self._utterance_start
+        speech_frames = self._speech_frames
+        self._utterance = bytearray()
+        self._utterance_start = None
+        self._speech_frames = 0
+        self._trailing_silence = 0
+        if start is None or speech_frames < self._min_speech_frames:
+            return
+
+        end = start + len(pcm) / float(SAMPLE_RATE * SAMPLE_WIDTH)
+        segment = {"index": len(self._segments), "start": round(start, 2), "end": round(end, 2),
+                   "text": None, "status": "transcribing"}
+        self._segments.append(segment)
+        self._outstanding += 1
+        self._notify()
+        executor.submit(self._run_transcription, segment, pcm)
+
+    def _run_transcription(self, segment, pcm):
+        try:
+            text = (self._transcribe(pcm, SAMPLE_RATE, SAMPLE_WIDTH, self.engine) or "").strip()
+            changes = {"text": text, "status": "done"}
+        except Exception as e:
+            changes = {"text": "", "status": "failed", "error": str(e) or type(e).__name__}
+        with self._condition:
+            segment.update(changes)
+            self._outstanding -= 1
+            self._notify()
+
+    def _notify(self):
+        self.version += 1
+        self._condition.notify_all()
+
+    def end(self, executor, timeout=None):
+        """Flush the last utterance, wait for all transcriptions and return the final result"""
+        with self._condition:
+            if not self._ended:
+                self._ended = True
+                if self._pending_pcm:
+                    self._utterance += self._pending_pcm
+                    self._pending_pcm = b""
+                self._close_utterance(executor)
+                self._notify()
+            deadline = time.monotonic() + timeout if timeout is not None else None
+            while self._outstanding:
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            return self._snapshot()
+
+    def _snapshot(self):
+        segments = [dict(segment) for segment in self._segments]
+        return {
+            "id": self.id,
+            "engine": self.engine,
+            "version": self.version,
+            "ended": self._ended,
+            "final": self._ended and not self._outstanding,
+            "duration": round(self._frames_seen * self._frame_s, 2),
+            "text": " ".join(segment["text"] for segment in segments if segment["text"]),
+            "segments": segments,
+        }
+
+    def snapshot(self):
+        with self._condition:
+            return self._snapshot()
+
+    def wait_for_update(self, last_version=-1, timeout=None):
+        """Block until the session changes past last_version (or timeout) and return its snapshot"""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._condition:
+            while self.version <= last_version:
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            return self._snapshot()
+
+
+class StreamingSessionManager:
+    """Owns the live sessions of this process and the pool that transcribes their utterances"""
+
+    def __init__(self, transcribe, max_workers=DEFAULT_WORKERS, idle_timeout=DEFAULT_IDLE_TIMEOUT_S):
+        self._transcribe = transcribe
+        self.max_workers = max(1, max_workers)
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._executor = None
+        self._executor_pid = None
+        self._started = 0
+
+    def _pool(self):
+        """Create the thread pool on first use (and again in a forked worker)"""
+        with self._lock:
+            if self._executor_pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="stream")
+                self._executor_pid = os.getpid()
+                self._sessions.clear()
+            return self._executor
+
+    def _expire_idle(self):
+        cutoff = time.monotonic() - self.idle_timeout
+        with self._lock:
+            for session_id in [sid for sid, s in self._sessions.items() if s.last_activity < cutoff]:
+                del self._sessions[session_id]
+
+    def start(self, engine):
+        self._pool()
+        self._expire_idle()
+        session = StreamingSession(uuid.uuid4().hex, engine, self._transcribe)
+        with self._lock:
+            self._sessions[session.id] = session
+            self._started += 1
+        return session
+
+    def get(self, session_id):
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def feed(self, session, pcm):
+        session.feed(pcm, self._pool())
+
+    def end(self, session, timeout=None):
+        """Finish a session and forget it once its final result is known"""
+        result = session.end(self._pool(), timeout)
+        if result["final"]:
+            with self._lock:
+                self._sessions.pop(session.id, None)
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {"active_sessions": len(self._sessions), "started": self._started,
+                    "max_workers": self.max_workers}
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor_pid == os.getpid():
+                self._executor.shutdown(wait=False)
+            self._executor = None
+            self._executor_pid = None
@@ -0,0 +1,42 @@
+"""PlaybackEngine on the headless NullAudioSink"""
+
+from audio_playback import NullAudioSink, PlaybackEngine, NULL_SINK_BITRATE
+
+
+def test_clips_play_in_order_and_complete():
+    sink = NullAudioSink()
+    engine = PlaybackEngine(sink)
+    finished = []
+    clips = [engine.play(f"clip {i}".encode(), on_done=lambda clip: finished.append(clip.audio)) for i in range(5)]
+    assert engine.wait_idle(timeout=5)
+    assert sink.played == [f"clip {i}".encode() for i in range(5)]
+    assert finished == sink.played
+    assert all(clip.done.is_set() and clip.error is None for clip in clips)
+    assert engine.clips_played == 5
+    engine.close(timeout=5)
+
+
+def test_realtime_clips_play_back_to_back():
+    engine = PlaybackEngine(NullAudioSink(realtime=True))
+    audio = b"\0" * (NULL_SINK_BITRATE // 8 // 20)  # 50 ms at the estimated bitrate
+    first, second = engine.play(audio), engine.play(audio)
+    assert second.wait(timeout=5)
+    assert first.finished_at <= second.started_at + 0.01
+    assert second.finished_at - first.started_at >= 0.09
+    engine.close(timeout=5)
+
+
+def test_undecodable_clip_fails_without_stopping_the_queue():
+    class BrokenSink(NullAudioSink):
+        def decode(self, audio):
+            if audio == b"bad":
+                raise ValueError("not audio")
+            return super().decode(audio)
+
+    sink = BrokenSink()
+    engine = PlaybackEngine(sink)
+    bad, good = engine.play(b"bad"), engine.play(b"good")
+    assert good.wait(timeout=5) and bad.done.is_set()
+    assert isinstance(bad.error, ValueError)
+    assert sink.played == [b"good"]
+    engine.close(timeout=5)
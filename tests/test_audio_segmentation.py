@@ -0,0 +1,51 @@
+"""Silence detection of upload segmentation"""
+
+import numpy as np
+import speech_recognition as sr
+
+from audio_segmentation import SegmentedTranscriber, find_cut_points
+
+SAMPLE_RATE = 16000
+
+
+def make_audio(samples):
+    return sr.AudioData(np.asarray(samples, dtype=np.int16).tobytes(), SAMPLE_RATE, 2)
+
+
+def tone(seconds, amplitude=8000, frequency=220):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return amplitude * np.sin(2 * np.pi * frequency * t)
+
+
+def noise(seconds, amplitude=30, seed=0):
+    return np.random.default_rng(seed).normal(0, amplitude, int(seconds * SAMPLE_RATE))
+
+
+def test_clip_without_pauses_is_not_silent():
+    # Regression: a continuous tone was classed as silence and never reached the engine
+    segments = find_cut_points(make_audio(tone(3.0)))
+    assert segments == [(0.0, 3.0, False)]
+
+
+def test_clip_without_pauses_reaches_the_engine():
+    calls = []
+    text, segments = SegmentedTranscriber(max_workers=1).transcribe(
+        make_audio(tone(3.0)), lambda piece: calls.append(piece) or "hello")
+    assert text == "hello"
+    assert len(calls) == 1
+
+
+def test_quiet_recording_is_skipped():
+    calls = []
+    text, segments = SegmentedTranscriber(max_workers=1).transcribe(
+        make_audio(noise(3.0)), lambda piece: calls.append(piece) or "hello")
+    assert text == ""
+    assert calls == []
+
+
+def test_long_recording_is_cut_in_its_pause():
+    audio = make_audio(np.concatenate((noise(0.5), tone(2.0), noise(1.0, seed=1), tone(2.0), noise(0.5, seed=2))))
+    segments = find_cut_points(audio, max_segment_s=4.0)
+    assert len(segments) == 2
+    assert 2.5 <= segments[0][1] <= 3.5
+    assert not any(is_silent for _, _, is_silent in segments)
@@ -0,0 +1,18 @@
+"""Turn statistics of chat sessions"""
+
+from chat_session import ChatSession, format_turn
+
+
+def test_stream_without_done_chunk_is_not_cached():
+    session = ChatSession("test-model", summarize=False)
+    stats = session.record("hello", "hi there", final_stats={})
+    assert stats["cached"] is False
+    assert "cached answer" not in format_turn(stats)
+
+
+def test_cached_answer_is_flagged():
+    session = ChatSession("test-model", summarize=False)
+    stats = session.record("hello", "hi there", cached=True)
+    assert stats["cached"] is True
+    assert "cached answer" in format_turn(stats)
+    assert len(session.history) == 2
@@ -0,0 +1,97 @@
+"""PooledOllamaClient against a local stand-in for the Ollama HTTP API"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from ollama_client import PooledOllamaClient
+
+TOKEN_DELAY_S = 0.05
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        self.server.requests.append(request)
+        final = {"model": request["model"], "response": "", "done": True, "eval_count": 3,
+                 "eval_duration": 300000000, "load_duration": 1500000}
+        if not request.get("stream", True):
+            self._send(dict(final, response="Hello world!"))
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        time.sleep(TOKEN_DELAY_S)  # time to first token
+        for token in ("Hello", " world", "!"):
+            self.wfile.write((json.dumps({"model": request["model"], "response": token, "done": False}) + "\n").encode())
+            self.wfile.flush()
+        self.wfile.write((json.dumps(final) + "\n").encode())
+        self.close_connection = True
+
+    def do_GET(self):
+        self._send({"models": [{"model": "llama3.1:latest", "name": "llama3.1:latest", "size": 4920000000,
+                                "size_vram": 4920000000, "digest": "abc", "expires_at": "2026-10-16T12:05:00Z"}]})
+
+
+@pytest.fixture
+def fake_ollama():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOllamaHandler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_client(server):
+    return PooledOllamaClient(host=f"http://127.0.0.1:{server.server_address[1]}", keep_alive="7m")
+
+
+def test_stream_generate_yields_tokens_then_stats(fake_ollama):
+    client = make_client(fake_ollama)
+    items = list(client.stream_generate("llama3.1:latest", "hi"))
+
+    assert [item["token"] for item in items[:-1]] == ["Hello", " world", "!"]
+    final = items[-1]
+    assert final["done"] is True
+    assert final["eval_count"] == 3
+    assert final["eval_duration"] == 300000000
+    assert final["load_duration"] == 1500000
+    assert final["ttft_ms"] >= TOKEN_DELAY_S * 1000
+    assert final["latency_ms"] >= final["ttft_ms"]
+    assert fake_ollama.requests[0]["keep_alive"] == "7m"
+    assert client.stats.snapshot()["calls"] == 1
+
+
+def test_generate_returns_text_and_timings(fake_ollama):
+    result = make_client(fake_ollama).generate("llama3.1:latest", "hi")
+    assert result["response"] == "Hello world!"
+    assert result["eval_count"] == 3
+
+
+def test_loaded_models_parses_ps(fake_ollama):
+    loaded = make_client(fake_ollama).loaded_models()
+    assert loaded["llama3.1:latest"]["size"] == 4920000000
+    assert loaded["llama3.1:latest"]["expires_at"]
+
+
+def test_errors_are_counted():
+    client = PooledOllamaClient(host="http://127.0.0.1:9", connect_timeout=0.5)
+    with pytest.raises(Exception):
+        list(client.stream_generate("llama3.1:latest", "hi"))
+    assert client.stats.snapshot()["errors"] == 1
@@ -0,0 +1,26 @@
+"""Prompt file parsing of the TTS batch mode"""
+
+import pytest
+
+from tts_batch import output_stem, read_prompts
+
+
+def write_lines(tmp_path, *lines):
+    path = tmp_path / "prompts.jsonl"
+    path.write_text("\n".join(lines) + "\n", encoding='utf-8')
+    return str(path)
+
+
+def test_reads_objects_and_bare_strings(tmp_path):
+    path = write_lines(tmp_path, '{"prompt": "Hello", "id": "a b"}', '', '"Bare prompt"')
+    prompts = read_prompts(path)
+    assert [line for line, _ in prompts] == [1, 3]
+    assert prompts[1][1] == {"prompt": "Bare prompt"}
+    assert output_stem(*prompts[0]) == "00001_a_b"
+
+
+@pytest.mark.parametrize("line", ['{"prompt": 123}', '{"prompt": "  "}', '{"id": "x"}', '[1, 2]', '{not json'])
+def test_malformed_line_is_rejected_with_its_number(tmp_path, line):
+    path = write_lines(tmp_path, '{"prompt": "fine"}', line)
+    with pytest.raises(ValueError, match="^line 2:"):
+        read_prompts(path)
@@ -0,0 +1,35 @@
+"""Request validation of the TTS daemon"""
+
+import os
+
+import pytest
+
+import ollama_tts_app
+from audio_playback import NullAudioSink, PlaybackEngine
+from tts_daemon import TTSDaemon
+
+
+@pytest.fixture
+def daemon(tmp_path, monkeypatch):
+    monkeypatch.setattr(ollama_tts_app, "TTS_HISTORY_PATH", str(tmp_path / "TTSHistory"))
+    monkeypatch.setattr(ollama_tts_app, "get_playback_engine", lambda: PlaybackEngine(NullAudioSink()))
+    daemon = TTSDaemon(ollama_tts_app, workers=1)
+    yield daemon
+    daemon.shutdown(timeout=5)
+
+
+@pytest.mark.parametrize("output_path", ["../../outside/z.mp3", "outside/z.mp3"])
+def test_rejected_output_path_creates_no_directories(daemon, tmp_path, output_path):
+    if not output_path.startswith(".."):
+        output_path = str(tmp_path / output_path)  # absolute, but not inside TTSHistory
+    with pytest.raises(ValueError):
+        daemon.submit(text="hello", play=False, output_path=output_path)
+    assert not os.path.exists(tmp_path / "outside")
+    assert not os.path.exists(tmp_path.parent / "outside")
+    assert not os.path.exists(tmp_path / "TTSHistory")
+
+
+def test_accepted_output_path_stays_inside_history(daemon, tmp_path):
+    history = os.path.realpath(tmp_path / "TTSHistory")
+    assert daemon._checked_output_path("answers/z.mp3") == os.path.join(history, "answers", "z.mp3")
+    assert not os.path.exists(history)  # created only when the audio is saved
@@ -0,0 +1,151 @@
+"""
+Content-addressed cache for transcription results
+
+Results are keyed on a hash of the decoded audio samples plus the engine
+and its settings, so re-uploading the same recording skips recognition.
+There is an in-memory LRU tier and an optional on-disk tier bounded by
+total size (least recently used files are evicted first).
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+
+def audio_cache_key(audio, engine, settings=None):
+    """Hash decoded audio (an sr.AudioData) together with the engine and its settings"""
+    digest = hashlib.sha256()
+    digest.update(f"{audio.sample_rate}:{audio.sample_width}:".encode())
+    digest.update(audio.get_raw_data())
+    digest.update(json.dumps({"engine": engine, "settings": settings or {}}, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+class TranscriptionCache:
+    """Two-tier (memory LRU + optional size-bounded disk) transcription cache"""
+
+    def __init__(self, max_entries=256, cache_dir=None, max_disk_bytes=50 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._disk_index = OrderedDict()  # key -> size in bytes, least recently used first
+        self._disk_bytes = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._load_disk_index()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _load_disk_index(self):
+        """Rebuild the disk LRU order from file modification times"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.json'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, name[:-5], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._disk_index[key] = size
+            self._disk_bytes += size
+
+    def get(self, key):
+        """Return the cached result for key, or None on a miss"""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return dict(self._memory[key])
+
+            if self.cache_dir and key in self._disk_index:
+                try:
+                    with open(self._path(key), 'r', encoding='utf-8') as f:
+                        result = json.load(f)
+                    os.utime(self._path(key))
+                except (OSError, ValueError):
+                    self._drop_disk_entry(key)
+                else:
+                    self._disk_index.move_to_end(key)
+                    self._remember(key, result)
+                    self.disk_hits += 1
+                    return dict(result)
+
+            self.misses += 1
+            return None
+
+    def put(self, key, result):
+        """Store a successful transcription result"""
+        with self._lock:
+            self._remember(key, result)
+            if self.cache_dir:
+                self._write_disk_entry(key, result)
+
+    def _remember(self, key, result):
+        self._memory[key] = dict(result)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _write_disk_entry(self, key, result):
+        path = self._path(key)
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(result, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error writing transcription cache entry: {e}")
+            return
+        if key in self._disk_index:
+            self._disk_bytes -= self._disk_index.pop(key)
+        size = os.path.getsize(path)
+        self._disk_index[key] = size
+        self._disk_bytes += size
+        while self._disk_bytes > self.max_disk_bytes and len(self._disk_index) > 1:
+            oldest = next(iter(self._disk_index))
+            self._drop_disk_entry(oldest)
+            self.evictions += 1
+
+    def _drop_disk_entry(self, key):
+        self._disk_bytes -= self._disk_index.pop(key, 0)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def clear(self):
+        """Remove every cached result from both tiers"""
+        with self._lock:
+            self._memory.clear()
+            for key in list(self._disk_index):
+                self._drop_disk_entry(key)
+
+    def stats(self):
+        """Hit/miss counters and tier sizes, for sizing the cache"""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_entries": len(self._memory),
+                "max_entries": self.max_entries,
+                "disk_enabled": bool(self.cache_dir),
+                "disk_entries": len(self._disk_index),
+                "disk_bytes": self._disk_bytes,
+                "max_disk_bytes": self.max_disk_bytes,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 3) if lookups else None,
+            }
@@ -0,0 +1,67 @@
+"""
+Bounded, thread-safe transcription history for the web portal
+
+Entries live in a fixed-capacity ring buffer (oldest entries fall off)
+and get monotonically increasing ids, which serve as cursors for
+incremental and paginated reads.
+"""
+
+import threading
+from collections import deque
+
+
+class TranscriptionHistory:
+    """Fixed-capacity ring buffer of transcription entries with cursor pagination"""
+
+    def __init__(self, capacity=1000):
+        self.capacity = capacity
+        self._entries = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._next_id = 1
+
+    def append(self, entry):
+        """Store an entry (O(1)) and return it with its assigned id"""
+        with self._lock:
+            entry = {"id": self._next_id, **entry}
+            self._next_id += 1
+            self._entries.append(entry)
+        return entry
+
+    def clear(self):
+        """Drop every entry; ids keep increasing so existing cursors stay valid"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def page(self, limit=50, since=None, before=None, offset=0):
+        """Return up to limit entries, newest first
+
+        since  -- only entries with an id greater than this (incremental refresh)
+        before -- only entries with an id lower than this (cursor for older pages)
+        offset -- number of matching entries to skip (offset pagination)
+        """
+        with self._lock:
+            latest_id = self._next_id - 1
+            if not self._entries:
+                return {"history": [], "latest_id": latest_id, "next_before": None, "has_more": False, "total": 0}
+
+            # Ids are contiguous inside the buffer, so cursors map straight to positions
+            first_id = self._entries[0]["id"]
+            total = len(self._entries)
+            end = total if before is None else max(0, min(total, before - first_id))
+            start = 0 if since is None else max(0, min(total, since - first_id + 1))
+            end = max(start, end - offset)
+            page_start = max(start, end - limit)
+            entries = [self._entries[i] for i in range(end - 1, page_start - 1, -1)]
+
+        has_more = page_start > start
+        return {
+            "history": entries,
+            "latest_id": latest_id,
+            "next_before": entries[-1]["id"] if entries and has_more else None,
+            "has_more": has_more,
+            "total": total,
+        }
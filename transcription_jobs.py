@@ -0,0 +1,212 @@
+"""
+Asynchronous transcription job queue for the web portal
+
+Uploads are queued as jobs on a bounded queue and processed by a pool of
+worker threads, so Flask request threads return a job id immediately
+instead of waiting for speech recognition to finish.
+"""
+
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+FINISHED_STATES = (JOB_DONE, JOB_FAILED)
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue has no room for another job"""
+
+
+class TranscriptionJobQueue:
+    """Bounded job queue backed by a pool of transcription worker threads"""
+
+    def __init__(self, worker_count=2, max_queue_size=32, max_finished_jobs=500, stats_window=200):
+        self.worker_count = worker_count
+        self.max_queue_size = max_queue_size
+        self.max_finished_jobs = max_finished_jobs
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._jobs = OrderedDict()
+        self._condition = threading.Condition()
+        self._workers = []
+        self._workers_pid = None
+        self._accepting = True
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._wait_times = deque(maxlen=stats_window)
+        self._run_times = deque(maxlen=stats_window)
+
+    def _ensure_workers(self):
+        """Start the worker threads on first use (and again in a forked child)"""
+        with self._condition:
+            if self._workers_pid == os.getpid():
+                return
+            if self._workers_pid is not None:
+                # Forked after the parent started: its threads and jobs did not come along
+                self._queue = queue.Queue(maxsize=self.max_queue_size)
+                self._jobs.clear()
+                self._running = 0
+            self._workers = []
+            for index in range(self.worker_count):
+                worker = threading.Thread(target=self._worker_loop, name=f"transcription-worker-{index}", daemon=True)
+                worker.start()
+                self._workers.append(worker)
+            self._workers_pid = os.getpid()
+
+    def submit(self, func, *args, **kwargs):
+        """Queue func(*args, **kwargs) and return the new job's snapshot"""
+        if not self._accepting:
+            raise QueueFullError("Server is shutting down, please retry later")
+        self._ensure_workers()
+        job_id = uuid.uuid4().hex
+        job = {
+            "id": job_id,
+            "status": JOB_QUEUED,
+            "result": None,
+            "error": None,
+            "submitted_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "version": 0,
+        }
+        with self._condition:
+            self._jobs[job_id] = job
+        try:
+            self._queue.put_nowait((job_id, func, args, kwargs))
+        except queue.Full:
+            with self._condition:
+                del self._jobs[job_id]
+            raise QueueFullError("Transcription queue is full, please retry later")
+        return self.get(job_id)
+
+    def get(self, job_id):
+        """Return a snapshot of a job, or None if it is unknown"""
+        with self._condition:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def wait_for_update(self, job_id, last_version=-1, timeout=None):
+        """Block until the job changes past last_version (or timeout) and return its snapshot"""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._condition:
+            while True:
+                job = self._jobs.get(job_id)
+                if job is None or job["version"] > last_version:
+                    return dict(job) if job else None
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    return dict(job)
+                self._condition.wait(remaining)
+
+    def shutdown(self, timeout=30):
+        """Stop accepting jobs and wait up to timeout seconds for queued jobs to finish"""
+        self._accepting = False
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while self._workers_pid == os.getpid() and (self._queue.unfinished_tasks or self._running):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(min(remaining, 0.5))
+        return True
+
+    def wait(self, job_id, timeout=None):
+        """Block until the job finishes (or timeout) and return its snapshot"""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._condition:
+            while True:
+                job = self._jobs.get(job_id)
+                if job is None or job["status"] in FINISHED_STATES:
+                    return dict(job) if job else None
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    return dict(job)
+                self._condition.wait(remaining)
+
+    def wait_any(self, job_ids, timeout=None):
+        """Block until at least one of job_ids finishes (or timeout)
+
+        Returns {job_id: snapshot} for every job in job_ids that has finished;
+        jobs that are no longer known map to None.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._condition:
+            while True:
+                finished = {}
+                for job_id in job_ids:
+                    job = self._jobs.get(job_id)
+                    if job is None or job["status"] in FINISHED_STATES:
+                        finished[job_id] = dict(job) if job else None
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if finished or not job_ids or (remaining is not None and remaining <= 0):
+                    return finished
+                self._condition.wait(remaining)
+
+    def _update(self, job_id, **changes):
+        with self._condition:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job.update(changes)
+            job["version"] += 1
+            self._condition.notify_all()
+
+    def _prune_finished(self):
+        """Forget the oldest finished jobs once more than max_finished_jobs are kept"""
+        finished = [job_id for job_id, job in self._jobs.items() if job["status"] in FINISHED_STATES]
+        for job_id in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            del self._jobs[job_id]
+
+    def _worker_loop(self):
+        while True:
+            job_id, func, args, kwargs = self._queue.get()
+            started_at = time.time()
+            with self._condition:
+                job = self._jobs.get(job_id)
+                submitted_at = job["submitted_at"] if job else started_at
+                self._running += 1
+                self._wait_times.append(started_at - submitted_at)
+            self._update(job_id, status=JOB_RUNNING, started_at=started_at)
+
+            try:
+                result = func(*args, **kwargs)
+                status, error = JOB_DONE, None
+            except Exception as e:
+                result, status, error = None, JOB_FAILED, str(e)
+
+            finished_at = time.time()
+            with self._condition:
+                self._running -= 1
+                self._run_times.append(finished_at - started_at)
+                if status == JOB_DONE:
+                    self._completed += 1
+                else:
+                    self._failed += 1
+            self._update(job_id, status=status, result=result, error=error, finished_at=finished_at)
+            with self._condition:
+                self._prune_finished()
+            self._queue.task_done()
+
+    def stats(self):
+        """Queue depth, worker utilisation and average wait/run times"""
+        def average_ms(samples):
+            return round(sum(samples) / len(samples) * 1000, 1) if samples else None
+
+        with self._condition:
+            return {
+                "workers": self.worker_count,
+                "max_queue_size": self.max_queue_size,
+                "queue_depth": self._queue.qsize(),
+                "running": self._running,
+                "completed": self._completed,
+                "failed": self._failed,
+                "avg_wait_ms": average_ms(self._wait_times),
+                "avg_run_ms": average_ms(self._run_times),
+            }
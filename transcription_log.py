@@ -0,0 +1,194 @@
+"""
+Append-only transcription log backed by SQLite in WAL mode
+
+Replaces the one-text-file-per-transcription layout. Callers append
+entries without touching the disk; a background writer thread commits
+queued entries in batches (group commit). Every entry gets a unique id,
+and entries can be read back by time range through an index.
+"""
+
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transcriptions (
+    id TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    text TEXT NOT NULL,
+    source TEXT,
+    engine TEXT,
+    metadata TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_transcriptions_created_at ON transcriptions (created_at);
+"""
+
+
+class TranscriptionLog:
+    """SQLite transcription log with a batching background writer"""
+
+    def __init__(self, db_path, batch_size=64, flush_interval=0.5):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._writer = None
+        self._writer_pid = None
+        self.batches_written = 0
+        self.entries_written = 0
+
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _ensure_writer(self):
+        """Start the writer thread (again, if this process was forked)"""
+        with self._lock:
+            if self._writer is not None and self._writer_pid == os.getpid() and self._writer.is_alive():
+                return
+            if self._writer_pid != os.getpid():
+                # Entries queued by the parent are committed by the parent
+                self._queue = queue.Queue()
+            self._writer = threading.Thread(target=self._writer_loop, name="transcription-log-writer", daemon=True)
+            self._writer_pid = os.getpid()
+            self._writer.start()
+
+    def append(self, text, source=None, engine=None, **metadata):
+        """Queue an entry for writing and return its id"""
+        self._ensure_writer()
+        entry_id = uuid.uuid4().hex
+        self._queue.put((entry_id, time.time(), text, source, engine, json.dumps(metadata) if metadata else None))
+        return entry_id
+
+    def _writer_loop(self):
+        conn = self._connect()
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    self._queue.task_done()
+                    return
+                batch = [item]
+                stop = False
+
+                # Gather whatever else arrives within the flush window, up to batch_size
+                deadline = time.monotonic() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        stop = True
+                        break
+                    batch.append(item)
+
+                try:
+                    with conn:
+                        conn.executemany(
+                            "INSERT INTO transcriptions (id, created_at, text, source, engine, metadata) VALUES (?, ?, ?, ?, ?, ?)",
+                            batch,
+                        )
+                    self.batches_written += 1
+                    self.entries_written += len(batch)
+                except sqlite3.Error as e:
+                    print(f"Error writing transcription log batch: {e}")
+                finally:
+                    for _ in range(len(batch) + (1 if stop else 0)):
+                        self._queue.task_done()
+                if stop:
+                    return
+        finally:
+            conn.close()
+
+    def flush(self):
+        """Block until every queued entry has been committed"""
+        if self._writer is not None and self._writer_pid == os.getpid():
+            self._queue.join()
+
+    def close(self):
+        """Commit pending entries and stop the writer thread"""
+        with self._lock:
+            writer = self._writer if self._writer_pid == os.getpid() else None
+            self._writer = None
+        if writer is not None and writer.is_alive():
+            self._queue.put(None)
+            writer.join()
+
+    def read_range(self, start=None, end=None, limit=100, newest_first=True):
+        """Return committed entries with start <= created_at < end (epoch seconds)"""
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("created_at >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("created_at < ?")
+            params.append(end)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        order = "DESC" if newest_first else "ASC"
+        params.append(limit)
+
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                f"SELECT id, created_at, text, source, engine, metadata FROM transcriptions {where} "
+                f"ORDER BY created_at {order} LIMIT ?",
+                params,
+            ).fetchall()
+        finally:
+            conn.close()
+
+        return [
+            {
+                "id": row[0],
+                "created_at": row[1],
+                "text": row[2],
+                "source": row[3],
+                "engine": row[4],
+                **(json.loads(row[5]) if row[5] else {}),
+            }
+            for row in rows
+        ]
+
+    def stats(self):
+        return {
+            "path": self.db_path,
+            "pending": self._queue.qsize(),
+            "batches_written": self.batches_written,
+            "entries_written": self.entries_written,
+        }
+
+
+_logs = {}
+_logs_lock = threading.Lock()
+
+
+def get_transcription_log(db_path):
+    """Return the shared log for db_path; pending entries are flushed at exit"""
+    db_path = os.path.abspath(db_path)
+    with _logs_lock:
+        if db_path not in _logs:
+            _logs[db_path] = TranscriptionLog(db_path)
+        return _logs[db_path]
+
+
+@atexit.register
+def _close_logs():
+    for log in list(_logs.values()):
+        log.close()
@@ -0,0 +1,159 @@
+"""
+Concurrent batch mode for ollama_tts_app
+
+`python ollama_tts_app.py --batch prompts.jsonl` (or `--batch -` for stdin)
+answers many prompts in one process. Every line is a JSON object with a
+"prompt" and optional "id", "model" and "voice" (a bare JSON string is
+taken as the prompt). Prompts run through an asyncio pipeline: Ollama
+queries and edge-tts syntheses overlap, but each stage has its own
+concurrency limit so a slow model does not starve synthesis or the other
+way round.
+
+Outputs go to deterministic paths in the output directory:
+<line>_<id>.mp3 and .txt, plus results.jsonl with one record per prompt.
+Running the same batch again skips prompts whose MP3 already exists.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+
+DEFAULT_LLM_CONCURRENCY = 2
+DEFAULT_TTS_CONCURRENCY = 4
+EDGE_TTS_BITRATE = 48000  # edge-tts' default output is 48 kbit/s mono MP3
+
+
+def read_prompts(source):
+    """[(line_number, spec)] from a JSONL file path or '-' for stdin"""
+    stream = sys.stdin if source == "-" else open(source, 'r', encoding='utf-8')
+    prompts = []
+    try:
+        for line_number, line in enumerate(stream, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                spec = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"line {line_number}: invalid JSON ({e})") from e
+            if isinstance(spec, str):
+                spec = {"prompt": spec}
+            if not isinstance(spec, dict) or not isinstance(spec.get("prompt"), str) or not spec["prompt"].strip():
+                raise ValueError(f"line {line_number}: expected an object with a 'prompt' string")
+            prompts.append((line_number, spec))
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    return prompts
+
+
+def output_stem(line_number, spec):
+    """Deterministic file name stem: line number plus the given id or a hash of the prompt"""
+    label = spec.get("id") or hashlib.sha256(spec["prompt"].encode('utf-8')).hexdigest()[:12]
+    label = re.sub(r'[^A-Za-z0-9_.-]+', '_', str(label))[:64]
+    return f"{line_number:05d}_{label}"
+
+
+def audio_seconds(audio):
+    return len(audio) * 8.0 / EDGE_TTS_BITRATE
+
+
+async def _answer(client, model, prompt, options=None):
+    response = await client.chat(model=model, messages=[{'role': 'user', 'content': prompt}], options=options)
+    return response['message']['content']
+
+
+async def _process(pipeline, client, line_number, spec, defaults, output_dir, llm_limiter, tts_limiter, totals):
+    stem = output_stem(line_number, spec)
+    audio_path = os.path.join(output_dir, f"{stem}.mp3")
+    record = {"line": line_number, "id": spec.get("id"), "audio_path": audio_path}
+    if os.path.exists(audio_path):
+        record["status"] = "skipped"
+        return record
+
+    model = spec.get("model") or defaults["model"]
+    voice = pipeline.resolve_voice(spec.get("voice") or defaults["voice"])
+    try:
+        async with llm_limiter:
+            started = time.perf_counter()
+            text = (await _answer(client, model, spec["prompt"], defaults["options"])).strip()
+            answered = time.perf_counter()
+        if not text:
+            raise ValueError("Ollama returned an empty response")
+        async with tts_limiter:
+            synthesis_started = time.perf_counter()
+            audio = await pipeline.synthesize_to_memory(text, voice)
+            synthesized = time.perf_counter()
+    except Exception as e:
+        record.update(status="failed", error=str(e) or type(e).__name__)
+        print(f"❌ line {line_number}: {record['error']}", file=sys.stderr)
+        return record
+
+    with open(os.path.join(output_dir, f"{stem}.txt"), 'w', encoding='utf-8') as f:
+        f.write(text)
+    with open(audio_path, 'wb') as f:
+        f.write(audio)
+    seconds = audio_seconds(audio)
+    totals["audio_s"] += seconds
+    totals["llm_s"] += answered - started
+    totals["tts_s"] += synthesized - synthesis_started
+    record.update(status="done", model=model, voice=voice, audio_seconds=round(seconds, 2),
+                  llm_ms=round((answered - started) * 1000, 1), tts_ms=round((synthesized - synthesis_started) * 1000, 1))
+    print(f"✅ line {line_number}: {seconds:.1f}s of audio -> {audio_path}")
+    return record
+
+
+async def _run(pipeline, prompts, defaults, output_dir, llm_concurrency, tts_concurrency):
+    client = pipeline.ollama.AsyncClient()
+    llm_limiter = asyncio.Semaphore(llm_concurrency)
+    tts_limiter = asyncio.Semaphore(tts_concurrency)
+    totals = {"audio_s": 0.0, "llm_s": 0.0, "tts_s": 0.0}
+    records = await asyncio.gather(*(
+        _process(pipeline, client, line_number, spec, defaults, output_dir, llm_limiter, tts_limiter, totals)
+        for line_number, spec in prompts))
+    return records, totals
+
+
+def run_batch(pipeline, source, output_dir, model, voice=None, llm_concurrency=DEFAULT_LLM_CONCURRENCY,
+              tts_concurrency=DEFAULT_TTS_CONCURRENCY, options=None):
+    """Answer and synthesize every prompt in source; returns the summary dict"""
+    prompts = read_prompts(source)
+    os.makedirs(output_dir, exist_ok=True)
+    print(f"📦 {len(prompts)} prompts, LLM concurrency {llm_concurrency}, TTS concurrency {tts_concurrency}")
+    print(f"📁 Writing to {output_dir}")
+
+    started = time.perf_counter()
+    records, totals = asyncio.run(_run(pipeline, prompts, {"model": model, "voice": voice, "options": options}, output_dir,
+                                       max(1, llm_concurrency), max(1, tts_concurrency)))
+    elapsed = time.perf_counter() - started
+
+    with open(os.path.join(output_dir, "results.jsonl"), 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+
+    done = sum(1 for record in records if record["status"] == "done")
+    minutes = elapsed / 60.0
+    summary = {
+        "prompts": len(records),
+        "done": done,
+        "failed": sum(1 for record in records if record["status"] == "failed"),
+        "skipped": sum(1 for record in records if record["status"] == "skipped"),
+        "elapsed_s": round(elapsed, 2),
+        "audio_s": round(totals["audio_s"], 1),
+        "prompts_per_min": round(done / minutes, 1) if minutes else None,
+        "audio_s_per_min": round(totals["audio_s"] / minutes, 1) if minutes else None,
+    }
+    print("-" * 20)
+    print("Batch Summary:")
+    print(f"  - Prompts: {summary['done']} done, {summary['failed']} failed, {summary['skipped']} skipped")
+    print(f"  - Wall time: {elapsed:.1f} seconds")
+    print(f"  - Throughput: {summary['prompts_per_min']} prompts/min, {summary['audio_s_per_min']} audio seconds/min")
+    if done:
+        print(f"  - Average per prompt: LLM {totals['llm_s'] / done:.2f}s, TTS {totals['tts_s'] / done:.2f}s "
+              f"(overlapped across prompts)")
+    print("-" * 20)
+    return summary
@@ -0,0 +1,196 @@
+"""
+Content-addressed cache for synthesized speech
+
+Audio is keyed on a hash of the normalized text plus the voice and the
+prosody settings, so repeated phrases (greetings, error messages, canned
+replies) are served from disk instead of being synthesized again. The
+pipelined TTS path looks sentences up one by one, so a new answer that
+repeats a known sentence still gets that sentence for free.
+
+Entries are MP3 files in one directory, bounded by total size: the least
+recently used files are evicted first. Hit/miss counters are kept per
+process and added to a stats.json next to the entries on exit, so the
+hit rate can be tracked across one-shot CLI runs.
+
+Configuration (environment variables):
+- TTS_CACHE_DIR        Cache directory (default: TTSHistory/cache)
+- TTS_CACHE_MAX_BYTES  Total size of cached audio (default: 100 MiB, 0 disables the cache)
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import unicodedata
+from collections import OrderedDict
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    'TTS_CACHE_DIR', os.path.join(os.path.expanduser("~/Documents"), "SchmidtSims", "TTSHistory", "cache"))
+DEFAULT_MAX_BYTES = int(os.environ.get('TTS_CACHE_MAX_BYTES', str(100 * 1024 * 1024)))
+CACHE_FORMAT = 1  # bump to invalidate entries when the synthesis output changes
+
+
+def normalize_text(text):
+    """Unicode- and whitespace-normalized text, so trivially different spellings share an entry"""
+    return re.sub(r'\s+', ' ', unicodedata.normalize('NFC', text)).strip()
+
+
+def speech_cache_key(text, voice, rate="+0%", pitch="+0Hz", volume="+0%"):
+    """Hash the normalized text together with the voice and prosody settings"""
+    payload = {"format": CACHE_FORMAT, "text": normalize_text(text), "voice": voice,
+               "rate": rate, "pitch": pitch, "volume": volume}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class SpeechCache:
+    """Size-bounded LRU cache of MP3 audio on disk"""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.enabled = max_bytes > 0
+        self._lock = threading.Lock()
+        self._index = OrderedDict()  # key -> size in bytes, least recently used first
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes_served = 0
+        self._loaded = False
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.mp3")
+
+    def _ensure_loaded(self):
+        """Rebuild the LRU order from file modification times on first use; False if the cache is unusable"""
+        if self._loaded:
+            return self.enabled
+        self._loaded = True
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            names = os.listdir(self.cache_dir)
+        except OSError as e:
+            # Synthesis works without the cache, so a read-only or missing directory only disables it
+            print(f"Warning: TTS cache disabled, cannot use {self.cache_dir}: {e}", file=sys.stderr)
+            self.enabled = False
+            return False
+        entries = []
+        for name in names:
+            if not name.endswith('.mp3'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._bytes += size
+        atexit.register(self.save_stats)
+        return True
+
+    def get(self, key):
+        """Cached MP3 bytes for key, or None on a miss"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            if not self._ensure_loaded():
+                return None
+            if key in self._index:
+                try:
+                    with open(self._path(key), 'rb') as f:
+                        audio = f.read()
+                    os.utime(self._path(key))
+                except OSError:
+                    self._drop(key)
+                else:
+                    self._index.move_to_end(key)
+                    self.hits += 1
+                    self.bytes_served += len(audio)
+                    return audio
+            self.misses += 1
+            return None
+
+    def put(self, key, audio):
+        """Store synthesized MP3 bytes and evict the least recently used entries over budget"""
+        if not self.enabled or not audio:
+            return
+        with self._lock:
+            if not self._ensure_loaded():
+                return
+            path = self._path(key)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp_path, 'wb') as f:
+                    f.write(audio)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"Error writing TTS cache entry: {e}")
+                return
+            if key in self._index:
+                self._bytes -= self._index.pop(key)
+            self._index[key] = len(audio)
+            self._bytes += len(audio)
+            while self._bytes > self.max_bytes and len(self._index) > 1:
+                self._drop(next(iter(self._index)))
+                self.evictions += 1
+
+    def _drop(self, key):
+        self._bytes -= self._index.pop(key, 0)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def stats(self):
+        """Counters of this process plus the entry count and size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._index),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "bytes_served": self.bytes_served,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            }
+
+    def lifetime_stats(self):
+        """Counters accumulated in stats.json by earlier processes, plus this one's"""
+        totals = self._read_stats_file()
+        current = self.stats()
+        for field in ("hits", "misses", "evictions", "bytes_served"):
+            totals[field] = totals.get(field, 0) + current[field]
+        lookups = totals["hits"] + totals["misses"]
+        totals["hit_rate"] = round(totals["hits"] / lookups, 3) if lookups else None
+        return totals
+
+    def _read_stats_file(self):
+        try:
+            with open(os.path.join(self.cache_dir, "stats.json"), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_stats(self):
+        """Add this process's counters to stats.json (called on exit)"""
+        with self._lock:
+            if not (self.hits or self.misses):
+                return
+            totals = self._read_stats_file()
+            for field in ("hits", "misses", "evictions", "bytes_served"):
+                totals[field] = totals.get(field, 0) + getattr(self, field)
+            self.hits = self.misses = self.evictions = self.bytes_served = 0
+        path = os.path.join(self.cache_dir, "stats.json")
+        try:
+            with open(f"{path}.{os.getpid()}.tmp", 'w', encoding='utf-8') as f:
+                json.dump(totals, f)
+            os.replace(f"{path}.{os.getpid()}.tmp", path)
+        except OSError:
+            pass
@@ -0,0 +1,418 @@
+"""
+Long-lived TTS daemon with a localhost HTTP API
+
+`python ollama_tts_app.py --serve` keeps the Ollama client, one asyncio
+event loop for edge-tts and the audio output open, and accepts jobs over
+HTTP on 127.0.0.1. Jobs are queried and synthesized concurrently by a
+small worker pool, but handed to the playback engine strictly in
+submission order, so answers play back to back without gaps. Other
+entry points use submit() and is_running() to hand work to a running
+daemon; a localhost round trip costs about a millisecond.
+
+API:
+- POST /jobs        {"prompt": ...} (ask Ollama, speak the answer) or {"text": ...}
+                    (speak as is), plus optional model, voice, seed, play, output_path
+                    and session (an id; prompts with the same id continue one
+                    conversation, see chat_session.py). Returns 202 and the job.
+                    The body must be sent as application/json, and output_path
+                    must stay inside TTSHistory.
+- GET  /jobs/<id>   The job; ?wait=SECONDS blocks until it is finished.
+- GET  /health      Queue and worker statistics
+
+Configuration (environment variables):
+- TTS_DAEMON_HOST       Address to bind / connect to (default: 127.0.0.1)
+- TTS_DAEMON_PORT       Port (default: 55668)
+- TTS_DAEMON_WORKERS    Jobs queried/synthesized concurrently (default: 3)
+- TTS_DAEMON_MAX_QUEUE  Unfinished jobs accepted before returning 503 (default: 64)
+"""
+
+import asyncio
+import http.client
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+DEFAULT_HOST = os.environ.get('TTS_DAEMON_HOST', '127.0.0.1')
+DEFAULT_PORT = int(os.environ.get('TTS_DAEMON_PORT', '55668'))
+DEFAULT_WORKERS = int(os.environ.get('TTS_DAEMON_WORKERS', '3'))
+DEFAULT_MAX_QUEUE = int(os.environ.get('TTS_DAEMON_MAX_QUEUE', '64'))
+DEFAULT_MODEL = "llama3.1:latest"
+MAX_FINISHED_JOBS = 200
+MAX_SESSIONS = 32
+MAX_WAIT_S = 3600.0
+
+JOB_QUEUED = "queued"
+JOB_GENERATING = "generating"
+JOB_SYNTHESIZING = "synthesizing"
+JOB_READY = "ready"
+JOB_PLAYING = "playing"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+FINISHED_STATES = (JOB_DONE, JOB_FAILED)
+
+
+class QueueFullError(Exception):
+    """Raised when the daemon has too many unfinished jobs"""
+
+
+class DaemonUnavailableError(ConnectionError):
+    """Raised by the client functions when no daemon answers"""
+
+
+class TTSDaemon:
+    """Job queue, synthesis workers and ordered playback around the ollama_tts_app pipeline"""
+
+    def __init__(self, pipeline, workers=DEFAULT_WORKERS, max_queue=DEFAULT_MAX_QUEUE, default_model=DEFAULT_MODEL):
+        self.pipeline = pipeline
+        self.workers = max(1, workers)
+        self.max_queue = max_queue
+        self.default_model = default_model
+        self._condition = threading.Condition()
+        self._jobs = OrderedDict()
+        self._by_sequence = {}
+        self._next_sequence = 0
+        self._play_sequence = 0
+        self._completed = 0
+        self._failed = 0
+        self._stopping = False
+        self._audio = {}  # job id -> synthesized MP3 bytes until the job is handed to the playback engine
+        self._sessions = OrderedDict()  # (session id, model) -> ChatSession, least recently used first
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="tts-job")
+        # One event loop for every edge-tts synthesis instead of asyncio.run() per clip
+        self._loop = pipeline.get_event_loop()
+        self._engine = pipeline.get_playback_engine()
+        self._player = threading.Thread(target=self._playback_loop, name="tts-playback", daemon=True)
+        self._player.start()
+
+    def warm_up(self):
+        """Connect to Ollama, check the default model and open the audio output"""
+        self.pipeline.get_client(self.default_model)
+        self.pipeline.init_audio_output()
+
+    def submit(self, prompt=None, text=None, model=None, voice=None, seed=None, play=True, output_path=None,
+               session=None):
+        """Queue a job and return its snapshot"""
+        if not (prompt or text) or (prompt and text):
+            raise ValueError("Provide exactly one of 'prompt' or 'text'")
+        if output_path:
+            output_path = self._checked_output_path(output_path)
+        with self._condition:
+            if self._stopping:
+                raise QueueFullError("Daemon is shutting down")
+            unfinished = sum(1 for job in self._jobs.values() if job["status"] not in FINISHED_STATES)
+            if unfinished >= self.max_queue:
+                raise QueueFullError("TTS queue is full, please retry later")
+            job = {
+                "id": uuid.uuid4().hex,
+                "sequence": self._next_sequence,
+                "status": JOB_QUEUED,
+                "prompt": prompt,
+                "text": text,
+                "model": model or self.default_model,
+                "voice": voice,
+                "seed": seed,
+                "play": bool(play),
+                "output_path": output_path,
+                "session": session,
+                "error": None,
+                "submitted_at": time.time(),
+                "timings": {},
+            }
+            self._next_sequence += 1
+            self._jobs[job["id"]] = job
+            self._by_sequence[job["sequence"]] = job
+            snapshot = dict(job)
+        self._executor.submit(self._run_job, job)
+        return snapshot
+
+    def _checked_output_path(self, output_path):
+        """output_path resolved inside TTSHistory; callers must not write anywhere else
+
+        Nothing is created here, so a rejected path leaves no directories behind.
+        """
+        if not isinstance(output_path, str):
+            raise ValueError("output_path must be a string")
+        history = os.path.realpath(self.pipeline.TTS_HISTORY_PATH)
+        resolved = os.path.realpath(self.pipeline.resolve_output_path(output_path))
+        if os.path.commonpath([history, resolved]) != history:
+            raise ValueError(f"output_path must be inside {history}")
+        return resolved
+
+    def _update(self, job, **changes):
+        with self._condition:
+            job.update(changes)
+            self._condition.notify_all()
+
+    def _session(self, session_id, model):
+        with self._condition:
+            key = (session_id, model)
+            if key not in self._sessions:
+                self._sessions[key] = self.pipeline.ChatSession(model)
+                while len(self._sessions) > MAX_SESSIONS:
+                    self._sessions.popitem(last=False)
+            self._sessions.move_to_end(key)
+            return self._sessions[key]
+
+    def _record(self, job, stage, elapsed_s):
+        with self._condition:
+            job["timings"][stage] = round(elapsed_s * 1000, 1)
+
+    def _run_job(self, job):
+        started = time.perf_counter()
+        self._record(job, "queue_ms", time.time() - job["submitted_at"])
+        try:
+            text = job["text"]
+            if job["prompt"]:
+                self._update(job, status=JOB_GENERATING)
+                client = self.pipeline.get_client(job["model"])
+                options = self.pipeline.chat_options(job["seed"])
+                if job["session"]:
+                    session = self._session(job["session"], job["model"])
+                    with session.lock:
+                        text = self.pipeline.query_ollama(client, job["model"], job["prompt"], False,
+                                                          options=options, session=session)
+                        turn = dict(session.turns[-1])
+                    self._record(job, "load_ms", turn["load_ms"] / 1000)
+                    self._record(job, "prompt_eval_ms", turn["prompt_eval_ms"] / 1000)
+                    self._update(job, session_turn=turn)
+                else:
+                    text = self.pipeline.query_ollama(client, job["model"], job["prompt"], False, options=options)
+                self._record(job, "llm_ms", time.perf_counter() - started)
+            if not text.strip():
+                raise ValueError("Nothing to synthesize")
+
+            self._update(job, status=JOB_SYNTHESIZING, text=text)
+            synthesis_started = time.perf_counter()
+            voice = self.pipeline.resolve_voice(job["voice"])
+            audio = asyncio.run_coroutine_threadsafe(
+                self.pipeline.synthesize_to_memory(text, voice), self._loop).result()
+            output_path = self.pipeline.save_audio(audio, job["output_path"], f"_{job['id'][:8]}")
+            self._record(job, "synthesis_ms", time.perf_counter() - synthesis_started)
+            with self._condition:
+                if job["play"]:
+                    self._audio[job["id"]] = audio
+            self._update(job, status=JOB_READY if job["play"] else JOB_DONE, output_path=output_path)
+        except Exception as e:
+            self._update(job, status=JOB_FAILED, error=str(e) or type(e).__name__)
+
+    def _playback_loop(self):
+        """Hand finished syntheses to the playback engine in submission order"""
+        while True:
+            with self._condition:
+                while True:
+                    job = self._by_sequence.get(self._play_sequence)
+                    if job is not None and job["status"] in (JOB_READY, JOB_DONE, JOB_FAILED):
+                        break
+                    if self._stopping and job is None:
+                        return
+                    self._condition.wait()
+                del self._by_sequence[self._play_sequence]
+                self._play_sequence += 1
+                if job["status"] != JOB_READY:
+                    self._finish(job)
+                    continue
+                job["status"] = JOB_PLAYING
+                audio = self._audio.pop(job["id"])
+                self._condition.notify_all()
+            # Queued behind the previous answer; the engine reports when it has been played
+            self._engine.play(audio, on_done=lambda clip, job=job: self._played(job, clip))
+
+    def _played(self, job, clip):
+        with self._condition:
+            if clip.error:
+                job.update(status=JOB_FAILED, error=str(clip.error) or type(clip.error).__name__)
+            else:
+                job["status"] = JOB_DONE
+                job["timings"]["playback_ms"] = round((clip.finished_at - clip.started_at) * 1000, 1)
+            self._finish(job)
+
+    def _finish(self, job):
+        """Count a job that the playback side is done with (call with the condition held)"""
+        if job["status"] == JOB_DONE:
+            self._completed += 1
+        else:
+            self._failed += 1
+        job["finished_at"] = time.time()
+        self._prune_finished()
+        self._condition.notify_all()
+
+    def _prune_finished(self):
+        finished = [job_id for job_id, job in self._jobs.items()
+                    if job["status"] in FINISHED_STATES and job["sequence"] < self._play_sequence]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        with self._condition:
+            job = self._jobs.get(job_id)
+            return dict(job, timings=dict(job["timings"])) if job else None
+
+    def wait(self, job_id, timeout=None):
+        """Block until the job has been played (or failed) and return its snapshot"""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._condition:
+            while True:
+                job = self._jobs.get(job_id)
+                # finished_at is set once the playback thread is done with the job
+                if job is None or "finished_at" in job:
+                    break
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+        return self.get(job_id)
+
+    def stats(self):
+        with self._condition:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "default_model": self.default_model,
+                "jobs": counts,
+                "completed": self._completed,
+                "failed": self._failed,
+                "next_to_play": self._play_sequence,
+                "sessions": len(self._sessions),
+                "speech_cache": self.pipeline.speech_cache.stats(),
+            }
+
+    def shutdown(self, timeout=30):
+        """Stop accepting jobs and let the queued ones finish playing"""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        self._executor.shutdown(wait=True)
+        self._player.join(timeout)
+        self._engine.wait_idle(timeout)
+
+
+class _DaemonRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive for clients that reuse the connection
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        daemon = self.server.tts_daemon
+        url = urlsplit(self.path)
+        if url.path == "/health":
+            self._send_json(200, {"status": "ok", **daemon.stats()})
+        elif url.path.startswith("/jobs/"):
+            job_id = url.path[len("/jobs/"):]
+            wait = parse_qs(url.query).get("wait")
+            try:
+                timeout = float(wait[0]) if wait else None
+            except ValueError:
+                timeout = -1.0
+            if timeout is not None and not 0 <= timeout <= MAX_WAIT_S:
+                self._send_json(400, {"error": f"wait must be between 0 and {MAX_WAIT_S:g} seconds"})
+                return
+            job = daemon.wait(job_id, timeout) if wait else daemon.get(job_id)
+            if job is None:
+                self._send_json(404, {"error": "Unknown job"})
+            else:
+                self._send_json(200, job)
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        daemon = self.server.tts_daemon
+        if urlsplit(self.path).path != "/jobs":
+            self._send_json(404, {"error": "Not found"})
+            return
+        # A JSON content type cannot be sent cross-origin without a CORS preflight, which is never granted
+        if self.headers.get_content_type() != "application/json":
+            self._send_json(415, {"error": "Content-Type must be application/json"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            spec = json.loads(self.rfile.read(length) or b"{}")
+            fields = ("prompt", "text", "model", "voice", "seed", "play", "output_path", "session")
+            job = daemon.submit(**{key: spec[key] for key in fields if key in spec})
+        except (ValueError, TypeError) as e:
+            self._send_json(400, {"error": str(e)})
+        except QueueFullError as e:
+            self._send_json(503, {"error": str(e)})
+        else:
+            self._send_json(202, job)
+
+
+def serve(pipeline, host=DEFAULT_HOST, port=DEFAULT_PORT, workers=DEFAULT_WORKERS, default_model=DEFAULT_MODEL):
+    """Run the daemon until interrupted"""
+    daemon = TTSDaemon(pipeline, workers=workers, default_model=default_model)
+    try:
+        daemon.warm_up()
+    except Exception as e:
+        print(f"Warning: Warm-up failed ({e}); jobs will retry the connection.", file=sys.stderr)
+    server = ThreadingHTTPServer((host, port), _DaemonRequestHandler)
+    server.daemon_threads = True
+    server.tts_daemon = daemon
+    print(f"🔊 TTS daemon listening on http://{host}:{port} ({daemon.workers} workers, model {default_model})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Stopping TTS daemon...")
+    finally:
+        server.server_close()
+        daemon.shutdown()
+
+
+def _request(method, path, payload=None, host=DEFAULT_HOST, port=DEFAULT_PORT, timeout=5.0):
+    connection = http.client.HTTPConnection(host, port, timeout=timeout)
+    try:
+        body = json.dumps(payload).encode('utf-8') if payload is not None else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        connection.request(method, path, body=body, headers=headers)
+        response = connection.getresponse()
+        data = json.loads(response.read() or b"{}")
+    except (OSError, http.client.HTTPException) as e:
+        raise DaemonUnavailableError(f"TTS daemon not reachable at {host}:{port}: {e}") from e
+    finally:
+        connection.close()
+    if response.status >= 400:
+        raise RuntimeError(data.get("error", f"TTS daemon returned HTTP {response.status}"))
+    return data
+
+
+def is_running(host=DEFAULT_HOST, port=DEFAULT_PORT, timeout=0.2):
+    """True if a daemon answers its health check"""
+    try:
+        _request("GET", "/health", host=host, port=port, timeout=timeout)
+        return True
+    except (DaemonUnavailableError, RuntimeError, ValueError):
+        return False
+
+
+def submit(prompt=None, text=None, model=None, voice=None, seed=None, play=True, output_path=None,
+           session=None, wait=False, timeout=300, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Submit a job to the running daemon; with wait=True block until it has been played"""
+    spec = {"prompt": prompt, "text": text, "model": model, "voice": voice, "seed": seed,
+            "play": play, "output_path": output_path, "session": session}
+    job = _request("POST", "/jobs", {key: value for key, value in spec.items() if value is not None},
+                   host=host, port=port)
+    if wait:
+        job = wait_for_job(job["id"], timeout, host=host, port=port)
+    return job
+
+
+def wait_for_job(job_id, timeout=300, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Block until a submitted job has been played (or failed) and return it"""
+    return _request("GET", f"/jobs/{job_id}?wait={timeout}", host=host, port=port, timeout=timeout + 5)
@@ -0,0 +1,168 @@
+"""
+In-process handoff from the STT apps to the TTS pipeline
+
+Forwarding a transcript used to start `python ollama_tts_app.py <text>` for
+every utterance, which paid for a new interpreter, the dependency check,
+the imports, an Ollama `client.show()` probe and a pygame mixer init each
+time. When the configured TTS script is the bundled ollama_tts_app.py it
+is imported instead, and its Ollama client and audio output are reused.
+warm_up() does that setup in the background while the user is still
+speaking, so none of it is left on the critical path.
+
+If a TTS daemon (`ollama_tts_app.py --serve`, see tts_daemon.py) is
+running, transcripts are submitted to it instead and nothing is loaded
+here. If the daemon stops answering, the transcript is spoken here after
+all and later calls probe for the daemon again. Custom --tts_script
+paths, and any failure to load the pipeline, use the subprocess path.
+
+Passing a session id to speak() continues one conversation across calls
+(see chat_session.py): in-process the ChatSession is kept here, with a
+daemon it is kept by the daemon. The subprocess path has no session.
+"""
+
+import os
+import sys
+import threading
+import time
+
+import tts_daemon
+
+BUNDLED_TTS_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ollama_tts_app.py")
+
+_pipeline = None
+_setup_timings = {}
+_warm_up_thread = None
+_use_daemon = None
+_sessions = {}  # (session id, model) -> ChatSession of the in-process pipeline
+_lock = threading.Lock()
+
+
+def is_bundled_script(tts_script_path):
+    return os.path.normcase(os.path.abspath(tts_script_path)) == os.path.normcase(BUNDLED_TTS_SCRIPT)
+
+
+def daemon_available():
+    """True if a TTS daemon is running (checked once per process)"""
+    global _use_daemon
+    if _use_daemon is None:
+        _use_daemon = tts_daemon.is_running()
+    return _use_daemon
+
+
+def forget_daemon():
+    """Probe for the daemon again on the next call (e.g. after it stopped answering)"""
+    global _use_daemon
+    _use_daemon = None
+
+
+def load_pipeline(tts_script_path):
+    """The imported ollama_tts_app module, or None if the subprocess path should be used"""
+    global _pipeline
+    if not is_bundled_script(tts_script_path):
+        return None
+    with _lock:
+        if _pipeline is None:
+            started = time.perf_counter()
+            try:
+                import ollama_tts_app
+            except (ImportError, SystemExit) as e:
+                print(f"Warning: Could not load the TTS pipeline in-process ({e}); using a subprocess.", file=sys.stderr)
+                return None
+            _pipeline = ollama_tts_app
+            _setup_timings["import_ms"] = (time.perf_counter() - started) * 1000
+        return _pipeline
+
+
+def warm_up(tts_script_path, model):
+    """Import the pipeline, connect to Ollama, check the model and open the audio output"""
+    if is_bundled_script(tts_script_path) and daemon_available():
+        return
+    pipeline = load_pipeline(tts_script_path)
+    if pipeline is None:
+        return
+    try:
+        started = time.perf_counter()
+        pipeline.get_client(model)
+        connected = time.perf_counter()
+        pipeline.init_audio_output()
+        _setup_timings["connect_ms"] = (connected - started) * 1000
+        _setup_timings["audio_init_ms"] = (time.perf_counter() - connected) * 1000
+    except Exception as e:
+        # speak() retries the connection and reports the error
+        print(f"Warning: TTS warm-up failed: {e}", file=sys.stderr)
+
+
+def warm_up_async(tts_script_path, model):
+    """Run warm_up() on a background thread (e.g. while recording)"""
+    global _warm_up_thread
+    _warm_up_thread = threading.Thread(target=warm_up, args=(tts_script_path, model), name="tts-warm-up", daemon=True)
+    _warm_up_thread.start()
+
+
+def speak(text, tts_script_path, voice=None, model=None, verbose=False, session=None):
+    """Speak text in-process; returns per-stage times in ms, or None when the subprocess path is needed
+
+    With a session id the answer continues that conversation, and the
+    timings include the turn's statistics under "session".
+    Raises the pipeline's TTSError if Ollama or the synthesis fails.
+    """
+    if _warm_up_thread is not None:
+        _warm_up_thread.join()
+    if is_bundled_script(tts_script_path) and daemon_available():
+        try:
+            return speak_via_daemon(text, voice, model, session)
+        except tts_daemon.DaemonUnavailableError as e:
+            forget_daemon()
+            print(f"Warning: TTS daemon stopped answering ({e}); speaking in-process.", file=sys.stderr)
+    pipeline = load_pipeline(tts_script_path)
+    if pipeline is None:
+        return None
+    chat_session = None
+    if session:
+        chat_session = _sessions.setdefault((session, model), pipeline.ChatSession(model))
+    timings = pipeline.speak(text, model, voice, verbose=verbose, session=chat_session)
+    for stage, elapsed_ms in _setup_timings.items():
+        timings[stage] = timings.get(stage, 0.0) + elapsed_ms
+    _setup_timings.clear()
+    return timings
+
+
+def speak_via_daemon(text, voice=None, model=None, session=None):
+    """Submit text as a prompt to the TTS daemon and wait until it has been played"""
+    started = time.perf_counter()
+    job = tts_daemon.submit(prompt=text, model=model, voice=voice, session=session)
+    submit_ms = (time.perf_counter() - started) * 1000
+    job = tts_daemon.wait_for_job(job["id"])
+    if job["status"] != tts_daemon.JOB_DONE:
+        raise RuntimeError(f"TTS daemon job {job['status']}: {job.get('error')}")
+    timings = dict(job["timings"], submit_ms=submit_ms)
+    if job.get("session_turn"):
+        timings["session"] = job["session_turn"]
+    return timings
+
+
+def report_latency(timings):
+    """Print per-stage TTS latency; setup stages not listed were reused from an earlier call or the warm-up"""
+    labels = [
+        ("submit_ms", "submit to TTS daemon"),
+        ("queue_ms", "wait in daemon queue"),
+        ("import_ms", "import TTS pipeline"),
+        ("connect_ms", "Ollama connection + model check"),
+        ("audio_init_ms", "audio output init"),
+        ("llm_ms", "Ollama response"),
+        ("load_ms", "  of which model load"),
+        ("prompt_eval_ms", "  of which prompt evaluation"),
+        ("first_audio_ms", "time to first audio"),
+        ("synthesis_ms", "speech synthesis"),
+        ("playback_ms", "playback"),
+        ("subprocess_ms", "TTS subprocess (all stages)"),
+    ]
+    print("⏱️  TTS latency by stage:")
+    for key, label in labels:
+        if key in timings:
+            print(f"  {label:<34} {timings[key]:8.1f} ms")
+    if "submit_ms" in timings:
+        print("  The TTS daemon keeps the pipeline warm, so no setup runs per utterance.")
+    elif "subprocess_ms" not in timings:
+        print("  Setup stages ran once, overlapping the recording. A subprocess repeats them,")
+        print("  plus interpreter start and the dependency check, for every utterance.")
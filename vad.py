@@ -0,0 +1,196 @@
+"""
+Voice activity detection shared by the recording modes and the portal
+
+Audio is cut into short frames and three features are computed for all
+frames of a buffer at once with NumPy:
+
+- energy (dB) relative to an adaptive noise floor
+- zero-crossing rate (low for voiced speech, high for hiss)
+- normalized spectral flux (high at speech onsets)
+
+A frame is speech when its energy is well above the noise floor, or
+moderately above it and either voiced-looking or at an onset. A short run
+of speech frames is needed to start speech (clicks are ignored), and a
+hangover keeps speech active across brief gaps between words. The noise
+floor follows drops immediately and rises slowly, mostly during non-speech.
+
+EndpointDetector turns the per-frame decisions into utterance start/end
+events for recorders that need endpointing.
+"""
+
+import numpy as np
+
+DEFAULT_FRAME_MS = 20
+DEFAULT_THRESHOLD_DB = 9.0
+DEFAULT_HANGOVER_MS = 300
+DEFAULT_ONSET_MS = 60
+SPEECH_MARGIN_DB = 12.0  # speech_percentile cap: the threshold stays at a quarter of the speech amplitude or below,
+SPEECH_FLOOR_DB = 40.0  # but the cap never lowers it under RMS 100, so quiet hiss is still not speech
+
+
+def to_samples(data):
+    """int16 samples as float32 from bytes or any NumPy array"""
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        data = np.frombuffer(data, dtype=np.int16)
+    return np.asarray(data, dtype=np.float32)
+
+
+class VoiceActivityDetector:
+    """Streaming frame-wise voice activity detector for 16-bit PCM"""
+
+    def __init__(self, sample_rate=16000, frame_ms=DEFAULT_FRAME_MS, threshold_db=DEFAULT_THRESHOLD_DB,
+                 hangover_ms=DEFAULT_HANGOVER_MS, onset_ms=DEFAULT_ONSET_MS, voiced_zcr=0.25,
+                 flux_threshold=0.35, min_noise_db=20.0):
+        self.sample_rate = sample_rate
+        self.frame_len = max(2, int(sample_rate * frame_ms / 1000))
+        self.frame_s = self.frame_len / float(sample_rate)
+        self.threshold_db = threshold_db
+        self.hangover_frames = max(0, int(round(hangover_ms / 1000.0 / self.frame_s)))
+        self.onset_frames = max(1, int(round(onset_ms / 1000.0 / self.frame_s)))
+        self.voiced_zcr = voiced_zcr
+        self.flux_threshold = flux_threshold
+        self.min_noise_db = min_noise_db
+        self._window = np.hanning(self.frame_len).astype(np.float32)
+        self.reset()
+
+    def reset(self):
+        """Forget the noise floor and any partial frame"""
+        self.noise_db = None
+        self.frames_processed = 0
+        self.in_speech = False
+        self._remainder = np.zeros(0, dtype=np.float32)
+        self._prev_spectrum = None
+        self._run = 0
+        self._hang = 0
+
+    def _frames(self, samples):
+        samples = np.concatenate((self._remainder, to_samples(samples)))
+        count = len(samples) // self.frame_len
+        self._remainder = samples[count * self.frame_len:]
+        return samples[:count * self.frame_len].reshape(count, self.frame_len)
+
+    def features(self, frames):
+        """(energy_db, zcr, flux) arrays for a (frames, frame_len) block"""
+        energy_db = 10.0 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / float(self.frame_len - 1)
+
+        spectrum = np.abs(np.fft.rfft(frames * self._window, axis=1))
+        previous = np.empty_like(spectrum)
+        previous[0] = self._prev_spectrum if self._prev_spectrum is not None else spectrum[0]
+        previous[1:] = spectrum[:-1]
+        self._prev_spectrum = spectrum[-1]
+        flux = np.sum(np.maximum(spectrum - previous, 0.0), axis=1) / (np.sum(spectrum, axis=1) + 1e-10)
+        return energy_db, zcr, flux
+
+    def calibrate(self, samples, percentile=50, speech_percentile=None):
+        """Set the noise floor from ambient audio (use a low percentile for audio that contains speech)
+
+        With speech_percentile the floor is capped below that percentile's
+        level, so audio without real pauses is not taken for noise.
+        """
+        frames = self._frames(samples)
+        self._remainder = np.zeros(0, dtype=np.float32)
+        if len(frames):
+            energy_db, _, _ = self.features(frames)
+            noise_db = float(np.percentile(energy_db, percentile))
+            if speech_percentile is not None:
+                speech_db = float(np.percentile(energy_db, speech_percentile))
+                cap_db = max(speech_db - SPEECH_MARGIN_DB, SPEECH_FLOOR_DB) - self.threshold_db
+                noise_db = min(noise_db, cap_db)
+            self.noise_db = max(noise_db, self.min_noise_db)
+        return self.noise_db
+
+    def process(self, samples):
+        """Classify every complete frame in samples (plus leftovers); returns a bool array"""
+        frames = self._frames(samples)
+        decisions = np.zeros(len(frames), dtype=bool)
+        if not len(frames):
+            return decisions
+
+        energy_db, zcr, flux = self.features(frames)
+        if self.noise_db is None:
+            self.noise_db = max(float(energy_db[0]), self.min_noise_db)
+        half_threshold = self.threshold_db / 2.0
+        soft_cue = (zcr < self.voiced_zcr) | (flux > self.flux_threshold)
+
+        # The noise floor and hangover are stateful, so this part runs frame by frame on scalars
+        noise_db = self.noise_db
+        for index in range(len(frames)):
+            energy = energy_db[index]
+            snr = energy - noise_db
+            raw = snr > self.threshold_db or (snr > half_threshold and soft_cue[index])
+
+            if energy < noise_db:
+                noise_db += 0.2 * (energy - noise_db)
+            elif not raw:
+                noise_db += 0.02 * (energy - noise_db)
+            else:
+                noise_db += 0.0002 * (energy - noise_db)
+            if noise_db < self.min_noise_db:
+                noise_db = self.min_noise_db
+
+            self._run = self._run + 1 if raw else 0
+            if self.in_speech:
+                if raw:
+                    self._hang = self.hangover_frames
+                elif self._hang > 0:
+                    self._hang -= 1
+                else:
+                    self.in_speech = False
+            elif self._run >= self.onset_frames:
+                self.in_speech = True
+                self._hang = self.hangover_frames
+            decisions[index] = self.in_speech
+
+        self.noise_db = noise_db
+        self.frames_processed += len(frames)
+        return decisions
+
+
+class EndpointDetector:
+    """Utterance start/end events on top of a VoiceActivityDetector
+
+    An utterance ends once speech has been absent for end_silence_s
+    (measured from the last speech frame, so the VAD hangover counts
+    towards it).
+    """
+
+    def __init__(self, vad, end_silence_s=0.8):
+        self.vad = vad
+        hangover_s = vad.hangover_frames * vad.frame_s
+        self.end_silence_frames = max(1, int(round((end_silence_s - hangover_s) / vad.frame_s)))
+        self.in_utterance = False
+        self._silence = 0
+
+    def feed(self, samples):
+        """Process samples and return [(event, time_s)] with event "start" or "end"
+
+        "start" times are backdated by the VAD onset delay; "end" times
+        mark where the VAD (hangover included) stopped reporting speech.
+        """
+        vad = self.vad
+        first_frame = vad.frames_processed
+        events = []
+        for offset, speech in enumerate(vad.process(samples)):
+            position = (first_frame + offset) * vad.frame_s
+            if not self.in_utterance:
+                if speech:
+                    self.in_utterance = True
+                    self._silence = 0
+                    events.append(("start", max(0.0, position - (vad.onset_frames - 1) * vad.frame_s)))
+            elif speech:
+                self._silence = 0
+            else:
+                self._silence += 1
+                if self._silence >= self.end_silence_frames:
+                    self.in_utterance = False
+                    events.append(("end", position - (self._silence - 1) * vad.frame_s))
+        return events
+
+    def flush(self):
+        """End an utterance that is still open (e.g. when recording stops)"""
+        if not self.in_utterance:
+            return []
+        self.in_utterance = False
+        return [("end", (self.vad.frames_processed - self._silence) * self.vad.frame_s)]
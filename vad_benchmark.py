@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the voice activity detector in vad.py
+
+Streams WAV fixtures through VoiceActivityDetector/EndpointDetector in
+microphone-sized chunks and reports:
+
+- frames processed per second (and how much faster than real time)
+- end-of-speech detection delay: when the VAD stopped reporting speech,
+  and when the endpoint event fired, relative to the true end of speech
+
+The true end of speech is read from a sidecar JSON file next to each WAV
+(clip.wav -> clip.json with {"speech_end": seconds}). Without arguments
+the script synthesizes fixtures at several noise levels; use
+--write-fixtures DIR to keep them.
+
+Usage:
+    python vad_benchmark.py [clip.wav ...] [--end-silence 0.8] [--chunk 1024]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+from vad import VoiceActivityDetector, EndpointDetector
+
+
+def read_wav(path):
+    """Mono int16 samples and sample rate of a 16-bit PCM WAV file"""
+    with wave.open(path, 'rb') as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit PCM WAV files are supported")
+        rate = wav.getframerate()
+        samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+        channels = wav.getnchannels()
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1).astype(np.int16)
+    return samples, rate
+
+
+def synthetic_speech(seconds, rate, rng):
+    """Harmonic 'voiced' signal with syllable-rate amplitude modulation"""
+    t = np.arange(int(seconds * rate)) / float(rate)
+    f0 = 120 + 20 * np.sin(2 * np.pi * 0.7 * t) + rng.uniform(-10, 10)
+    phase = 2 * np.pi * np.cumsum(f0) / rate
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 12))
+    envelope = 0.5 + 0.5 * np.abs(np.sin(2 * np.pi * 3 * t))
+    return voiced * envelope * 3000
+
+
+def write_fixtures(directory, rate=16000):
+    """Write noise-level variations of a two-utterance clip with sidecar truth files"""
+    os.makedirs(directory, exist_ok=True)
+    rng = np.random.default_rng(7)
+    paths = []
+    for noise_rms in (20, 100, 400):
+        def noise(seconds):
+            return rng.normal(0, noise_rms, int(seconds * rate))
+
+        first, pause, second = 1.5, 0.5, 1.2
+        signal = np.concatenate([
+            noise(1.0),
+            synthetic_speech(first, rate, rng) + noise(first),
+            noise(pause),
+            synthetic_speech(second, rate, rng) + noise(second),
+            noise(3.0),
+        ])
+        path = os.path.join(directory, f"speech_noise{noise_rms}.wav")
+        with wave.open(path, 'wb') as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(rate)
+            wav.writeframes(np.clip(signal, -32768, 32767).astype(np.int16).tobytes())
+        with open(os.path.splitext(path)[0] + '.json', 'w', encoding='utf-8') as f:
+            json.dump({"speech_end": 1.0 + first + pause + second}, f)
+        paths.append(path)
+    return paths
+
+
+def speech_end_truth(path):
+    try:
+        with open(os.path.splitext(path)[0] + '.json', 'r', encoding='utf-8') as f:
+            return float(json.load(f)["speech_end"])
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def benchmark_file(path, chunk, end_silence):
+    samples, rate = read_wav(path)
+    vad = VoiceActivityDetector(sample_rate=rate)
+    endpoint = EndpointDetector(vad, end_silence_s=end_silence)
+
+    vad_end = None
+    endpoint_fired_at = None
+    elapsed = 0.0
+    for offset in range(0, len(samples), chunk):
+        block = samples[offset:offset + chunk]
+        first_frame = vad.frames_processed
+        start = time.perf_counter()
+        events = endpoint.feed(block)
+        elapsed += time.perf_counter() - start
+        # The last utterance end is the one compared with the true end of speech
+        for event, time_s in events:
+            if event == "end":
+                vad_end = time_s
+                endpoint_fired_at = (first_frame + len(block) // vad.frame_len) * vad.frame_s
+
+    frames = vad.frames_processed
+    truth = speech_end_truth(path)
+    return {
+        "file": os.path.basename(path),
+        "seconds": len(samples) / float(rate),
+        "frames": frames,
+        "frames_per_s": frames / elapsed if elapsed else float('inf'),
+        "realtime_factor": (len(samples) / float(rate)) / elapsed if elapsed else float('inf'),
+        "truth": truth,
+        "vad_end": vad_end,
+        "endpoint_at": endpoint_fired_at,
+    }
+
+
+def format_delay(value, truth):
+    if value is None:
+        return "   n/a"
+    if truth is None:
+        return f"{value:6.2f}s"
+    return f"{(value - truth) * 1000:+6.0f}ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the voice activity detector on WAV fixtures.")
+    parser.add_argument("wavs", nargs="*", help="16-bit PCM WAV files (default: synthesized fixtures)")
+    parser.add_argument("--chunk", type=int, default=1024, help="Samples per processing call (default: 1024, like the microphone)")
+    parser.add_argument("--end-silence", type=float, default=0.8, help="Pause that ends an utterance in seconds (default: 0.8)")
+    parser.add_argument("--write-fixtures", metavar="DIR", help="Write the synthesized fixtures to DIR and use them")
+    args = parser.parse_args()
+
+    if args.wavs:
+        paths = args.wavs
+    else:
+        directory = args.write_fixtures or tempfile.mkdtemp(prefix="vad-fixtures-")
+        paths = write_fixtures(directory)
+        print(f"📁 Synthesized fixtures in {directory}")
+
+    print(f"{'file':<28} {'frames':>7} {'frames/s':>10} {'x realtime':>10} {'vad end':>9} {'endpoint':>9}")
+    results = []
+    for path in paths:
+        try:
+            result = benchmark_file(path, args.chunk, args.end_silence)
+        except (OSError, ValueError, wave.Error) as e:
+            print(f"❌ {path}: {e}", file=sys.stderr)
+            continue
+        results.append(result)
+        print(f"{result['file']:<28} {result['frames']:>7} {result['frames_per_s']:>10.0f} "
+              f"{result['realtime_factor']:>10.0f} {format_delay(result['vad_end'], result['truth']):>9} "
+              f"{format_delay(result['endpoint_at'], result['truth']):>9}")
+
+    if results:
+        total_frames = sum(r["frames"] for r in results)
+        total_time = sum(r["frames"] / r["frames_per_s"] for r in results if r["frames_per_s"] != float('inf'))
+        print(f"\n⚡ {total_frames / total_time if total_time else float('inf'):.0f} frames/s overall")
+        print("   'vad end' is when the detector stopped reporting speech (includes the hangover);")
+        print("   'endpoint' is when the utterance-end event fired (includes --end-silence).")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,33 +7,40 @@ A beautiful web interface for the Ollama Speech-to-Text application
 import os
 import sys
 import json
-import threading
+import argparse
 import subprocess
 import time
+import shutil
+import zipfile
+from collections import deque
+from contextlib import contextmanager
 from datetime import datetime
-from pathlib import Path
+import importlib.util
+
+from fast_start import ensure_dependencies, lazy_import, startup_profile
+
+# List of required packages with their import names
+REQUIRED_PACKAGES = [
+    ('Flask==3.0.0', 'flask'),
+    ('SpeechRecognition==3.10.0', 'speech_recognition'),
+    ('pyaudio==0.2.11', 'pyaudio'),
+    ('pydub==0.25.1', 'pydub'),
+    ('Werkzeug==3.0.1', 'werkzeug'),
+    ('ollama', 'ollama'),
+    ('numpy', 'numpy')
+]
 
 def check_and_install_dependencies():
     """Check and install required dependencies on first run"""
     print("🔍 Checking dependencies...")
     
-    # List of required packages with their import names
-    required_packages = [
-        ('Flask==3.0.0', 'flask'),
-        ('SpeechRecognition==3.10.0', 'speech_recognition'),
-        ('pyaudio==0.2.11', 'pyaudio'),
-        ('pydub==0.25.1', 'pydub'),
-        ('Werkzeug==3.0.1', 'werkzeug')
-    ]
-    
     missing_packages = []
     
-    # Check each package
-    for package_spec, import_name in required_packages:
-        try:
-            __import__(import_name)
+    # Check each package (find_spec locates it without importing it)
+    for package_spec, import_name in REQUIRED_PACKAGES:
+        if importlib.util.find_spec(import_name) is not None:
             print(f"✅ {import_name} is already installed")
-        except ImportError:
+        else:
             missing_packages.append(package_spec)
             print(f"❌ {import_name} is missing")
     
@@ -79,31 +86,64 @@ def check_and_install_dependencies():
         print("✅ All dependencies are already installed!")
         return True
 
-# Check and install dependencies before importing Flask modules
-if not check_and_install_dependencies():
+# Check and install dependencies before importing Flask modules (skipped while the cached manifest is valid)
+if not ensure_dependencies('web_portal', [(name, spec) for spec, name in REQUIRED_PACKAGES], check_and_install_dependencies):
     print("❌ Failed to install dependencies. Please install them manually using:")
     print("pip install -r requirements.txt")
     sys.exit(1)
 
 # Now import Flask and other modules after ensuring dependencies are installed
 try:
-    from flask import Flask, render_template, request, jsonify, send_from_directory
+    from flask import Flask, render_template, request, jsonify, Response, stream_with_context
     import speech_recognition as sr
     import tempfile
-    import base64
+    httpx = lazy_import('httpx')
+    ollama = lazy_import('ollama')
+    from werkzeug.utils import secure_filename
+    from ollama_client import get_ollama_client
+    from model_residency import ModelResidencyManager
+    from transcription_jobs import TranscriptionJobQueue, QueueFullError, FINISHED_STATES
+    from transcription_cache import TranscriptionCache, audio_cache_key
+    from transcription_history import TranscriptionHistory
+    from transcription_log import get_transcription_log
+    from whisper_registry import get_whisper_registry, WhisperUnavailableError
+    from audio_segmentation import SegmentedTranscriber, audio_duration
+    from stream_sessions import StreamingSessionManager, SessionClosedError
+    from calibration_profile import CalibrationProfiles, microphone_key, noise_db_from_energy_threshold
+    from portal_server import run_production_server, WorkerHealth, MAX_WORKERS, DEFAULT_THREADS
 except ImportError as e:
     print(f"❌ Failed to import required modules: {e}")
     print("Please try installing dependencies manually using:")
     print("pip install -r requirements.txt")
     sys.exit(1)
 
+startup_profile.mark("imports")
+
 app = Flask(__name__)
 
 # Configuration
 PORT = 55667
 HOST = '0.0.0.0'  # Bind to all interfaces for Docker compatibility
+SERVER_MODE = os.environ.get('PORTAL_MODE', 'development')  # 'development' or 'production'
 UPLOAD_FOLDER = 'uploads'
 TRANSCRIPTION_FOLDER = 'transcriptions'
+TRANSCRIPTION_LOG_PATH = os.path.join(TRANSCRIPTION_FOLDER, 'transcriptions.db')
+TRANSCRIPTION_WORKERS = int(os.environ.get('TRANSCRIPTION_WORKERS', '2'))
+TRANSCRIPTION_QUEUE_SIZE = int(os.environ.get('TRANSCRIPTION_QUEUE_SIZE', '32'))
+UPLOAD_SPOOL_MAX_BYTES = int(os.environ.get('UPLOAD_SPOOL_MAX_BYTES', str(8 * 1024 * 1024)))  # larger uploads spill to disk
+TRANSCRIPTION_CACHE_ENTRIES = int(os.environ.get('TRANSCRIPTION_CACHE_ENTRIES', '256'))
+TRANSCRIPTION_CACHE_DIR = os.environ.get('TRANSCRIPTION_CACHE_DIR')  # unset disables the disk tier
+TRANSCRIPTION_CACHE_MAX_BYTES = int(os.environ.get('TRANSCRIPTION_CACHE_MAX_BYTES', str(50 * 1024 * 1024)))
+WHISPER_MODEL = os.environ.get('WHISPER_MODEL', 'base')
+WHISPER_PRELOAD = os.environ.get('WHISPER_PRELOAD', '').lower() in ('1', 'true', 'yes')
+HISTORY_CAPACITY = int(os.environ.get('HISTORY_CAPACITY', '1000'))
+HISTORY_MAX_PAGE_SIZE = 200
+BATCH_MAX_FILES = int(os.environ.get('BATCH_MAX_FILES', '500'))
+BATCH_MAX_MEMBER_BYTES = int(os.environ.get('BATCH_MAX_MEMBER_BYTES', str(200 * 1024 * 1024)))  # per file inside a zip
+BATCH_MAX_TOTAL_BYTES = int(os.environ.get('BATCH_MAX_TOTAL_BYTES', str(1024 * 1024 * 1024)))  # all zip members of a batch
+BATCH_AUDIO_EXTENSIONS = ('.wav', '.aif', '.aiff', '.aifc', '.flac')
+BATCH_QUEUE_WAIT_S = 60  # give up on the rest of a batch if the queue stays full this long
+SERVER_WORKERS = 1  # serving processes, set from --workers in production mode (see portal_server.MAX_WORKERS)
 
 # Ensure directories exist
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
@@ -111,68 +151,170 @@ os.makedirs(TRANSCRIPTION_FOLDER, exist_ok=True)
 
 # Global variables
 recording_status = {"active": False, "text": ""}
-transcription_history = []
+transcription_history = TranscriptionHistory(capacity=HISTORY_CAPACITY)
+transcription_log = get_transcription_log(TRANSCRIPTION_LOG_PATH)
+calibration_profiles = CalibrationProfiles()
 
 class STTProcessor:
-    def __init__(self):
+    def __init__(self, cache=None, segmenter=None):
         self.recognizer = sr.Recognizer()
         self.microphone = None
+        self.cache = cache
+        self.segmenter = segmenter or SegmentedTranscriber()
         try:
             self.microphone = sr.Microphone()
         except Exception as e:
             print(f"Warning: Could not initialize microphone: {e}")
     
-    def transcribe_audio_file(self, audio_file_path, engine="google"):
-        """Transcribe an uploaded audio file"""
+    def engine_settings(self, engine):
+        """Settings that influence an engine's output (part of the cache key)"""
+        if engine == "whisper":
+            return {"model": WHISPER_MODEL, "max_segment_s": self.segmenter.max_segment_s}
+        return {"language": "en-US", "max_segment_s": self.segmenter.max_segment_s}
+    
+    def recognize(self, audio, engine):
+        """Run the selected engine; Whisper uses the resident model registry"""
+        if engine == "whisper":
+            return get_whisper_registry().transcribe(audio, model_name=WHISPER_MODEL)
+        return self.recognizer.recognize_google(audio)
+    
+    @contextmanager
+    def open_audio_source(self, audio_file):
+        """Yield a path or file object that sr.AudioFile can decode"""
+        if isinstance(audio_file, str):
+            yield audio_file
+            return
+        
+        header = audio_file.read(4)
+        audio_file.seek(0)
+        if header == b'RIFF':
+            # WAV decodes straight from the in-memory buffer
+            yield audio_file
+            return
+        
+        # AIFF/FLAC detection re-reads the file from the start, which only works with a path
+        tmp = tempfile.NamedTemporaryFile(suffix='.audio', dir=UPLOAD_FOLDER, delete=False)
+        try:
+            with tmp:
+                shutil.copyfileobj(audio_file, tmp)
+            yield tmp.name
+        finally:
+            try:
+                os.remove(tmp.name)
+            except OSError:
+                pass
+    
+    def transcribe_audio_file(self, audio_file, engine="google"):
+        """Transcribe an uploaded audio file (a path or a seekable file-like object)"""
         try:
-            with sr.AudioFile(audio_file_path) as source:
-                audio = self.recognizer.record(source)
+            with self.open_audio_source(audio_file) as audio_source:
+                with sr.AudioFile(audio_source) as source:
+                    audio = self.recognizer.record(source)
             
-            if engine == "google":
-                text = self.recognizer.recognize_google(audio)
-            elif engine == "whisper":
-                text = self.recognizer.recognize_whisper(audio)
-            else:
-                text = self.recognizer.recognize_google(audio)
+            # Identical audio with the same engine settings gives the same text
+            cache_key = None
+            if self.cache is not None:
+                cache_key = audio_cache_key(audio, engine, self.engine_settings(engine))
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    return {**cached, "cached": True}
             
-            return {"success": True, "text": text.strip()}
+            # Long recordings are split at pauses and the segments transcribed in parallel
+            text, segments = self.segmenter.transcribe(
+                audio,
+                lambda segment: self.recognize(segment, engine),
+                whisper_model=WHISPER_MODEL if engine == "whisper" else None
+            )
+            if not text:
+                raise sr.UnknownValueError()
+            
+            result = {
+                "success": True,
+                "text": text,
+                "duration": round(audio_duration(audio), 2),
+                "segments": segments
+            }
+            if cache_key is not None:
+                self.cache.put(cache_key, result)
+            return result
         except sr.UnknownValueError:
             return {"success": False, "error": "Could not understand the audio"}
-        except sr.RequestError as e:
+        except (sr.RequestError, WhisperUnavailableError) as e:
             return {"success": False, "error": f"Error with {engine} service: {e}"}
         except Exception as e:
             return {"success": False, "error": f"Unexpected error: {e}"}
     
-    def record_and_transcribe(self, duration=10, engine="google"):
+    def record_and_transcribe(self, duration=10, engine="google", recalibrate=False):
         """Record from microphone and transcribe"""
         if not self.microphone:
             return {"success": False, "error": "Microphone not available"}
         
         try:
             with self.microphone as source:
-                self.recognizer.adjust_for_ambient_noise(source, duration=1)
-            
-            with self.microphone as source:
+                # A saved noise profile skips the 1 s ambient-noise measurement
+                device = microphone_key(source)
+                profile = None if recalibrate else calibration_profiles.get(device)
+                if profile is not None:
+                    self.recognizer.energy_threshold = profile["energy_threshold"]
+                else:
+                    self.recognizer.adjust_for_ambient_noise(source, duration=1)
+                    calibration_profiles.save(device, noise_db_from_energy_threshold(self.recognizer.energy_threshold))
+                
                 audio = self.recognizer.listen(source, timeout=duration, phrase_time_limit=duration)
+            # listen() keeps adapting the threshold while waiting for speech
+            calibration_profiles.update(device, noise_db_from_energy_threshold(self.recognizer.energy_threshold))
             
-            if engine == "google":
-                text = self.recognizer.recognize_google(audio)
-            elif engine == "whisper":
-                text = self.recognizer.recognize_whisper(audio)
-            else:
-                text = self.recognizer.recognize_google(audio)
+            text = self.recognize(audio, engine)
             
             return {"success": True, "text": text.strip()}
         except sr.WaitTimeoutError:
             return {"success": False, "error": "No speech detected within timeout"}
         except sr.UnknownValueError:
             return {"success": False, "error": "Could not understand the audio"}
-        except sr.RequestError as e:
+        except (sr.RequestError, WhisperUnavailableError) as e:
             return {"success": False, "error": f"Error with {engine} service: {e}"}
         except Exception as e:
             return {"success": False, "error": f"Unexpected error: {e}"}
 
-stt_processor = STTProcessor()
+transcription_cache = TranscriptionCache(
+    max_entries=TRANSCRIPTION_CACHE_ENTRIES,
+    cache_dir=TRANSCRIPTION_CACHE_DIR,
+    max_disk_bytes=TRANSCRIPTION_CACHE_MAX_BYTES
+)
+stt_processor = STTProcessor(cache=transcription_cache)
+
+# Load Whisper before serving so the first request does not pay for it
+if WHISPER_PRELOAD:
+    try:
+        get_whisper_registry().load(WHISPER_MODEL)
+    except WhisperUnavailableError as e:
+        print(f"⚠️  {e}")
+
+startup_profile.mark("app state (recognizer, caches, log)")
+transcription_jobs = TranscriptionJobQueue(worker_count=TRANSCRIPTION_WORKERS, max_queue_size=TRANSCRIPTION_QUEUE_SIZE)
+
+def transcribe_stream_utterance(pcm, sample_rate, sample_width, engine):
+    """Transcribe one utterance closed by a browser stream (runs on the stream pool)"""
+    try:
+        return stt_processor.recognize(sr.AudioData(pcm, sample_rate, sample_width), engine)
+    except sr.UnknownValueError:
+        return ""
+
+stream_sessions = StreamingSessionManager(transcribe_stream_utterance)
+
+worker_health = WorkerHealth()
+
+# Keep the configured Ollama models loaded (one serving process holds the lock and manages them)
+model_residency = ModelResidencyManager(get_ollama_client)
+
+def start_worker():
+    """Per-process setup after gunicorn forks a worker"""
+    worker_health.after_fork()
+    model_residency.start()
+
+@app.before_request
+def count_request():
+    worker_health.record_request()
 
 @app.route('/')
 def index():
@@ -187,9 +329,10 @@ def transcribe():
         method = data.get('method', 'microphone')
         engine = data.get('engine', 'google')
         duration = int(data.get('duration', 10))
+        recalibrate = bool(data.get('recalibrate', False))
         
         if method == 'microphone':
-            result = stt_processor.record_and_transcribe(duration=duration, engine=engine)
+            result = stt_processor.record_and_transcribe(duration=duration, engine=engine, recalibrate=recalibrate)
         else:
             return jsonify({"success": False, "error": "Invalid method"})
         
@@ -203,34 +346,18 @@ def transcribe():
             }
             transcription_history.append(transcription_entry)
             
-            # Save to file
-            save_transcription(result["text"])
+            # Append to the transcription log
+            save_transcription(result["text"], engine=engine, method=method)
         
         return jsonify(result)
     
     except Exception as e:
         return jsonify({"success": False, "error": str(e)})
 
-@app.route('/api/upload', methods=['POST'])
-def upload_audio():
-    """Handle audio file uploads"""
+def process_upload_job(audio_file, engine, filename):
+    """Transcribe a queued upload (runs on a transcription worker)"""
     try:
-        if 'audio' not in request.files:
-            return jsonify({"success": False, "error": "No audio file provided"})
-        
-        file = request.files['audio']
-        engine = request.form.get('engine', 'google')
-        
-        if file.filename == '':
-            return jsonify({"success": False, "error": "No file selected"})
-        
-        # Save uploaded file
-        filename = f"upload_{int(time.time())}_{file.filename}"
-        filepath = os.path.join(UPLOAD_FOLDER, filename)
-        file.save(filepath)
-        
-        # Transcribe
-        result = stt_processor.transcribe_audio_file(filepath, engine=engine)
+        result = stt_processor.transcribe_audio_file(audio_file, engine=engine)
         
         if result["success"]:
             # Save to history
@@ -243,30 +370,350 @@ def upload_audio():
             }
             transcription_history.append(transcription_entry)
             
-            # Save to file
-            save_transcription(result["text"])
+            # Append to the transcription log
+            save_transcription(result["text"], engine=engine, method="upload", filename=filename)
+        
+        return result
+    finally:
+        # Closing the spool frees the buffer and deletes any spilled temp file
+        audio_file.close()
+
+def spool_upload(file):
+    """Copy an upload into memory, spilling to a temp file only above UPLOAD_SPOOL_MAX_BYTES"""
+    spool = tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_MAX_BYTES, dir=UPLOAD_FOLDER)
+    try:
+        shutil.copyfileobj(file.stream, spool)
+        spool.seek(0)
+    except:
+        spool.close()
+        raise
+    return spool
+
+@app.route('/api/upload', methods=['POST'])
+def upload_audio():
+    """Handle audio file uploads by queueing a transcription job"""
+    try:
+        if 'audio' not in request.files:
+            return jsonify({"success": False, "error": "No audio file provided"})
+        
+        file = request.files['audio']
+        engine = request.form.get('engine', 'google')
+        wait = request.form.get('wait', '').lower() in ('1', 'true', 'yes')
+        
+        if file.filename == '':
+            return jsonify({"success": False, "error": "No file selected"})
         
-        # Clean up uploaded file
+        # Keep the upload in memory; the request stream is closed once we return
+        filename = secure_filename(file.filename)
+        audio_file = spool_upload(file)
+        
+        # Queue the transcription so this request thread returns immediately
         try:
-            os.remove(filepath)
-        except:
-            pass
+            job = transcription_jobs.submit(process_upload_job, audio_file, engine, filename)
+        except QueueFullError as e:
+            audio_file.close()
+            return jsonify({"success": False, "error": str(e)}), 503
         
-        return jsonify(result)
+        # Legacy behaviour: block until the transcription is finished
+        if wait:
+            job = transcription_jobs.wait(job["id"])
+            if job["status"] == "failed":
+                return jsonify({"success": False, "error": job["error"]})
+            return jsonify(job["result"])
+        
+        return jsonify({
+            "success": True,
+            "job_id": job["id"],
+            "status": job["status"],
+            "status_url": f"/api/jobs/{job['id']}",
+            "stream_url": f"/api/jobs/{job['id']}/stream"
+        }), 202
     
     except Exception as e:
         return jsonify({"success": False, "error": str(e)})
 
+def copy_limited(source, target, limit, name):
+    """Copy at most limit bytes; the sizes in a zip's directory are not to be trusted"""
+    copied = 0
+    while True:
+        block = source.read(1024 * 1024)
+        if not block:
+            return copied
+        copied += len(block)
+        if copied > limit:
+            raise ValueError(f"{name} is larger than its zip entry declares")
+        target.write(block)
+
+def spool_zip_members(archive, max_files, max_bytes):
+    """Yield (filename, spool, size) for every audio file inside a zip upload
+    
+    The archive's directory is checked against max_files and max_bytes
+    (total uncompressed size) before anything is extracted. Members over
+    BATCH_MAX_MEMBER_BYTES are yielded with spool None.
+    """
+    with zipfile.ZipFile(archive) as zf:
+        members = []
+        total_bytes = 0
+        for member in zf.infolist():
+            if member.is_dir() or not member.filename.lower().endswith(BATCH_AUDIO_EXTENSIONS):
+                continue
+            members.append(member)
+            if len(members) > max_files:
+                raise ValueError(f"A batch may contain at most {BATCH_MAX_FILES} files")
+            if member.file_size <= BATCH_MAX_MEMBER_BYTES:
+                total_bytes += member.file_size
+                if total_bytes > max_bytes:
+                    raise ValueError(f"The zip archives of a batch may hold at most {BATCH_MAX_TOTAL_BYTES} bytes of audio")
+        for member in members:
+            filename = secure_filename(os.path.basename(member.filename))
+            if member.file_size > BATCH_MAX_MEMBER_BYTES:
+                yield filename, None, 0
+                continue
+            spool = tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_MAX_BYTES, dir=UPLOAD_FOLDER)
+            try:
+                with zf.open(member) as source:
+                    size = copy_limited(source, spool, member.file_size, filename)
+            except Exception:
+                spool.close()
+                raise
+            spool.seek(0)
+            yield filename, spool, size
+
+def batch_result_line(index, filename, job):
+    """One NDJSON line describing a finished batch file"""
+    line = {"index": index, "filename": filename}
+    if job is None:
+        line.update(success=False, error="Job result expired")
+    elif job["status"] == "failed":
+        line.update(job_id=job["id"], success=False, error=job["error"])
+    else:
+        line.update(job_id=job["id"], **job["result"])
+    return json.dumps(line) + "\n"
+
+@app.route('/api/upload/batch', methods=['POST'])
+def upload_batch():
+    """Transcribe many files (or zip archives of them) in one request
+    
+    Every file is queued on the transcription workers; one NDJSON line per
+    file is streamed back as soon as it finishes, in completion order.
+    """
+    engine = request.form.get('engine', 'google')
+    files = [f for f in request.files.getlist('audio') if f.filename]
+    if not files:
+        return jsonify({"success": False, "error": "No audio files provided"}), 400
+    
+    # Read everything before streaming; the request body is gone once the response starts
+    items = deque()
+    rejected = []
+    zip_bytes = 0
+    try:
+        for file in files:
+            filename = secure_filename(file.filename)
+            if len(items) + len(rejected) >= BATCH_MAX_FILES:
+                raise ValueError(f"A batch may contain at most {BATCH_MAX_FILES} files")
+            spool = spool_upload(file)
+            if filename.lower().endswith('.zip'):
+                with spool:
+                    members = spool_zip_members(spool, BATCH_MAX_FILES - len(items) - len(rejected),
+                                                BATCH_MAX_TOTAL_BYTES - zip_bytes)
+                    for member_name, member_spool, size in members:
+                        if member_spool is None:
+                            rejected.append((member_name, "File is too large"))
+                        else:
+                            zip_bytes += size
+                            items.append((member_name, member_spool))
+            else:
+                items.append((filename, spool))
+    except Exception as e:
+        for _, spool in items:
+            spool.close()
+        status = 400 if isinstance(e, (ValueError, zipfile.BadZipFile)) else 500
+        return jsonify({"success": False, "error": str(e)}), status
+    
+    def generate():
+        pending = {}
+        next_index = 0
+        stalled_since = None
+        try:
+            for filename, error in rejected:
+                yield json.dumps({"index": None, "filename": filename, "success": False, "error": error}) + "\n"
+            
+            while items or pending:
+                # Keep the shared queue topped up without failing the batch when it is full
+                while items:
+                    filename, spool = items[0]
+                    try:
+                        job = transcription_jobs.submit(process_upload_job, spool, engine, filename)
+                    except QueueFullError:
+                        break
+                    items.popleft()
+                    pending[job["id"]] = (next_index, filename)
+                    next_index += 1
+                
+                if not pending:
+                    # The queue is full of other requests' jobs; back off and retry
+                    stalled_since = stalled_since or time.monotonic()
+                    if time.monotonic() - stalled_since > BATCH_QUEUE_WAIT_S:
+                        while items:
+                            filename, spool = items.popleft()
+                            spool.close()
+                            yield json.dumps({"index": next_index, "filename": filename, "success": False,
+                                              "error": "Transcription queue is full, please retry later"}) + "\n"
+                            next_index += 1
+                        return
+                    time.sleep(0.2)
+                    continue
+                stalled_since = None
+                
+                for job_id, job in transcription_jobs.wait_any(list(pending), timeout=1).items():
+                    index, filename = pending.pop(job_id)
+                    yield batch_result_line(index, filename, job)
+        finally:
+            # Client went away: drop the files that were never queued
+            for _, spool in items:
+                spool.close()
+    
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson', headers=headers)
+
+@app.route('/api/jobs/<job_id>')
+def get_job(job_id):
+    """Poll the status and result of a transcription job"""
+    job = transcription_jobs.get(job_id)
+    if job is None:
+        return jsonify({"success": False, "error": "Unknown job id"}), 404
+    return jsonify({"success": True, "job": job})
+
+@app.route('/api/jobs/<job_id>/stream')
+def stream_job(job_id):
+    """Stream transcription job status changes as Server-Sent Events"""
+    def generate():
+        version = -1
+        while True:
+            job = transcription_jobs.wait_for_update(job_id, version, timeout=15)
+            if job is None:
+                yield f"event: error\ndata: {json.dumps({'error': 'Unknown job id'})}\n\n"
+                return
+            if job["version"] == version:
+                # Keep idle connections (and proxies) from timing out
+                yield ": keepalive\n\n"
+                continue
+            version = job["version"]
+            yield f"event: status\ndata: {json.dumps(job)}\n\n"
+            if job["status"] in FINISHED_STATES:
+                return
+    
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers=headers)
+
+@app.route('/api/stream/start', methods=['POST'])
+def start_stream():
+    """Open a browser microphone stream; the client then posts raw 16 kHz mono int16 PCM chunks"""
+    # Sessions live in this process; other workers would answer the chunk posts with 404
+    if SERVER_WORKERS > 1:
+        return jsonify({"success": False, "error": "Browser streaming needs a single portal worker (--workers 1)"}), 409
+    data = request.get_json(silent=True) or {}
+    session = stream_sessions.start(data.get('engine', 'google'))
+    return jsonify({
+        "success": True,
+        "session_id": session.id,
+        "sample_rate": 16000,
+        "chunk_url": f"/api/stream/{session.id}/chunk",
+        "events_url": f"/api/stream/{session.id}/events",
+        "end_url": f"/api/stream/{session.id}/end"
+    })
+
+@app.route('/api/stream/<session_id>/chunk', methods=['POST'])
+def stream_chunk(session_id):
+    """Append a chunk of PCM audio to a stream"""
+    session = stream_sessions.get(session_id)
+    if session is None:
+        return jsonify({"success": False, "error": "Unknown stream id"}), 404
+    try:
+        stream_sessions.feed(session, request.get_data())
+    except SessionClosedError as e:
+        return jsonify({"success": False, "error": str(e)}), 409
+    return jsonify({"success": True})
+
+@app.route('/api/stream/<session_id>/events')
+def stream_events(session_id):
+    """Stream partial transcripts as Server-Sent Events until the final transcript is ready"""
+    session = stream_sessions.get(session_id)
+    if session is None:
+        return jsonify({"success": False, "error": "Unknown stream id"}), 404
+    
+    def generate():
+        version = -1
+        while True:
+            snapshot = session.wait_for_update(version, timeout=15)
+            if snapshot["version"] == version:
+                # Keep idle connections (and proxies) from timing out
+                yield ": keepalive\n\n"
+                continue
+            version = snapshot["version"]
+            event = "final" if snapshot["final"] else "partial"
+            yield f"event: {event}\ndata: {json.dumps(snapshot)}\n\n"
+            if snapshot["final"]:
+                return
+    
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers=headers)
+
+@app.route('/api/stream/<session_id>/end', methods=['POST'])
+def end_stream(session_id):
+    """Flush the stream and return the final transcript"""
+    session = stream_sessions.get(session_id)
+    if session is None:
+        return jsonify({"success": False, "error": "Unknown stream id"}), 404
+    
+    result = stream_sessions.end(session, timeout=120)
+    if not result["text"]:
+        return jsonify({"success": False, "error": "No speech detected", "stream": result})
+    
+    transcription_history.append({
+        "timestamp": datetime.now().isoformat(),
+        "text": result["text"],
+        "engine": result["engine"],
+        "method": "stream"
+    })
+    save_transcription(result["text"], engine=result["engine"], method="stream", duration=result["duration"])
+    return jsonify({"success": True, "text": result["text"], "duration": result["duration"],
+                    "segments": result["segments"]})
+
 @app.route('/api/history')
 def get_history():
-    """Get transcription history"""
-    return jsonify({"history": transcription_history})
+    """Get a page of transcription history (newest first)
+    
+    Query parameters: limit, since (only ids greater than this),
+    before (only ids lower than this) and offset.
+    """
+    try:
+        limit = min(int(request.args.get('limit', 50)), HISTORY_MAX_PAGE_SIZE)
+        since = request.args.get('since', type=int)
+        before = request.args.get('before', type=int)
+        offset = max(0, int(request.args.get('offset', 0)))
+    except ValueError:
+        return jsonify({"success": False, "error": "Invalid pagination parameters"}), 400
+    
+    return jsonify(transcription_history.page(limit=max(1, limit), since=since, before=before, offset=offset))
+
+@app.route('/api/transcriptions')
+def get_transcriptions():
+    """Read logged transcriptions by time range (start/end as epoch seconds)"""
+    try:
+        start = request.args.get('start', type=float)
+        end = request.args.get('end', type=float)
+        limit = min(int(request.args.get('limit', 100)), 1000)
+    except ValueError:
+        return jsonify({"success": False, "error": "Invalid range parameters"}), 400
+    
+    transcription_log.flush()
+    return jsonify({"success": True, "transcriptions": transcription_log.read_range(start=start, end=end, limit=max(1, limit))})
 
 @app.route('/api/clear-history', methods=['POST'])
 def clear_history():
     """Clear transcription history"""
-    global transcription_history
-    transcription_history = []
+    transcription_history.clear()
     return jsonify({"success": True})
 
 @app.route('/api/forward-to-ollama', methods=['POST'])
@@ -280,25 +727,56 @@ def forward_to_ollama():
         if not text:
             return jsonify({"success": False, "error": "No text provided"})
         
-        # Try to run ollama command
+        # Forward through the shared, connection-pooled HTTP client
         try:
-            cmd = ['ollama', 'run', model, text]
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-            
-            if result.returncode == 0:
-                return jsonify({"success": True, "response": result.stdout})
-            else:
-                return jsonify({"success": False, "error": result.stderr})
-        except subprocess.TimeoutExpired:
+            result = get_ollama_client().generate(model, text)
+            model_residency.record_use(model, result.get("load_duration"))
+            return jsonify({"success": True, **result})
+        except httpx.TimeoutException:
             return jsonify({"success": False, "error": "Ollama request timed out"})
-        except FileNotFoundError:
-            return jsonify({"success": False, "error": "Ollama not found. Please ensure Ollama is installed and running."})
+        except (httpx.ConnectError, ConnectionError):
+            return jsonify({"success": False, "error": "Ollama not reachable. Please ensure Ollama is installed and running."})
+        except ollama.ResponseError as e:
+            return jsonify({"success": False, "error": f"Ollama error: {e.error}"})
         except Exception as e:
-            return jsonify({"success": False, "error": f"Error running Ollama: {str(e)}"})
+            return jsonify({"success": False, "error": f"Error contacting Ollama: {str(e)}"})
     
     except Exception as e:
         return jsonify({"success": False, "error": str(e)})
 
+@app.route('/api/forward-to-ollama/stream', methods=['GET', 'POST'])
+def forward_to_ollama_stream():
+    """Stream Ollama tokens to the browser as Server-Sent Events"""
+    data = request.get_json(silent=True) or request.args
+    text = data.get('text', '')
+    model = data.get('model', 'llama3.1:latest')
+    
+    def sse(event, payload):
+        return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+    
+    def generate():
+        if not text:
+            yield sse('error', {"error": "No text provided"})
+            return
+        try:
+            for item in get_ollama_client().stream_generate(model, text):
+                if item.get('done'):
+                    model_residency.record_use(model, item.get("load_duration"))
+                    yield sse('done', item)
+                else:
+                    yield sse('token', item)
+        except httpx.TimeoutException:
+            yield sse('error', {"error": "Ollama request timed out"})
+        except (httpx.ConnectError, ConnectionError):
+            yield sse('error', {"error": "Ollama not reachable. Please ensure Ollama is installed and running."})
+        except ollama.ResponseError as e:
+            yield sse('error', {"error": f"Ollama error: {e.error}"})
+        except Exception as e:
+            yield sse('error', {"error": f"Error contacting Ollama: {str(e)}"})
+    
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers=headers)
+
 @app.route('/api/system-info')
 def system_info():
     """Get system information"""
@@ -308,40 +786,88 @@ def system_info():
             "microphone_available": stt_processor.microphone is not None,
             "ollama_available": check_ollama_available(),
             "supported_engines": ["google", "whisper"],
-            "transcription_count": len(transcription_history)
+            "transcription_count": len(transcription_history),
+            "ollama_client": get_ollama_client().info(),
+            "ollama_residency": model_residency.stats(),
+            "transcription_queue": transcription_jobs.stats(),
+            "transcription_cache": transcription_cache.stats(),
+            "transcription_log": transcription_log.stats(),
+            "whisper": get_whisper_registry().stats(),
+            "segmentation": stt_processor.segmenter.stats(),
+            "streaming": stream_sessions.stats()
         }
         return jsonify(info)
     except Exception as e:
         return jsonify({"error": str(e)})
 
+@app.route('/api/health')
+def health():
+    """Liveness and per-worker health for this server process"""
+    return jsonify({
+        "status": "ok",
+        "mode": SERVER_MODE,
+        "worker": worker_health.snapshot(),
+        "transcription_queue": transcription_jobs.stats(),
+        "transcription_log_pending": transcription_log.stats()["pending"]
+    })
+
+def shutdown_worker():
+    """Finish queued transcriptions and flush the log before this process exits"""
+    print(f"🛑 Worker {os.getpid()} shutting down...")
+    if not transcription_jobs.shutdown(timeout=25):
+        print("⚠️  Some queued transcriptions did not finish before shutdown")
+    transcription_log.close()
+    stt_processor.segmenter.shutdown()
+    stream_sessions.shutdown()
+
 def check_ollama_available():
     """Check if Ollama is available"""
     try:
-        result = subprocess.run(['ollama', 'list'], capture_output=True, text=True, timeout=5)
-        return result.returncode == 0
+        return get_ollama_client().is_available()
     except:
         return False
 
-def save_transcription(text):
-    """Save transcription to file"""
+def save_transcription(text, engine=None, method=None, **metadata):
+    """Append a transcription to the log (committed in batches by a background writer)"""
     try:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"transcription_{timestamp}.txt"
-        filepath = os.path.join(TRANSCRIPTION_FOLDER, filename)
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(f"Timestamp: {datetime.now().isoformat()}\n")
-            f.write(f"Text: {text}\n")
+        return transcription_log.append(text, source=method, engine=engine, **metadata)
     except Exception as e:
         print(f"Error saving transcription: {e}")
+        return None
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Ollama STT Web Portal")
+    parser.add_argument("--mode", choices=["development", "production"], default=SERVER_MODE,
+                        help="'development' runs Flask's debug server; 'production' runs preforked workers (default: $PORTAL_MODE or development)")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS,
+                        help=f"Worker processes in production mode (at most {MAX_WORKERS}; scale with --threads)")
+    parser.add_argument("--threads", type=int, default=DEFAULT_THREADS, help="Threads per worker in production mode")
+    parser.add_argument("--host", default=HOST, help=f"Interface to bind (default: {HOST})")
+    parser.add_argument("--port", type=int, default=PORT, help=f"Port to listen on (default: {PORT})")
+    parser.add_argument("--startup-profile", action="store_true", help="Print how long each startup phase took")
+    return parser.parse_args()
 
 if __name__ == '__main__':
+    args = parse_args()
+    SERVER_MODE = args.mode
+    # Without gunicorn production mode falls back to a single process
+    SERVER_WORKERS = min(args.workers, MAX_WORKERS) if args.mode == 'production' and importlib.util.find_spec('gunicorn') else 1
+    
     print("🚀 Starting Ollama STT Web Portal...")
     print("📦 Automatic dependency installation enabled")
-    print(f"📡 Server will run on http://{HOST}:{PORT}")
+    print(f"📡 Server will run on http://{args.host}:{args.port}")
     print(f"🎙️  Microphone available: {stt_processor.microphone is not None}")
     print(f"🤖 Ollama available: {check_ollama_available()}")
     print("💡 Dependencies will be automatically installed if missing")
     print("=" * 50)
+    startup_profile.mark("startup checks (Ollama probe)")
+    startup_profile.report()
     
-    app.run(host=HOST, port=PORT, debug=True)
+    if args.mode == 'production':
+        run_production_server(app, args.host, args.port, workers=args.workers, threads=args.threads,
+                              on_worker_start=start_worker, on_worker_exit=shutdown_worker)
+    else:
+        # With the debug reloader only the serving child process preloads models
+        if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+            model_residency.start()
+        app.run(host=args.host, port=args.port, debug=True)
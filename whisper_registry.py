@@ -0,0 +1,143 @@
+"""
+Process-wide registry of resident Whisper models
+
+recognize_whisper caches the model on a Recognizer instance, and our apps
+create recognizers per call, so the model was reloaded on the request
+path. The registry loads each configured model once (optionally ahead of
+time), keeps it resident, and hands out instances from a small pool so
+concurrent requests never share a model at the same time.
+
+Configuration (environment variables):
+- WHISPER_MODEL      Model name to load (default: base)
+- WHISPER_POOL_SIZE  Model instances kept per name (default: 1)
+"""
+
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+DEFAULT_MODEL = os.environ.get('WHISPER_MODEL', 'base')
+DEFAULT_POOL_SIZE = int(os.environ.get('WHISPER_POOL_SIZE', '1'))
+
+
+class WhisperUnavailableError(RuntimeError):
+    """Raised when the openai-whisper package (or its model) cannot be loaded"""
+
+
+class WhisperModelRegistry:
+    """Loads Whisper models once and serializes access to each instance"""
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, stats_window=200):
+        self.pool_size = max(1, pool_size)
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self._pools = {}
+        self._load_times = {}
+        self._inference_times = {}
+        self._inference_counts = {}
+        self._stats_window = stats_window
+
+    def _load_lock(self, model_name):
+        with self._lock:
+            return self._load_locks.setdefault(model_name, threading.Lock())
+
+    def load(self, model_name=DEFAULT_MODEL):
+        """Load model_name into the pool if it is not resident yet"""
+        if model_name in self._pools:
+            return
+        with self._load_lock(model_name):
+            if model_name in self._pools:
+                return
+            try:
+                import whisper
+            except ImportError as e:
+                raise WhisperUnavailableError(
+                    "Whisper is not installed. Install it with: pip install openai-whisper"
+                ) from e
+
+            start = time.perf_counter()
+            pool = queue.Queue()
+            try:
+                for _ in range(self.pool_size):
+                    pool.put(whisper.load_model(model_name))
+            except Exception as e:
+                raise WhisperUnavailableError(f"Could not load Whisper model '{model_name}': {e}") from e
+            load_time = time.perf_counter() - start
+
+            with self._lock:
+                self._load_times[model_name] = load_time
+                self._inference_times[model_name] = deque(maxlen=self._stats_window)
+                self._inference_counts[model_name] = 0
+                self._pools[model_name] = pool
+            print(f"🧠 Whisper model '{model_name}' loaded in {load_time:.1f}s")
+
+    def preload_async(self, model_name=DEFAULT_MODEL):
+        """Load a model on a background thread (e.g. while the user is still speaking)"""
+        def load():
+            try:
+                self.load(model_name)
+            except WhisperUnavailableError as e:
+                print(f"⚠️  {e}")
+
+        thread = threading.Thread(target=load, name=f"whisper-preload-{model_name}", daemon=True)
+        thread.start()
+        return thread
+
+    def transcribe(self, audio, model_name=DEFAULT_MODEL, language=None, **options):
+        """Transcribe an sr.AudioData with a resident model and return the text"""
+        import numpy as np
+
+        self.load(model_name)
+
+        # Whisper expects 16 kHz mono float32 samples in [-1, 1]
+        raw = audio.get_raw_data(convert_rate=16000, convert_width=2)
+        samples = np.frombuffer(raw, dtype=np.int16).astype(np.float32) / 32768.0
+
+        try:
+            import torch
+            fp16 = torch.cuda.is_available()
+        except ImportError:
+            fp16 = False
+
+        pool = self._pools[model_name]
+        model = pool.get()
+        start = time.perf_counter()
+        try:
+            result = model.transcribe(samples, language=language, fp16=fp16, **options)
+        finally:
+            pool.put(model)
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._inference_times[model_name].append(elapsed)
+                self._inference_counts[model_name] += 1
+        return result.get("text", "")
+
+    def stats(self):
+        """Resident models with their load time and inference timings"""
+        with self._lock:
+            models = {}
+            for name, load_time in self._load_times.items():
+                times = self._inference_times[name]
+                models[name] = {
+                    "load_time_s": round(load_time, 2),
+                    "inferences": self._inference_counts[name],
+                    "avg_inference_ms": round(sum(times) / len(times) * 1000, 1) if times else None,
+                    "last_inference_ms": round(times[-1] * 1000, 1) if times else None,
+                }
+            return {"pool_size": self.pool_size, "models": models}
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_whisper_registry():
+    """Return the process-wide Whisper model registry"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = WhisperModelRegistry()
+    return _registry